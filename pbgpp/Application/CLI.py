@@ -24,7 +24,12 @@ import logging
 import sys
 
 from pbgpp.Application.Handler import PBGPPHandler
+from pbgpp.Application.IndexHandler import PBGPPIndexHandler
+from pbgpp.Output.Formatters.JSON import JSONFormatter
 from pbgpp.Output.Formatters.LineBased import LineBasedFormatter
+from pbgpp.Output.Pipes.KafkaPipe import KafkaPipe
+from pbgpp.PCAP.Index import PCAPTimeIndex
+from pbgpp.PCAP.RouteIndex import PCAPRouteIndex
 
 
 def main():
@@ -32,9 +37,14 @@ def main():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     logging.getLogger().setLevel(logging.ERROR)
 
+    # Subcommands are dispatched before the main argument parser, which has no positional arguments
+    if len(sys.argv) > 1 and sys.argv[1] == "index":
+        index_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="detailed bgp packet message parsing from PCAP files or direct network traffic")
 
-    parser.add_argument("-f", "--formatter", help="specify data output format", choices=['JSON', 'HUMAN_READABLE', 'LINE'], default="HUMAN_READABLE", dest="formatter")
+    parser.add_argument("-f", "--formatter", help="specify data output format", choices=['JSON', 'HUMAN_READABLE', 'LINE', 'MRT', 'PCAP'], default="HUMAN_READABLE", dest="formatter")
     parser.add_argument("-p", "--pipe", help="specify output target type of parsed messages", choices=['FILE', 'STDOUT', 'KAFKA'], default="STDOUT", dest="pipe")
     parser.add_argument("-o", "--output", help="specify target output file if your output type is set to FILE", dest="output_target")
 
@@ -42,6 +52,10 @@ def main():
     group_1.add_argument("--interface", help="use a network interface as input  (specify interface)", dest="interface")
     group_1.add_argument("--pcap", help="use a pcap file as input (specify file)", dest="pcap")
     group_1.add_argument("--stdin", "-", help="use stdin as input", dest="stdin", action="store_true")
+    group_1.add_argument("--follow", help="use a pcap file that is still being written as input and wait for new packets (like tail -f)", dest="follow")
+    group_1.add_argument("--watch-dir", help="use all pcap files of a directory of rotated captures (e.g. tcpdump -G or -C) as input and wait for new files and packets", dest="watch_dir")
+    group_1.add_argument("--mrt", help="use an MRT file with BGP4MP records as input, optionally gzip or bzip2 compressed (specify file)", dest="mrt")
+    group_1.add_argument("--bmp-listen", help="accept BMP (RFC 7854) connections of monitoring routers as input (specify host:port, e.g. 0.0.0.0:11019)", dest="bmp_listen")
 
     group_2 = parser.add_mutually_exclusive_group()
     group_2.add_argument("-q", "--quiet", help="only show parsing output", action="store_true", dest="quiet")
@@ -50,17 +64,30 @@ def main():
     group_3 = parser.add_argument_group("kafka configuration")
     group_3.add_argument("--kafka-server", help="IP address / hostname (and port if it's different from 9092) of the target Apache Kafka server if your output type is set to KAFKA (e.g. 127.0.0.1:9092)", dest="kafka_server")
     group_3.add_argument("--kafka-topic", help="topic of Apache Kafka server if your output type is set to KAFKA (e.g. pbgpp)", dest="kafka_topic")
+    group_3.add_argument("--kafka-key", help="record key: none, the IP address of the peer (all messages of a peer in one partition) or the IP addresses of the session (both directions in one partition) (default: none)", choices=KafkaPipe.CHOICES_KEYS, default=KafkaPipe.KEY_NONE, dest="kafka_key")
+    group_3.add_argument("--kafka-compression", help="compression of record batches (default: none)", choices=KafkaPipe.CHOICES_COMPRESSION, dest="kafka_compression")
+    group_3.add_argument("--kafka-linger-ms", help="milliseconds to wait for more records before sending a batch (default: " + str(KafkaPipe.PRODUCER_DEFAULTS["linger_ms"]) + ")", type=int, dest="kafka_linger_ms")
+    group_3.add_argument("--kafka-batch-size", help="maximum size of a record batch in bytes (default: " + str(KafkaPipe.PRODUCER_DEFAULTS["batch_size"]) + ")", type=int, dest="kafka_batch_size")
+    group_3.add_argument("--kafka-acks", help="acknowledgements required for a delivered record (default: 1)", choices=["0", "1", "all"], dest="kafka_acks")
+    group_3.add_argument("--kafka-max-in-flight", help="maximum number of records waiting for delivery before reading of the input is paused (default: " + str(KafkaPipe.MAX_IN_FLIGHT) + ")", type=int, dest="kafka_max_in_flight")
 
     group_4 = parser.add_argument_group("filters")
+    group_4.add_argument("--filter-time-range", help="only print messages captured between START and END (inclusive; epoch timestamps or UTC times like 2017-02-01T10:00:00); use ~START END for messages outside of the range", nargs=2, metavar=("START", "END"), action="append", dest="filter_time_range")
     group_4.add_argument("--filter-timestamp", help="only print messages with given epoch timestamp (e.g., 123456789)", nargs="+", action="append", dest="filter_timestamp")
     group_4.add_argument("--filter-message-size", help="only print messages with given message size in bytes (e.g., 128)", nargs="+", action="append", dest="filter_message_size")
     group_4.add_argument("--filter-message-type", help="only print messages with given BGP message type (KEEPALIVE, NOTIFICATION, OPEN, ROUTE-REFRESH, UPDATE, WITHDRAWAL)", nargs="+", action="append", dest="filter_message_type")
     group_4.add_argument("--filter-message-subtype", help="only print UPDATE messages with given message sub type (WITHDRAWAL, ANNOUNCE, BOTH, NONE)", nargs="+", action="append", dest="filter_message_subtype")
     group_4.add_argument("--filter-nlri", help="only print messages containing the given nlri prefix (e.g., '80.81.82.0/24'", nargs="+", action="append", dest="filter_nlri")
     group_4.add_argument("--filter-withdrawn", help="only print messages containing the given withdrawn routes (e.g., '80.81.82.0/24'", nargs="+", action="append", dest="filter_withdrawn")
-    group_4.add_argument("--filter-next-hop", help="only print messages containing the given next hop (e.g., '80.81.82.83')", nargs="+", action="append", dest="filter_next_hop")
+    group_4.add_argument("--filter-prefix-file", help="only print messages containing an nlri or withdrawn prefix listed in the given file (one prefix per line)", nargs="+", action="append", dest="filter_prefix_file")
+    group_4.add_argument("--prefix-list-file", help="only print UPDATE messages announcing a prefix covered by the prefix list in the given file (one prefix per line, e.g. IRR prefix lists or bogons); use ~FILE for prefixes outside of the list", nargs="+", action="append", dest="prefix_list_file")
+    group_4.add_argument("--asn-list-file", help="only print UPDATE messages with an AS path containing an ASN listed in the given file (one ASN or range like 64512-65534 per line); use ~FILE for ASN not listed", nargs="+", action="append", dest="asn_list_file")
+    group_4.add_argument("--filter-prefix-mode", help="match mode of --filter-nlri, --filter-withdrawn and --filter-prefix-file: prefixes must equal a filter value (exact, default), be a more specific of it (orlonger) or a less specific of it (orshorter)", choices=["exact", "orlonger", "orshorter"], dest="filter_prefix_mode")
+    group_4.add_argument("--filter-next-hop", help="only print messages containing the given next hop or a next hop within the given prefix (e.g., '80.81.82.83' or '80.81.192.0/21')", nargs="+", action="append", dest="filter_next_hop")
     group_4.add_argument("--filter-as", help="only print messages containing the given ASN in path AS_PATH attribute (e.g., '12345')", nargs="+", action="append", dest="filter_asn")
     group_4.add_argument("--filter-last-as", help="only print messages containing the given ASN as last ASN in AS_PATH attribute (e.g., '12345')", nargs="+", action="append", dest="filter_last_asn")
+    group_4.add_argument("--filter-as-path-regex", help="only print messages whose AS_PATH matches the given Cisco-style regular expression (e.g., '_6939_', '^174 .* 3356$')", nargs="+", action="append", dest="filter_as_path_regex")
+    group_4.add_argument("--filter-community", help="only print messages containing the given community (e.g., '65535:666')", nargs="+", action="append", dest="filter_community")
     group_4.add_argument("--filter-community-as", help="only print messages containing the given community ASN (e.g., '12345')", nargs="+", action="append", dest="filter_community_as")
     group_4.add_argument("--filter-community-value", help="only print messages containing the given community value (e.g., '12345')", nargs="+", action="append", dest="filter_community_value")
     group_4.add_argument("--filter-source-ip", help="only print messages containing the given source IP address (e.g., '80.81.82.83')", nargs="+", action="append", dest="filter_source_ip")
@@ -68,17 +95,42 @@ def main():
     group_4.add_argument("--filter-destination-ip", help="only print messages containing the given destination IP address (e.g., '80.81.82.83')", nargs="+", action="append", dest="filter_destination_ip")
     group_4.add_argument("--filter-destination-mac", help="only print messages containing the given destination MAC address (e.g., 'aabbccddeeff')", nargs="+", action="append", dest="filter_destination_mac")
     group_4.add_argument("--filter-large-community", help="only print messages containing one or more matching large communities (e.g., '11:22:33', '11:*:*', '*:22:33')", nargs="+", action="append", dest="filter_large_community")
+    group_4.add_argument("--filter-rov", help="only print UPDATE messages announcing a prefix with the given route origin validation state (valid, invalid, not-found); requires --rov-file", nargs="+", action="append", dest="filter_rov")
+    group_4.add_argument("--filter-expr", help="only print messages matching the given boolean filter expression (e.g., '(community 65535:666 or next-hop 80.81.193.66) and not peer 10.0.0.1')", action="append", dest="filter_expr")
     group_4.add_argument("--filter-blackhole", help="only print messages that contain blackhole prefixes with given next_hop (e.g. 80.81.193.66) OR RFC7999 well-known BGP community value", nargs="+", action="append", dest="filter_blackhole")
 
+    group_8 = parser.add_argument_group("follow mode (--follow, --watch-dir)")
+    group_8.add_argument("--watch-pattern", help="only read files of the watched directory matching the given wildcard (default: *)", default="*", dest="watch_pattern")
+    group_8.add_argument("--checkpoint", help="save the position to the given file and continue from there after a restart", dest="checkpoint")
+    group_8.add_argument("--poll-interval", help="seconds between checks for new data if inotify is not available (default: 1)", type=float, default=1.0, dest="poll_interval")
+
+    group_9 = parser.add_argument_group("BMP listener (--bmp-listen)")
+    group_9.add_argument("--bmp-workers", help="number of threads decoding BMP messages (default: 4)", type=int, default=4, dest="bmp_workers")
+
     group_5 = parser.add_argument_group("line output commands")
     group_5.add_argument("--fields", help="specify the output-fields to be display in the order desired; separated by comma. Available fields are: " + LineBasedFormatter.available_fields(), dest="fields", default=LineBasedFormatter.FIELD_MESSAGE_TIMESTAMP[0] + "," + LineBasedFormatter.FIELD_MESSAGE_TYPE[0] + "," + LineBasedFormatter.FIELD_UPDATE_SUBTYPE[0] + "," + LineBasedFormatter.FIELD_UPDATE_NLRI[0] + "," + LineBasedFormatter.FIELD_UPDATE_WITHDRAWN_ROUTES[0])
 
+    group_11 = parser.add_argument_group("output buffering (-p FILE, -p STDOUT)")
+    group_11.add_argument("--buffer-size", help="write output in chunks of the given number of bytes (default: 1048576 for FILE, 65536 for STDOUT)", type=int, dest="buffer_size")
+    group_11.add_argument("--flush-interval", help="write buffered output at least every given number of seconds (default: 1, 0 if STDOUT is a terminal; 0 writes every message immediately)", type=float, dest="flush_interval")
+
+    group_12 = parser.add_argument_group("JSON output (-f JSON)")
+    group_12.add_argument("--json-serializer", help="library serializing JSON output (default: the first installed of " + ", ".join(JSONFormatter.CHOICES_SERIALIZERS) + ")", choices=JSONFormatter.CHOICES_SERIALIZERS, dest="json_serializer")
+
+    group_10 = parser.add_argument_group("pcap output (-f PCAP)")
+    group_10.add_argument("--pcap-flows", help="also write all following frames of the TCP connections of written frames (e.g. ACKs and frames without matching messages)", action="store_true", dest="pcap_flows")
+
     group_6 = parser.add_argument_group("other commands")
     group_6.add_argument("--version", help="displays the current version of this software", action="store_true", dest="version")
 
     group_7 = parser.add_argument_group("interpreter options")
+    group_7.add_argument("--scan-only", help="only read the 19-byte BGP header of each message and skip decoding of the message body; requires LINE output with header fields (" + ", ".join(LineBasedFormatter.header_fields()) + ")", action="store_true", dest="scan_only")
     group_7.add_argument("--add-path-metric", help="decide how to interpret UPDATE messages (0 = no add_path messages, 1 = only add_path messages, 2 = use implemented metric(!)", nargs=1, type=int, dest="add_path_metric")
 
+    group_7.add_argument("--rov-file", help="validate the origin of announced prefixes using a VRP export of rpki-client or Routinator (JSON or CSV); reloaded on SIGHUP", dest="rov_file")
+    group_7.add_argument("--filter-stats", help="print the number of evaluations, the pass rate and the time spent per filter to stderr at exit", action="store_true", dest="filter_stats")
+    group_7.add_argument("--filter-adaptive", help="periodically reorder filters so that cheap filters rejecting many messages run first (does not change the result)", action="store_true", dest="filter_adaptive")
+
     main_handler = PBGPPHandler(parser)
 
     try:
@@ -88,5 +140,28 @@ def main():
         sys.exit(1)
     except KeyboardInterrupt:
         logger.info("Received KeyboardInterrupt - terminating ...")
+        main_handler.print_filter_statistics()
+        print("Exit execution due to keyboard interruption.")
+        sys.exit(0)
+
+
+def index_main(argv):
+    logger = logging.getLogger('pbgpp')
+
+    parser = argparse.ArgumentParser(prog="pbgpp index", description="write sidecar index files (<file>" + PCAPTimeIndex.SUFFIX + ") of pcap files to speed up time range queries (--filter-time-range) and, with --routes, prefix and origin AS queries")
+    parser.add_argument("pcap", help="pcap files to index (wildcards are supported)", nargs="+")
+    parser.add_argument("--interval", help="number of records per index entry (default: " + str(PCAPTimeIndex.DEFAULT_INTERVAL) + ")", type=int, default=PCAPTimeIndex.DEFAULT_INTERVAL, dest="interval")
+    parser.add_argument("--routes", help="also write a route index (<file>" + PCAPRouteIndex.SUFFIX + ") from prefixes and origin ASN to records, used by --filter-nlri, --filter-withdrawn, --filter-prefix-file and --filter-last-as", action="store_true", dest="routes")
+    parser.add_argument("--add-path", "--add-path-metric", help="interpret UPDATE messages like --add-path-metric of the queries using the route index (0 = no add_path messages, 1 = only add_path messages, 2 = use implemented metric); the index is ignored by queries with another value (default: 0)", type=int, choices=[0, 1, 2], default=0, dest="add_path")
+    parser.add_argument("-v", "--verbose", help="increase output verbosity", action="store_true", dest="verbose")
+
+    index_handler = PBGPPIndexHandler(parser, argv)
+
+    try:
+        index_handler.handle()
+    except Exception as e:
+        logger.error("Main error handler has received an exception: " + str(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
         print("Exit execution due to keyboard interruption.")
         sys.exit(0)
@@ -0,0 +1,42 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pbgpp.Application.Flags.Exceptions import FlagError
+from pbgpp.Application.Flags.Flag import Flag
+from pbgpp.BGP.DecodePlan import BGPDecodePlan
+
+
+class DecodePlanFlag(Flag):
+    # Value is a BGPDecodePlan or None (= decode every message completely)
+
+    def __init__(self, value=None):
+        self.default_value = None
+        self.compatible_values = [None]
+
+        self.set_value(value)
+
+    def set_value(self, value):
+        if value is not None and not isinstance(value, BGPDecodePlan):
+            raise FlagError("DecodePlanFlag: value must be instance of BGPDecodePlan")
+
+        # A plan that decodes everything is equal to no plan at all
+        if value is not None and value.is_full():
+            value = None
+
+        self.value = value
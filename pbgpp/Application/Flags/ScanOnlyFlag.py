@@ -0,0 +1,30 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pbgpp.Application.Flags.Flag import Flag
+
+
+class ScanOnlyFlag(Flag):
+    # 0 = decode all messages, 1 = only read the BGP header of each message
+
+    def __init__(self, value=0):
+        self.default_value = 0
+        self.compatible_values = [0, 1]
+
+        self.set_value(value)
@@ -18,48 +18,37 @@
 #
 
 import logging
+import signal
 import sys
 import os.path
 import glob
-from itertools import chain
 
 import pcapy
 
 from pbgpp.Application.Flags.Flag import Flag
 from pbgpp.Application.Flags.AddPathFlag import AddPathFlag
+from pbgpp.Application.Flags.DecodePlanFlag import DecodePlanFlag
 from pbgpp.Application.Flags.Exceptions import FlagError
-
-from pbgpp.BGP.Exceptions import BGPPacketHasNoMessagesError, BGPError
-from pbgpp.BGP.Packet import BGPPacket
-from pbgpp.Output.Filters.ASNFilter import ASNFilter
-from pbgpp.Output.Filters.BlackholeFilter import BlackholeFilter
-from pbgpp.Output.Filters.CommunityASNFilter import CommunityASNFilter
-from pbgpp.Output.Filters.CommunityValueFilter import CommunityValueFilter
-from pbgpp.Output.Filters.LargeCommunityFilter import LargeCommunityFilter
-from pbgpp.Output.Filters.IPDestinationFilter import IPDestinationFilter
-from pbgpp.Output.Filters.IPSourceFilter import IPSourceFilter
-from pbgpp.Output.Filters.LastASNFilter import LastASNFilter
-from pbgpp.Output.Filters.MACDestinationFilter import MACDestinationFilter
-from pbgpp.Output.Filters.MACSourceFilter import MACSourceFilter
-from pbgpp.Output.Filters.MessageSizeFilter import MessageSizeFilter
-from pbgpp.Output.Filters.MessageSubTypeFilter import MessageSubTypeFilter
-from pbgpp.Output.Filters.MessageTypeFilter import MessageTypeFilter
-from pbgpp.Output.Filters.NLRIFilter import NLRIFilter
-from pbgpp.Output.Filters.NextHopFilter import NextHopFilter
-from pbgpp.Output.Filters.TimestampFilter import TimestampFilter
-from pbgpp.Output.Filters.WithdrawnFilter import WithdrawnFilter
+from pbgpp.Application.Flags.HeaderFilterFlag import HeaderFilterFlag
+from pbgpp.Application.Flags.ScanOnlyFlag import ScanOnlyFlag
+from pbgpp.Application.Pipeline import PBGPPPipeline
+from pbgpp.Application.Stream import iter_file_records, iter_mrt_records
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.MRT.Exceptions import MRTError
+from pbgpp.Output.Filter import BGPFilter
 from pbgpp.Output.Formatters.HumanReadable import HumanReadableFormatter
 from pbgpp.Output.Formatters.JSON import JSONFormatter
 from pbgpp.Output.Formatters.LineBased import LineBasedFormatter
+from pbgpp.Output.Formatters.MRT import MRTFormatter
+from pbgpp.Output.Formatters.PCAP import PCAPFormatter
 from pbgpp.Output.Handler import OutputHandler
 from pbgpp.Output.Pipes.FilePipe import FilePipe
 from pbgpp.Output.Pipes.KafkaPipe import KafkaPipe
 from pbgpp.Output.Pipes.StdOutPipe import StdOutPipe
-from pbgpp.PCAP.CookedCapture import PCAPCookedCapture
-from pbgpp.PCAP.Ethernet import PCAPEthernet
-from pbgpp.PCAP.IP import PCAPIP
-from pbgpp.PCAP.Information import PCAPInformation
-from pbgpp.PCAP.TCP import PCAPTCP
+from pbgpp.PCAP.Exceptions import PCAPOfflineReaderError
+from pbgpp.PCAP.Follow import PCAPFollower
+from pbgpp.RPKI.Exceptions import RPKIError
+from pbgpp.RPKI.Validator import RPKIValidator
 
 
 class PBGPPHandler:
@@ -79,11 +68,14 @@ class PBGPPHandler:
         self.pipe = None
         self.filters = []
         self.prefilters = []
-
-        self.__packet_counter = 0
+        self.pipeline = None
+        self.validator = None
 
         self.flags = {
-            "addpath": AddPathFlag()
+            "addpath": AddPathFlag(),
+            "scanonly": ScanOnlyFlag(),
+            "decodeplan": DecodePlanFlag(),
+            "headerfilter": HeaderFilterFlag()
         }
 
     def handle(self):
@@ -113,28 +105,75 @@ class PBGPPHandler:
         logger.debug("Parsing pipes ...")
         self.__parse_pipe()
 
+        logger.debug("Computing decode plan ...")
+        self.__parse_decode_plan()
+
+        logger.debug("Loading VRPs ...")
+        self.__parse_validator()
+
+        self.pipeline = PBGPPPipeline(self.filters, self.prefilters, self.flags, self.args.filter_stats, self.args.filter_adaptive, self.validator)
+
+        # Formatters may need to see messages that don't pass the filters (e.g. OPEN messages for MRT output)
+        if self.formatter.OBSERVED_MESSAGE_TYPES:
+            self.pipeline.set_observer(self.formatter.observe, self.formatter.OBSERVED_MESSAGE_TYPES)
+
+        # Terminate cleanly on SIGTERM - buffered output is written and checkpoints are saved while exiting
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
         # Check for input method
         if self.args.interface:
             logger.info("Initial startup finished. Calling interface handler ...")
             self.__handle_interface()
+            self.print_filter_statistics()
             logger.info("Parsing finished - Exiting now with status code 0")
             sys.exit(0)
 
         if self.args.pcap:
             logger.info("Initial startup finished. Calling pcap handler ...")
             self.__handle_pcap()
+            self.print_filter_statistics()
             logger.info("Parsing finished - Exiting now with status code 0")
             sys.exit(0)
 
         if self.args.stdin:
             logger.info("Initial startup finished. Calling stdin handler ...")
             self.__handle_stdin()
+            self.print_filter_statistics()
+            logger.info("Parsing finished - Exiting now with status code 0")
+            sys.exit(0)
+
+        if self.args.mrt:
+            logger.info("Initial startup finished. Calling MRT handler ...")
+            self.__handle_mrt()
+            self.print_filter_statistics()
+            logger.info("Parsing finished - Exiting now with status code 0")
+            sys.exit(0)
+
+        if self.args.bmp_listen:
+            logger.info("Initial startup finished. Calling BMP handler ...")
+            self.__handle_bmp()
+            self.print_filter_statistics()
+            logger.info("Parsing finished - Exiting now with status code 0")
+            sys.exit(0)
+
+        if self.args.follow or self.args.watch_dir:
+            logger.info("Initial startup finished. Calling follow handler ...")
+            self.__handle_follow()
+            self.print_filter_statistics()
             logger.info("Parsing finished - Exiting now with status code 0")
             sys.exit(0)
 
         self.__parser.print_help()
         sys.exit(0)
 
+    def print_filter_statistics(self):
+        # Filter statistics are written to stderr to keep them apart from the (piped) output
+        if self.pipeline is None or not self.args.filter_stats:
+            return
+
+        for line in self.pipeline.statistics():
+            sys.stderr.write(line + "\n")
+
     def __parse_flags(self):
         logger = logging.getLogger("pbgpp.PBGPPHandler.__parse_flags")
 
@@ -148,114 +187,34 @@ class PBGPPHandler:
 
             logger.debug("AddPath-Flag set with value: " + str(flag_value))
 
+        if self.args.scan_only:
+            self.flags["scanonly"].set_value(1)
+            logger.debug("ScanOnly-Flag set - message bodies won't be decoded")
+
     def __parse_filters(self):
-        logger = logging.getLogger("pbgpp.PBGPPHandler.__parse_filters")
-
-        if self.args.filter_message_type:
-            values = self.args.filter_message_type
-            filters = list(chain(*values))
-            self.filters.append(MessageTypeFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of MessageTypeFilter")
-
-        if self.args.filter_message_subtype:
-            values = self.args.filter_message_subtype
-            filters = list(chain(*values))
-            self.filters.append(MessageSubTypeFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of MessageSubTypeFilter")
-
-        if self.args.filter_nlri:
-            values = self.args.filter_nlri
-            filters = list(chain(*values))
-            self.filters.append(NLRIFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of NLRIFilter")
-
-        if self.args.filter_withdrawn:
-            values = self.args.filter_withdrawn
-            filters = list(chain(*values))
-            self.filters.append(WithdrawnFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of WithdrawnFilter")
-
-        if self.args.filter_next_hop:
-            values = self.args.filter_next_hop
-            filters = list(chain(*values))
-            self.filters.append(NextHopFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of NextHopFilter")
-
-        if self.args.filter_asn:
-            values = self.args.filter_asn
-            filters = list(chain(*values))
-            self.filters.append(ASNFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of ASNFilter")
-
-        if self.args.filter_last_asn:
-            values = self.args.filter_last_asn
-            filters = list(chain(*values))
-            self.filters.append(LastASNFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of LastASNFilter")
-
-        if self.args.filter_community_as:
-            values = self.args.filter_community_as
-            filters = list(chain(*values))
-            self.filters.append(CommunityASNFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of CommunityASNFilter")
-
-        if self.args.filter_community_value:
-            values = self.args.filter_community_value
-            filters = list(chain(*values))
-            self.filters.append(CommunityValueFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of CommunityValueFilter")
-
-        if self.args.filter_large_community:
-            values = self.args.filter_large_community
-            filters = list(chain(*values))
-            self.filters.append(LargeCommunityFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of LargeCommunityFilter")
-
-        if self.args.filter_message_size:
-            values = self.args.filter_message_size
-            filters = list(chain(*values))
-            self.filters.append(MessageSizeFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter(s) of MessageSizeFilter")
-
-        if self.args.filter_blackhole:
-            values = self.args.filter_blackhole
-            filters = list(chain(*values))
-            self.filters.append(BlackholeFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " filter of BlackholeFilter")
-
-        if self.args.filter_source_ip:
-            values = self.args.filter_source_ip
-            filters = list(chain(*values))
-            self.prefilters.append(IPSourceFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " pre-filter(s) of IPSourceFilter")
-
-        if self.args.filter_destination_ip:
-            values = self.args.filter_destination_ip
-            filters = list(chain(*values))
-            self.prefilters.append(IPDestinationFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " pre-filter(s) of IPDestinationFilter")
-
-        if self.args.filter_source_mac:
-            values = self.args.filter_source_mac
-            filters = list(chain(*values))
-            self.prefilters.append(MACSourceFilter(MACSourceFilter.clear_input(filters)))
-            logger.debug("Added " + str(len(filters)) + " pre-filter(s) of MACSourceFilter")
-
-        if self.args.filter_destination_mac:
-            values = self.args.filter_destination_mac
-            filters = list(chain(*values))
-            self.prefilters.append(MACDestinationFilter(MACSourceFilter.clear_input(filters)))
-            logger.debug("Added " + str(len(filters)) + " pre-filter(s) of MACDestinationFilter")
-
-        if self.args.filter_timestamp:
-            values = self.args.filter_timestamp
-            filters = list(chain(*values))
-            self.prefilters.append(TimestampFilter(filters))
-            logger.debug("Added " + str(len(filters)) + " pre-filter(s) of TimestampFilter")
+        self.filters, self.prefilters = PBGPPPipeline.build_filters(vars(self.args))
+
+        if self.args.scan_only:
+            for f in self.filters:
+                if f.STAGE > BGPFilter.STAGE_HEADER:
+                    self.__parser.error("--scan-only can only be combined with filters on the BGP header (message type, size and sub type) or PCAP information.")
 
     def __parse_formatter(self):
+        if self.args.scan_only and self.args.formatter != "LINE":
+            self.__parser.error("--scan-only requires line based output (-f LINE).")
+
+        if self.args.pcap_flows and self.args.formatter != "PCAP":
+            self.__parser.error("--pcap-flows requires pcap output (-f PCAP).")
+
         if self.args.formatter == "JSON":
-            self.formatter = JSONFormatter()
+            if self.args.json_serializer is not None and self.args.json_serializer not in JSONFormatter.available_serializers():
+                self.__parser.error("JSON serializer " + self.args.json_serializer + " is not installed.")
+
+            self.formatter = JSONFormatter(self.args.json_serializer)
+        elif self.args.formatter == "MRT":
+            self.formatter = MRTFormatter()
+        elif self.args.formatter == "PCAP":
+            self.formatter = PCAPFormatter(flows=self.args.pcap_flows)
         elif self.args.formatter == "HUMAN_READABLE":
             self.formatter = HumanReadableFormatter()
         elif self.args.formatter == "LINE":
@@ -265,21 +224,76 @@ class PBGPPHandler:
                 if not LineBasedFormatter.is_registered(v):
                     self.__parser.error("Could not recognize field '" + str(v) + "' for line based output. Use --help argument to see all available fields.")
 
+                if self.args.scan_only and not LineBasedFormatter.is_header_field(v):
+                    self.__parser.error("Field '" + str(v) + "' is not available with --scan-only. Available fields are: " + ", ".join(LineBasedFormatter.header_fields()))
+
             self.formatter = LineBasedFormatter(fields=values)
         else:
             self.__parser.error("Can't recognize the formatter.")
 
+    def __parse_decode_plan(self):
+        logger = logging.getLogger("pbgpp.PBGPPHandler.__parse_decode_plan")
+
+        # The formatter and all filters declare which parts of a message they need
+        # JSON and HUMAN_READABLE output always need complete decoding
+        plan = self.formatter.decode_plan()
+
+        if plan is not None:
+            for f in self.filters:
+                plan.require_filter(f)
+
+            # Route origin validation needs the announced prefixes and their origin AS
+            if self.args.rov_file:
+                plan.require(attributes=[BGPStatics.UPDATE_ATTRIBUTE_AS_PATH], nlri=True, optional_parameters=[])
+
+        self.flags["decodeplan"].set_value(plan)
+
+        if self.flags["decodeplan"].get_value() is None:
+            logger.debug("Decode plan: decoding messages completely")
+        else:
+            logger.debug("Decode plan: " + str(self.flags["decodeplan"].get_value()))
+
+    def __parse_validator(self):
+        logger = logging.getLogger("pbgpp.PBGPPHandler.__parse_validator")
+
+        if not self.args.rov_file:
+            if self.args.filter_rov:
+                self.__parser.error("--filter-rov requires a VRP file (--rov-file)")
+            return
+
+        try:
+            self.validator = RPKIValidator(self.args.rov_file)
+        except RPKIError as e:
+            self.__parser.error(e.message)
+
+        # VRPs are reloaded on SIGHUP (e.g. after rpki-client or Routinator wrote a new export)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.validator.reload_in_background())
+            logger.debug("Registered SIGHUP handler for reloading VRPs from " + str(self.args.rov_file))
+
     def __parse_pipe(self):
+        if self.args.buffer_size is not None and self.args.buffer_size < 0:
+            self.__parser.error("--buffer-size must not be negative.")
+
+        if self.args.flush_interval is not None and self.args.flush_interval < 0:
+            self.__parser.error("--flush-interval must not be negative.")
+
         if self.args.pipe == "FILE":
             if self.args.output_target is None:
                 self.__parser.error("You need to specify the output target (-o / --output) when using FILE as pipe.")
-            self.pipe = FilePipe(self.args.output_target)
+            self.pipe = FilePipe(self.args.output_target, binary=self.formatter.BINARY, buffer_size=self.args.buffer_size, flush_interval=self.args.flush_interval)
         elif self.args.pipe == "STDOUT":
-            self.pipe = StdOutPipe()
+            self.pipe = StdOutPipe(binary=self.formatter.BINARY, buffer_size=self.args.buffer_size, flush_interval=self.args.flush_interval)
         elif self.args.pipe == "KAFKA":
             if self.args.kafka_server is None or self.args.kafka_topic is None:
                 self.__parser.error("You need to specify Kafka server (--kafka-server) and topic (--kafka-topic) when using KAFKA as output pipe.")
-            self.pipe = KafkaPipe(server=self.args.kafka_server, topic=self.args.kafka_topic)
+
+            if self.args.kafka_max_in_flight is not None and self.args.kafka_max_in_flight <= 0:
+                self.__parser.error("--kafka-max-in-flight must be positive.")
+
+            acks = int(self.args.kafka_acks) if self.args.kafka_acks in ("0", "1") else self.args.kafka_acks
+            self.pipe = KafkaPipe(server=self.args.kafka_server, topic=self.args.kafka_topic, key=self.args.kafka_key, max_in_flight=self.args.kafka_max_in_flight,
+                                  compression_type=self.args.kafka_compression, linger_ms=self.args.kafka_linger_ms, batch_size=self.args.kafka_batch_size, acks=acks)
         else:
             self.__parser.error("Can't recognize the output pipe.")
 
@@ -292,8 +306,7 @@ class PBGPPHandler:
         logger = logging.getLogger("pbgpp.PBGPPHandler.__handle_pcap")
 
         if os.path.isfile(self.args.pcap):
-            handle = pcapy.open_offline(self.args.pcap)
-            handle.loop(0, self.__packet_handler)
+            self.__handle_pcap_file(self.args.pcap)
         else:
             logger.info("Given PCAP input string is not direct path to a single file. Checking for glob-argument.")
 
@@ -304,57 +317,85 @@ class PBGPPHandler:
 
             for f in files:
                 logger.debug("Handling file: " + str(f))
-                handle = pcapy.open_offline(f)
-                handle.loop(0, self.__packet_handler)
+                self.__handle_pcap_file(f)
 
-    def __handle_stdin(self):
-        handle = pcapy.open_offline("-")
-        handle.loop(0, self.__packet_handler)
+    def __handle_pcap_file(self, path):
+        # Time range and route queries seek within the file (using its indexes if there are any) instead of reading it completely
+        time_window = self.pipeline.time_window()
+        route_query = self.pipeline.route_query()
 
-    def __packet_handler(self, header, payload):
-        logger = logging.getLogger("pbgpp.PBGPPHandler.__packet_handler")
-        logger.debug("Parsing PCAP packet " + str(self.__packet_counter))
+        if time_window is None and route_query is None:
+            handle = pcapy.open_offline(path)
+            handle.loop(0, self.__packet_handler)
+            return
 
-        eth = PCAPEthernet(payload)
+        for header, payload in iter_file_records(path, time_window, route_query, self.flags["addpath"].get_value()):
+            self.__packet_handler(header, payload)
 
-        # Check for raw ethernet packet
-        if not eth.get_type() == PCAPEthernet.ETH_TYPE_IPV4:
+    def __handle_follow(self):
+        if self.args.watch_dir and not os.path.isdir(self.args.watch_dir):
+            self.__parser.error("Specified --watch-dir argument is not a directory.")
 
-            # Check for SLL-packet
-            eth = PCAPCookedCapture(payload)
+        if self.args.poll_interval <= 0:
+            self.__parser.error("--poll-interval must be positive.")
 
-            if not eth.get_type() == PCAPCookedCapture.ETH_TYPE_IPV4:
-                logger.debug("Discarding PCAP packet " + str(self.__packet_counter) + " due to non-IPv4 ethernet type.")
-                return False
+        follower = PCAPFollower(path=self.args.follow, directory=self.args.watch_dir, pattern=self.args.watch_pattern,
+                                checkpoint=self.args.checkpoint, poll_interval=self.args.poll_interval)
 
-        ip = PCAPIP(eth.get_eth_payload())
+        try:
+            for header, payload in follower:
+                self.__packet_handler(header, payload)
+        finally:
+            follower.save_checkpoint()
 
-        if not ip.get_protocol() == PCAPIP.PROTO_TCP:
-            logger.debug("Discarding PCAP packet " + str(self.__packet_counter) + " due to non-TCP IP type.")
-            return False
+    def __handle_mrt(self):
+        logger = logging.getLogger("pbgpp.PBGPPHandler.__handle_mrt")
 
-        tcp = PCAPTCP(ip.get_ip_payload())
+        try:
+            for record in iter_mrt_records(self.args.mrt):
+                # All messages of a record (e.g. the entries of a RIB record) are output at once
+                handler = OutputHandler(message=self.pipeline.process_mrt(record), filter=[], formatter=self.formatter, pipe=self.pipe)
+                handler.handle()
+        except PCAPOfflineReaderError as e:
+            self.__parser.error("Specified --mrt argument: " + str(e))
+        except MRTError as e:
+            logger.error("Can't read MRT input: " + str(e))
+            sys.exit(1)
 
-        pcap_information = PCAPInformation(header.getts(), eth.mac, ip.addresses, tcp.ports)
+    def __handle_bmp(self):
+        # The listener requires asyncio (Python 3)
+        from pbgpp.BMP.Listener import BMPListener
 
-        for filter in self.prefilters:
-            if not filter.apply(pcap_information):
-                logger.debug("Discarding PCAP packet " + str(self.__packet_counter) + " because no applied pre-filter could be matched.")
-                return
+        host, separator, port = self.args.bmp_listen.rpartition(":")
 
-        try:
-            bgp = BGPPacket(tcp.get_tcp_payload(), pcap_information, self.flags)
+        if not separator or not port.isdigit():
+            self.__parser.error("Specified --bmp-listen argument must be given as host:port.")
 
-            messages = bgp.message_list
+        if self.args.bmp_workers <= 0:
+            self.__parser.error("--bmp-workers must be positive.")
 
-            for m in messages:
-                handler = OutputHandler(message=m, filter=self.filters, formatter=self.formatter, pipe=self.pipe)
-                handler.handle()
+        listener = BMPListener(host.strip("[]") or None, int(port), self.pipeline, self.__output, self.args.bmp_workers)
 
-        except BGPPacketHasNoMessagesError:
-            # This is no problem because a PCAP file could also contain TCP control packets. Those packets obviously do not contain any BGP information.
-            logger.debug("BGPPacket which was assembled from PCAP packet " + str(self.__packet_counter) + " did not contain any BGP messages.")
-        except BGPError:
-            logger.error("Unspecified BGPError was raised while handling BGPPacket which was assembled from PCAP packet " + str(self.__packet_counter) + ".")
-        finally:
-            self.__packet_counter += 1
+        listener.serve_forever()
+
+    def __output(self, message):
+        handler = OutputHandler(message=message, filter=[], formatter=self.formatter, pipe=self.pipe)
+        handler.handle()
+
+    def __handle_stdin(self):
+        handle = pcapy.open_offline("-")
+        handle.loop(0, self.__packet_handler)
+
+    def __packet_handler(self, header, payload):
+        messages = self.pipeline.process(header, payload)
+
+        # Messages returned by the pipeline already passed all filters - all messages of a packet are output at once
+        handler = OutputHandler(message=messages, filter=[], formatter=self.formatter, pipe=self.pipe)
+        handler.handle()
+
+        if not messages and self.args.pcap_flows:
+            # Remaining frames of connections that are extracted completely
+            output = self.formatter.apply_frame(header, payload)
+
+            if output is not None:
+                self.pipe.write_bytes(output)
@@ -0,0 +1,110 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import glob
+import logging
+import os.path
+import sys
+
+from pbgpp.Application.Pipeline import PBGPPPipeline
+from pbgpp.BGP.DecodePlan import BGPDecodePlan
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.PCAP.Exceptions import PCAPError
+from pbgpp.PCAP.Index import PCAPTimeIndex
+from pbgpp.PCAP.Reader import PCAPFileReader
+from pbgpp.PCAP.RouteIndex import PCAPRouteIndex, PCAPRouteIndexBuilder
+
+
+class PBGPPIndexHandler:
+    # Handler of "pbgpp index": writes sidecar index files next to the given pcap files
+
+    def __init__(self, parser, argv=None):
+        self.__parser = parser
+        self.args = parser.parse_args(argv)
+
+    def handle(self):
+        logger = logging.getLogger("pbgpp.PBGPPIndexHandler.handle")
+
+        if self.args.verbose:
+            logging.getLogger().setLevel(logging.DEBUG)
+
+        if self.args.interval < 1:
+            self.__parser.error("--interval must be a positive number of records")
+
+        if self.args.add_path and not self.args.routes:
+            self.__parser.error("--add-path requires --routes")
+
+        for path in self.__expand_files():
+            try:
+                self.__index_file(path)
+            except (PCAPError, IOError) as e:
+                logger.error("Could not index " + path + ": " + str(e))
+                sys.exit(1)
+
+        sys.exit(0)
+
+    def __expand_files(self):
+        files = []
+
+        for pattern in self.args.pcap:
+            matches = [pattern] if os.path.isfile(pattern) else sorted(glob.glob(pattern))
+
+            if len(matches) == 0:
+                self.__parser.error("'" + pattern + "' is neither a single file nor a valid wildcard string (no files found!)")
+
+            files.extend(matches)
+
+        return files
+
+    def __index_file(self, path):
+        logger = logging.getLogger("pbgpp.PBGPPIndexHandler.__index_file")
+
+        index = PCAPTimeIndex.build(path, self.args.interval)
+        index.write(PCAPTimeIndex.path_for(path))
+        logger.info("Wrote time index of " + path + " (" + str(len(index)) + " blocks)")
+
+        if self.args.routes:
+            builder = self.build_route_index(path, self.args.add_path)
+            builder.write(PCAPRouteIndex.path_for(path))
+            logger.info("Wrote route index of " + path + " (" + str(len(builder.prefixes)) + " prefixes, " + str(len(builder.asns)) + " origin ASN)")
+
+    @staticmethod
+    def build_route_index(path, add_path=0):
+        # Only the prefixes and the AS_PATH of UPDATE messages are decoded - using the ADD-PATH setting of later queries
+        pipeline = PBGPPPipeline()
+        pipeline.flags["addpath"].set_value(add_path)
+        pipeline.flags["decodeplan"].set_value(BGPDecodePlan(attributes=[BGPStatics.UPDATE_ATTRIBUTE_AS_PATH], withdrawn_routes=True, nlri=True, optional_parameters=[]))
+
+        builder = PCAPRouteIndexBuilder(add_path)
+
+        with open(path, "rb") as handle:
+            reader = PCAPFileReader(handle)
+
+            while True:
+                offset = reader.offset
+                record = reader.read_record()
+
+                if record is None:
+                    break
+
+                for m in pipeline.process(record[0], record[1]):
+                    builder.add(offset, m)
+
+            builder.size = reader.offset
+
+        return builder
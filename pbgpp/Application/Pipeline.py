@@ -0,0 +1,501 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import logging
+from itertools import chain
+
+from pbgpp.Application.Flags.AddPathFlag import AddPathFlag
+from pbgpp.Application.Flags.DecodePlanFlag import DecodePlanFlag
+from pbgpp.Application.Flags.HeaderFilterFlag import HeaderFilterFlag
+from pbgpp.Application.Flags.ScanOnlyFlag import ScanOnlyFlag
+from pbgpp.BGP.Exceptions import BGPPacketHasNoMessagesError, BGPError
+from pbgpp.BGP.Message import BGPMessage
+from pbgpp.BGP.Packet import BGPPacket
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.BMP.Exceptions import BMPMessageError
+from pbgpp.BMP.Message import BMPMessage
+from pbgpp.MRT.BGP4MP import MRTBGP4MPMessage
+from pbgpp.MRT.Exceptions import MRTRecordError
+from pbgpp.MRT.Statics import MRTStatics
+from pbgpp.MRT.TableDump import MRTTableDump
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.Output.FilterChain import BGPFilterChain
+from pbgpp.Output.Filters.ASNFilter import ASNFilter
+from pbgpp.Output.Filters.ASNListFilter import ASNListFilter
+from pbgpp.Output.Filters.ASPathRegexFilter import ASPathRegexFilter
+from pbgpp.Output.Filters.BlackholeFilter import BlackholeFilter
+from pbgpp.Output.Filters.CommunityASNFilter import CommunityASNFilter
+from pbgpp.Output.Filters.CommunityFilter import CommunityFilter
+from pbgpp.Output.Filters.CommunityValueFilter import CommunityValueFilter
+from pbgpp.Output.Filters.ExpressionFilter import ExpressionFilter
+from pbgpp.Output.Filters.IPDestinationFilter import IPDestinationFilter
+from pbgpp.Output.Filters.IPSourceFilter import IPSourceFilter
+from pbgpp.Output.Filters.LargeCommunityFilter import LargeCommunityFilter
+from pbgpp.Output.Filters.LastASNFilter import LastASNFilter
+from pbgpp.Output.Filters.MACDestinationFilter import MACDestinationFilter
+from pbgpp.Output.Filters.MACSourceFilter import MACSourceFilter
+from pbgpp.Output.Filters.MessageSizeFilter import MessageSizeFilter
+from pbgpp.Output.Filters.MessageSubTypeFilter import MessageSubTypeFilter
+from pbgpp.Output.Filters.MessageTypeFilter import MessageTypeFilter
+from pbgpp.Output.Filters.NLRIFilter import NLRIFilter
+from pbgpp.Output.Filters.NextHopFilter import NextHopFilter
+from pbgpp.Output.Filters.PrefixFileFilter import PrefixFileFilter
+from pbgpp.Output.Filters.PrefixListFilter import PrefixListFilter
+from pbgpp.Output.Filters.ROVFilter import ROVFilter
+from pbgpp.Output.Filters.TimestampFilter import TimestampFilter
+from pbgpp.Output.Filters.TimestampRangeFilter import TimestampRangeFilter
+from pbgpp.Output.Filters.WithdrawnFilter import WithdrawnFilter
+from pbgpp.PCAP.CookedCapture import PCAPCookedCapture
+from pbgpp.PCAP.Ethernet import PCAPEthernet
+from pbgpp.PCAP.Frame import PCAPFrame
+from pbgpp.PCAP.IP import PCAPIP
+from pbgpp.PCAP.Information import PCAPInformation
+from pbgpp.PCAP.TCP import PCAPTCP
+from pbgpp.RPKI.Validator import RPKIValidator
+
+
+class PBGPPPipeline:
+    # The pipeline turns captured frames into filtered BGP messages. It is shared by the command line
+    # interface and the library entry point (pbgpp.iter_messages) and does neither format nor output anything.
+
+    # Available filters in the order they are applied. Each entry maps an option name (equal to the
+    # destination of the command line argument) to the filter class and the information if it's a
+    # pre-parsing filter that is applied to PCAP information instead of parsed BGP messages.
+    FILTER_OPTIONS = [("filter_message_type", MessageTypeFilter, False),
+                      ("filter_message_subtype", MessageSubTypeFilter, False),
+                      ("filter_nlri", NLRIFilter, False),
+                      ("filter_withdrawn", WithdrawnFilter, False),
+                      ("filter_prefix_file", PrefixFileFilter, False),
+                      ("prefix_list_file", PrefixListFilter, False),
+                      ("filter_next_hop", NextHopFilter, False),
+                      ("filter_asn", ASNFilter, False),
+                      ("filter_last_asn", LastASNFilter, False),
+                      ("asn_list_file", ASNListFilter, False),
+                      ("filter_as_path_regex", ASPathRegexFilter, False),
+                      ("filter_community_as", CommunityASNFilter, False),
+                      ("filter_community_value", CommunityValueFilter, False),
+                      ("filter_large_community", LargeCommunityFilter, False),
+                      ("filter_message_size", MessageSizeFilter, False),
+                      ("filter_blackhole", BlackholeFilter, False),
+                      ("filter_community", CommunityFilter, False),
+                      ("filter_rov", ROVFilter, False),
+                      ("filter_expr", ExpressionFilter, False),
+                      ("filter_source_ip", IPSourceFilter, True),
+                      ("filter_destination_ip", IPDestinationFilter, True),
+                      ("filter_source_mac", MACSourceFilter, True),
+                      ("filter_destination_mac", MACDestinationFilter, True),
+                      ("filter_timestamp", TimestampFilter, True),
+                      ("filter_time_range", TimestampRangeFilter, True)]
+
+    # Filters looking up prefixes in a radix trie that respect the prefix match mode option
+    PREFIX_FILTERS = (NLRIFilter, WithdrawnFilter, PrefixFileFilter, ExpressionFilter)
+
+    # Options that configure filters instead of adding filters
+    SETTING_OPTIONS = ["filter_prefix_mode", "rov_file"]
+
+    def __init__(self, filters=None, prefilters=None, flags=None, statistics=False, adaptive=False, validator=None):
+        self.filters = filters if filters is not None else []
+        self.prefilters = prefilters if prefilters is not None else []
+
+        # Optional RPKIValidator - UPDATE messages are validated before filters are applied
+        self.validator = validator
+
+        for f in self.filters:
+            if isinstance(f, ROVFilter) or (isinstance(f, ExpressionFilter) and f.contains(ROVFilter)):
+                if validator is None:
+                    raise OutputFilterError("filtering on route origin validation state requires a VRP file")
+
+        if flags is None:
+            flags = {
+                "addpath": AddPathFlag(),
+                "scanonly": ScanOnlyFlag(),
+                "decodeplan": DecodePlanFlag(),
+                "headerfilter": HeaderFilterFlag()
+            }
+
+        self.flags = flags
+        self.packet_counter = 0
+
+        # Optional callable seeing messages of observed_types before filters are applied (see set_observer())
+        self.observer = None
+        self.observed_types = ()
+
+        # Filters on the BGP header (message type, size and sub type hint) are evaluated before the message body
+        # is decoded. Expression filters are pushed down: the parts that only depend on PCAP information or the
+        # BGP header are additionally evaluated before the BGP messages are decoded.
+        header_predicates = []
+        pcap_predicates = []
+
+        for f in self.filters:
+            if f.STAGE == BGPFilter.STAGE_HEADER and not isinstance(f, ExpressionFilter):
+                header_predicates.append(f.match)
+
+            elif isinstance(f, ExpressionFilter):
+                pcap_predicate = f.pushdown(BGPFilter.STAGE_PCAP)
+                header_predicate = f.pushdown(BGPFilter.STAGE_HEADER)
+
+                if pcap_predicate is not None:
+                    pcap_predicates.append(pcap_predicate)
+
+                if header_predicate is not None:
+                    header_predicates.append(header_predicate)
+
+        self.flags["headerfilter"] = HeaderFilterFlag(BGPFilter.chain_predicates(header_predicates) if header_predicates else None)
+
+        # Filters are fused into single predicates once instead of being looped over per message.
+        # To collect statistics (or to reorder filters adaptively) filters are run by a BGPFilterChain instead.
+        # Pre-filters are evaluated on the raw frame (frame_prefilter) before any PCAP object is created;
+        # pushed down parts of filter expressions need PCAP information (prefilter).
+        if statistics or adaptive:
+            self.filter_chain = BGPFilterChain(self.filters, adaptive)
+            self.prefilter_chain = BGPFilterChain(self.prefilters, adaptive, "match_frame")
+
+            self.predicate = self.filter_chain
+            self.frame_prefilter = self.prefilter_chain
+        else:
+            self.filter_chain = None
+            self.prefilter_chain = None
+
+            self.predicate = BGPFilter.chain(self.filters)
+            self.frame_prefilter = BGPFilter.chain_frame(self.prefilters) if self.prefilters else None
+
+        self.prefilter = BGPFilter.chain_predicates(pcap_predicates) if pcap_predicates else None
+
+        # Messages read from MRT files have no raw frame: all pre-filters are evaluated on the synthesised PCAP information
+        if self.prefilters or pcap_predicates:
+            self.information_prefilter = BGPFilter.chain_predicates([BGPFilter.chain(self.prefilters)] + pcap_predicates)
+        else:
+            self.information_prefilter = None
+
+        # ADD-PATH sub-types of MRT records tell us that NLRI carry path identifiers
+        self.add_path_flags = dict(self.flags)
+        self.add_path_flags["addpath"] = AddPathFlag(1)
+
+        # State of TABLE_DUMP_V2 RIB snapshots (peer index table, decoded attribute blobs)
+        self.table_dump = MRTTableDump(self.flags)
+
+    def set_observer(self, observer, message_types):
+        # Shows every message of the given types to observer before filters are applied, e.g. OPEN messages to
+        # MRTFormatter learning AS numbers (see BGPFormatter.observe()). Header filters are bypassed for these types -
+        # the messages are decoded and only dropped by the filters afterwards.
+        self.observer = observer
+        self.observed_types = tuple(message_types)
+
+        header_filter = self.flags["headerfilter"].get_value()
+
+        if header_filter is not None and self.observed_types:
+            observed_types = self.observed_types
+            self.flags["headerfilter"].set_value(lambda header: header.type in observed_types or header_filter(header))
+
+    @classmethod
+    def from_options(cls, options, add_path_metric=None, scan_only=False):
+        # Build a pipeline from a dictionary of filter options (e.g., {"filter_nlri": ["80.81.82.0/24"]})
+        # Unknown options are rejected to prevent silently ignored filters
+        known_options = [o[0] for o in cls.FILTER_OPTIONS] + cls.SETTING_OPTIONS
+
+        for key in options:
+            if key not in known_options:
+                raise OutputFilterError("unknown filter option '" + str(key) + "'")
+
+        filters, prefilters = cls.build_filters(options)
+        validator = RPKIValidator(options["rov_file"]) if options.get("rov_file") else None
+        pipeline = cls(filters, prefilters, validator=validator)
+
+        if add_path_metric is not None:
+            pipeline.flags["addpath"].set_value(add_path_metric)
+
+        if scan_only:
+            pipeline.flags["scanonly"].set_value(1)
+
+        return pipeline
+
+    @classmethod
+    def build_filters(cls, options):
+        logger = logging.getLogger("pbgpp.PBGPPPipeline.build_filters")
+
+        filters = []
+        prefilters = []
+
+        prefix_mode = options.get("filter_prefix_mode") or BGPPrefixTrie.MODE_EXACT
+
+        if prefix_mode not in BGPPrefixTrie.MODES:
+            raise OutputFilterError("unknown prefix match mode '" + str(prefix_mode) + "'")
+
+        for key, filter_class, prefilter in cls.FILTER_OPTIONS:
+            values = options.get(key)
+
+            if not values:
+                continue
+
+            # Arguments given via command line are a list of lists (nargs="+" and action="append")
+            if isinstance(values, str):
+                values = [values]
+            elif isinstance(values[0], list):
+                values = list(chain(*values))
+            else:
+                values = list(values)
+
+            if filter_class is MACSourceFilter or filter_class is MACDestinationFilter:
+                values = MACSourceFilter.clear_input(values)
+
+            if filter_class in cls.PREFIX_FILTERS:
+                filters.append(filter_class(values, prefix_mode))
+                logger.debug("Added " + str(len(values)) + " filter(s) of " + filter_class.__name__ + " with prefix match mode " + prefix_mode)
+            elif prefilter:
+                prefilters.append(filter_class(values))
+                logger.debug("Added " + str(len(values)) + " pre-filter(s) of " + filter_class.__name__)
+            else:
+                filters.append(filter_class(values))
+                logger.debug("Added " + str(len(values)) + " filter(s) of " + filter_class.__name__)
+
+        return filters, prefilters
+
+    def time_window(self):
+        # Returns (start, end) timestamps outside of which no frame can pass the pre-filters or None if
+        # there is no such window. Used to seek within pcap files (see PCAPTimeIndex).
+        window = None
+
+        for f in self.prefilters:
+            if not isinstance(f, TimestampRangeFilter):
+                continue
+
+            envelope = f.envelope()
+
+            if envelope is None:
+                continue
+
+            window = envelope if window is None else (max(window[0], envelope[0]), min(window[1], envelope[1]))
+
+        return window
+
+    def route_query(self):
+        # Returns the constraints of all filters that can be answered by a route index (see PCAPRouteIndex.query())
+        # or None if no filter can be answered. Records found by the index still pass all filters afterwards.
+        constraints = []
+
+        for f in self.filters:
+            keys = f.index_keys()
+
+            if keys is not None:
+                constraints.append(keys)
+
+        return constraints if constraints else None
+
+    def statistics(self):
+        # Returns the lines of the filter statistics or an empty list if statistics are disabled
+        if self.filter_chain is None:
+            return []
+
+        return ["Pre-filters (raw frames):"] + self.prefilter_chain.statistics() + \
+               ["Filters (BGP messages):"] + self.filter_chain.statistics()
+
+    def process(self, header, payload):
+        # Decode a single captured frame and return the list of BGP messages that passed all filters
+        logger = logging.getLogger("pbgpp.PBGPPPipeline.process")
+        logger.debug("Parsing PCAP packet " + str(self.packet_counter))
+
+        result = []
+        ts = header.getts()
+
+        # Raw ethernet packet or SLL-packet
+        offset = PCAPFrame.ip_offset(payload)
+
+        if offset is None:
+            logger.debug("Discarding PCAP packet " + str(self.packet_counter) + " due to non-IPv4 ethernet type.")
+            return result
+
+        if not PCAPFrame.is_tcp(payload, offset):
+            logger.debug("Discarding PCAP packet " + str(self.packet_counter) + " due to non-TCP IP type.")
+            return result
+
+        if self.frame_prefilter is not None and not self.frame_prefilter(ts, payload, offset):
+            logger.debug("Discarding PCAP packet " + str(self.packet_counter) + " because no applied pre-filter could be matched.")
+            return result
+
+        eth = PCAPEthernet(payload) if offset == PCAPFrame.OFFSET_ETHERNET else PCAPCookedCapture(payload)
+        ip = PCAPIP(eth.get_eth_payload())
+        tcp = PCAPTCP(ip.get_ip_payload())
+
+        pcap_information = PCAPInformation(ts, eth.mac, ip.addresses, tcp.ports, payload, header.getlen())
+
+        if self.prefilter is not None and not self.prefilter(pcap_information):
+            logger.debug("Discarding PCAP packet " + str(self.packet_counter) + " because no applied pre-filter could be matched.")
+            return result
+
+        try:
+            bgp = BGPPacket(tcp.get_tcp_payload(), pcap_information, self.flags)
+
+            predicate = self.predicate
+            validator = self.validator
+            observer = self.observer
+
+            for m in bgp.message_list:
+                if observer is not None and m.type in self.observed_types:
+                    observer(m)
+
+                if validator is not None:
+                    validator.validate_message(m)
+
+                if predicate(m):
+                    result.append(m)
+
+        except BGPPacketHasNoMessagesError:
+            # This is no problem because a PCAP file could also contain TCP control packets. Those packets obviously do not contain any BGP information.
+            logger.debug("BGPPacket which was assembled from PCAP packet " + str(self.packet_counter) + " did not contain any BGP messages.")
+        except BGPError:
+            logger.error("Unspecified BGPError was raised while handling BGPPacket which was assembled from PCAP packet " + str(self.packet_counter) + ".")
+        finally:
+            self.packet_counter += 1
+
+        return result
+
+    def process_mrt(self, record):
+        # Decode a single MRT record (see MRTFileReader) and return the list of BGP messages that passed all filters
+        # Loggers are only looked up when needed as this runs for millions of records
+        if record.type == MRTStatics.TYPE_TABLE_DUMP_V2:
+            return self.process_table_dump(record)
+
+        if record.type != MRTStatics.TYPE_BGP4MP and record.type != MRTStatics.TYPE_BGP4MP_ET:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_mrt").debug("Discarding MRT record of unsupported type " + str(record.type) + ".")
+            return []
+
+        if record.subtype not in MRTStatics.BGP4MP_MESSAGE_SUBTYPES:
+            # State changes don't contain a BGP message
+            return []
+
+        try:
+            message = MRTBGP4MPMessage(record)
+        except MRTRecordError as e:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_mrt").warning("Discarding malformed BGP4MP record: " + str(e))
+            return []
+
+        return self.process_message(message.get_pcap_information(), message.payload, message.add_path)
+
+    def process_table_dump(self, record):
+        # Decode a TABLE_DUMP_V2 record and return the RIB entries (see MRTRIBEntry) that passed all filters
+        if record.subtype == MRTStatics.TABLE_DUMP_V2_PEER_INDEX_TABLE:
+            try:
+                self.table_dump.read_peer_index_table(record)
+            except MRTRecordError as e:
+                logging.getLogger("pbgpp.PBGPPPipeline.process_table_dump").warning("Discarding malformed PEER_INDEX_TABLE: " + str(e))
+            return []
+
+        if record.subtype not in MRTStatics.TABLE_DUMP_V2_RIB_SUBTYPES:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_table_dump").debug("Discarding TABLE_DUMP_V2 record of unsupported sub-type " + str(record.subtype) + ".")
+            return []
+
+        try:
+            entries = self.table_dump.decode(record)
+        except MRTRecordError as e:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_table_dump").warning("Discarding malformed RIB record: " + str(e))
+            return []
+
+        self.packet_counter += len(entries)
+
+        information_prefilter = self.information_prefilter
+        predicate = self.predicate
+        validator = self.validator
+        result = []
+
+        for m in entries:
+            if information_prefilter is not None and not information_prefilter(m.pcap_information):
+                continue
+
+            if validator is not None:
+                validator.validate_message(m)
+
+            if predicate(m):
+                result.append(m)
+
+        return result
+
+    def process_bmp(self, message_type, payload, router=None, lock=None):
+        # Decode a single BMP message (without common header, see BMPListener) and return the list of BGP messages
+        # that passed all filters. router is the address tuple of the monitoring router.
+        # Several threads may decode BMP messages at once if they pass a shared lock (see process_message()).
+        try:
+            message = BMPMessage(message_type, payload, router)
+        except BMPMessageError as e:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_bmp").warning("Discarding malformed BMP message: " + str(e))
+            return []
+
+        result = []
+
+        for pcap_information, bgp_payload in message.get_bgp_messages():
+            result.extend(self.process_message(pcap_information, bgp_payload, lock=lock))
+
+        return result
+
+    def process_message(self, pcap_information, payload, add_path=False, lock=None):
+        # Decode a single BGP message (including its marker) that was not read from a captured frame, e.g. from an
+        # MRT file. pcap_information describes where the message comes from; no Ethernet, IP or TCP decoding involved.
+        #
+        # Decoding is free of shared state. Observers, validation, filters (statistics and adaptive ordering) and the
+        # message counter are not thread-safe - threads decoding messages concurrently pass a shared lock that is held
+        # for these steps only.
+        if self.information_prefilter is not None and not self.information_prefilter(pcap_information):
+            return []
+
+        if payload[0:16] != BGPMessage.MARKER:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_message").info("Discarding BGP message " + str(self.packet_counter) + " without valid marker.")
+            return []
+
+        message = None
+
+        try:
+            # Discarded by a header filter before decoding its body if None
+            message = BGPMessage.factory(payload[16:], pcap_information, self.add_path_flags if add_path else self.flags)
+        except BGPError:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_message").info("BGPError was raised while decoding BGP message " + str(self.packet_counter) + ".")
+
+        if lock is None:
+            return self.__evaluate(message)
+
+        with lock:
+            return self.__evaluate(message)
+
+    def __evaluate(self, message):
+        # Applies observers, validation and filters to a decoded message (or None) of process_message()
+        result = []
+
+        try:
+            if message is None:
+                return result
+
+            if self.observer is not None and message.type in self.observed_types:
+                self.observer(message)
+
+            if self.validator is not None:
+                self.validator.validate_message(message)
+
+            if self.predicate(message):
+                result.append(message)
+
+        except BGPError:
+            logging.getLogger("pbgpp.PBGPPPipeline.process_message").info("BGPError was raised while filtering BGP message " + str(self.packet_counter) + ".")
+        finally:
+            self.packet_counter += 1
+
+        return result
+
+    def filter(self, message):
+        # Filters are always connected with a logical AND. One filter is able to allow multiple values
+        # for one specific filter. Those values are linked with a logical OR.
+        return message if self.predicate(message) else None
@@ -0,0 +1,241 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import glob
+import logging
+import os.path
+import sys
+import time
+
+from pbgpp.Application.Pipeline import PBGPPPipeline
+from pbgpp.MRT.Reader import MRTFileReader
+from pbgpp.PCAP.Exceptions import PCAPOfflineReaderError
+from pbgpp.PCAP.Index import PCAPTimeIndex
+from pbgpp.PCAP.RouteIndex import PCAPRouteIndex
+from pbgpp.PCAP.Reader import PCAPFileReader, PCAPRecordHeader
+
+
+def iter_messages(source, live=False, add_path_metric=None, scan_only=False, mrt=False, **options):
+    # Library entry point: lazily yields parsed BGPMessage objects from the given source.
+    #
+    # source may be
+    #   - a path to a pcap file, a wildcard string matching several pcap files or "-" for stdin
+    #   - a binary file-like object containing pcap data
+    #   - the name of a network interface (requires live=True and pcapy)
+    #   - an iterable of captured frames; either raw bytes or tuples of (timestamp, bytes)
+    #
+    # Filters are passed as keyword arguments named like the command line destinations, e.g.
+    # iter_messages("dump.pcap", filter_message_type=["UPDATE"], filter_nlri=["80.81.82.0/24"])
+    #
+    # With scan_only=True only the BGP header of each message is read (see BGPHeaderMessage).
+    #
+    # With mrt=True source is read as MRT file(s) instead (see iter_mrt_records()).
+    #
+    # Nothing in here sets up logging, prints to stdout or exits the interpreter.
+    pipeline = PBGPPPipeline.from_options(options, add_path_metric, scan_only)
+
+    if mrt:
+        for record in iter_mrt_records(source):
+            for m in pipeline.process_mrt(record):
+                yield m
+        return
+
+    for header, payload in iter_records(source, live, pipeline.time_window(), pipeline.route_query(), pipeline.flags["addpath"].get_value()):
+        for m in pipeline.process(header, payload):
+            yield m
+
+
+def iter_records(source, live=False, time_window=None, route_query=None, add_path=0):
+    # Yields (header, payload) tuples of captured frames from the given source
+    # With a time window (start, end) or a route query pcap files are only partially read (see iter_file_records())
+    if live:
+        for record in _iter_interface(source):
+            yield record
+
+    elif isinstance(source, str):
+        for path in _expand_path(source):
+            if path == "-":
+                handle = getattr(sys.stdin, "buffer", sys.stdin)
+                for record in PCAPFileReader(handle):
+                    yield record
+            else:
+                for record in iter_file_records(path, time_window, route_query, add_path):
+                    yield record
+
+    elif hasattr(source, "read"):
+        for record in PCAPFileReader(source):
+            yield record
+
+    else:
+        try:
+            iterator = iter(source)
+        except TypeError:
+            raise PCAPOfflineReaderError("unsupported input source of type " + type(source).__name__)
+
+        for item in iterator:
+            yield _frame_to_record(item)
+
+
+def iter_file_records(path, time_window=None, route_query=None, add_path=0):
+    # Yields the records of a pcap file. Records that can't pass the filters may still be yielded - they are
+    # dropped by the pipeline.
+    #
+    # With a route query (see PBGPPPipeline.route_query()) and a route index of the file only the records found in
+    # the index are read; files without hits are not opened at all. Only indexes built with the same ADD-PATH setting
+    # (add_path, see AddPathFlag) are used.
+    #
+    # With a time window the reader seeks to the first block that may contain records of the window using the time
+    # index of the file; without time index the position is found by a galloping search on the file.
+    logger = logging.getLogger("pbgpp.Stream.iter_file_records")
+    offsets = None
+
+    if route_query is not None:
+        route_index = PCAPRouteIndex.load(path, add_path)
+
+        if route_index is not None:
+            try:
+                offsets = route_index.query(route_query)
+            finally:
+                route_index.close()
+
+            logger.debug("Route index of " + path + ": " + str(len(offsets)) + " matching records")
+
+            if len(offsets) == 0 and os.path.getsize(path) == route_index.size:
+                return
+
+    with open(path, "rb") as handle:
+        reader = PCAPFileReader(handle)
+
+        if offsets is not None:
+            index = PCAPTimeIndex.load(path) if time_window is not None else None
+
+            if index is not None:
+                start, stop = index.seek_range(*time_window)
+                offsets = [o for o in offsets if o >= start and (stop is None or o < stop)]
+
+            for record in _iter_offsets(reader, offsets, route_index.size):
+                yield record
+            return
+
+        if time_window is None:
+            for record in reader:
+                yield record
+            return
+
+        start, end = time_window
+        index = PCAPTimeIndex.load(path)
+
+        if index is not None:
+            offset, stop = index.seek_range(start, end)
+            logger.debug("Time index of " + path + ": reading from offset " + str(offset) + " to " + str(stop))
+        else:
+            offset, stop = PCAPTimeIndex.gallop(reader, start), None
+            logger.debug("No time index for " + path + ": galloping search found offset " + str(offset))
+
+        reader.seek(offset)
+        limit = (end[0] + PCAPTimeIndex.REORDER_TOLERANCE, end[1])
+
+        while stop is None or reader.offset < stop:
+            record = reader.read_record()
+
+            if record is None:
+                break
+
+            if stop is None and record[0].getts() > limit:
+                break
+
+            yield record
+
+
+def iter_mrt_records(source):
+    # Yields the MRTRecord objects of MRT files. source may be a path, a wildcard string matching several files,
+    # "-" for stdin or a binary file-like object. Files may be gzip or bzip2 compressed.
+    if hasattr(source, "read"):
+        for record in MRTFileReader(source):
+            yield record
+        return
+
+    for path in _expand_path(source):
+        handle = MRTFileReader.open(path)
+
+        try:
+            for record in MRTFileReader(handle):
+                yield record
+        finally:
+            handle.close()
+
+
+def _iter_offsets(reader, offsets, indexed_size):
+    # Records found in a route index - followed by all records appended to the file after it was indexed
+    for offset in offsets:
+        reader.seek(offset)
+        record = reader.read_record()
+
+        if record is not None:
+            yield record
+
+    reader.seek(indexed_size)
+
+    for record in reader:
+        yield record
+
+
+def _expand_path(source):
+    if source == "-" or os.path.isfile(source):
+        return [source]
+
+    files = sorted(glob.glob(source))
+
+    if len(files) == 0:
+        raise PCAPOfflineReaderError("'" + source + "' is neither a single file nor a valid wildcard string (no files found!)")
+
+    return files
+
+
+def _iter_interface(interface):
+    # pcapy is only required for live capturing
+    import pcapy
+
+    handle = pcapy.open_live(interface, 65536, 1, 100)
+
+    while True:
+        header, payload = handle.next()
+
+        # No packet has been received within the read timeout
+        if header is None:
+            continue
+
+        yield header, payload
+
+
+def _frame_to_record(item):
+    if isinstance(item, bytes):
+        # Bare frames get the time of their arrival
+        now = time.time()
+        return PCAPRecordHeader(int(now), int((now % 1) * 1000000), len(item), len(item)), item
+
+    ts, payload = item
+
+    if hasattr(ts, "getts"):
+        return ts, payload
+
+    if isinstance(ts, tuple):
+        return PCAPRecordHeader(ts[0], ts[1], len(payload), len(payload)), payload
+
+    return PCAPRecordHeader(int(ts), int((ts % 1) * 1000000), len(payload), len(payload)), payload
@@ -0,0 +1,85 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pbgpp.BGP.Translation import BGPTranslation
+
+
+class BGPDecodePlan:
+    # A decode plan tells the UPDATE and OPEN parsers which parts of a message are actually needed.
+    # Everything else is skipped by its length without building any objects.
+    # A value of None always means "decode everything" for the respective part.
+
+    def __init__(self, attributes=None, withdrawn_routes=True, nlri=True, optional_parameters=None):
+        # Set of path attribute type codes (e.g. BGPStatics.UPDATE_ATTRIBUTE_AS_PATH) or None
+        self.attributes = None if attributes is None else set(attributes)
+
+        # Prefix sections of UPDATE messages
+        self.withdrawn_routes = withdrawn_routes
+        self.nlri = nlri
+
+        # Set of OPEN optional parameter types (e.g. BGPStatics.OPEN_CAPABILITY) or None
+        self.optional_parameters = None if optional_parameters is None else set(optional_parameters)
+
+    @classmethod
+    def empty(cls):
+        # Plan that only decodes the fixed fields of every message - extend it using require()
+        return cls(attributes=[], withdrawn_routes=False, nlri=False, optional_parameters=[])
+
+    def require(self, attributes=None, withdrawn_routes=False, nlri=False, optional_parameters=None):
+        if attributes is None:
+            self.attributes = None
+        elif self.attributes is not None:
+            self.attributes.update(attributes)
+
+        if optional_parameters is None:
+            self.optional_parameters = None
+        elif self.optional_parameters is not None:
+            self.optional_parameters.update(optional_parameters)
+
+        self.withdrawn_routes = self.withdrawn_routes or withdrawn_routes
+        self.nlri = self.nlri or nlri
+
+    def require_filter(self, f):
+        # Filters declare what they need using their REQUIRED_* class attributes
+        self.require(attributes=f.REQUIRED_ATTRIBUTES,
+                     withdrawn_routes="withdrawn_routes" in f.REQUIRED_SECTIONS,
+                     nlri="nlri" in f.REQUIRED_SECTIONS,
+                     optional_parameters=f.REQUIRED_OPTIONAL_PARAMETERS)
+
+    def needs_attribute(self, attribute_type):
+        return self.attributes is None or attribute_type in self.attributes
+
+    def needs_optional_parameter(self, parameter_type):
+        return self.optional_parameters is None or parameter_type in self.optional_parameters
+
+    def is_full(self):
+        return self.attributes is None and self.optional_parameters is None and self.withdrawn_routes and self.nlri
+
+    def __str__(self):
+        if self.attributes is None:
+            attributes = "ALL"
+        else:
+            attributes = ",".join(BGPTranslation.path_attribute(a) for a in sorted(self.attributes)) or "NONE"
+
+        if self.optional_parameters is None:
+            optional_parameters = "ALL"
+        else:
+            optional_parameters = ",".join(BGPTranslation.open_parameter(p) for p in sorted(self.optional_parameters)) or "NONE"
+
+        return "<BGPDecodePlan attributes={0} withdrawn_routes={1} nlri={2} optional_parameters={3}>".format(attributes, BGPTranslation.boolean(self.withdrawn_routes), BGPTranslation.boolean(self.nlri), optional_parameters)
@@ -70,3 +70,11 @@ class BGPNLRIError(BGPError):
 
 class BGPUpdateASPathSegmentFactoryError(BGPError):
     pass
+
+
+class BGPPrefixTrieError(BGPError):
+    pass
+
+
+class BGPIntervalSetError(BGPError):
+    pass
@@ -0,0 +1,56 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import struct
+
+from pbgpp.BGP.Message import BGPMessage
+from pbgpp.BGP.Statics import BGPStatics
+
+
+class BGPHeaderMessage(BGPMessage):
+    # Message that has been framed but whose body has not been decoded (--scan-only, header filters).
+    # Only the fields of the 19-byte BGP header (length and type) are available.
+    # For UPDATE messages a sub type hint is read from the section length fields of the body.
+    def __init__(self, payload, length, message_type, pcap_information):
+        BGPMessage.__init__(self, payload, length, pcap_information)
+        self.type = message_type
+        self.parsed = True
+        self.error = False
+
+        if message_type == BGPStatics.MESSAGE_TYPE_UPDATE:
+            self.subtype = BGPHeaderMessage.update_subtype_hint(payload)
+
+    @staticmethod
+    def update_subtype_hint(payload):
+        # Non-empty withdrawn routes and NLRI sections determine the sub type (like a decode plan that skips them)
+        try:
+            withdrawn_routes_length = struct.unpack("!H", payload[:2])[0]
+            path_attributes_length = struct.unpack("!H", payload[2 + withdrawn_routes_length:4 + withdrawn_routes_length])[0]
+        except struct.error:
+            return None
+
+        subtype = BGPStatics.UPDATE_TYPE_NONE
+
+        if withdrawn_routes_length > 0:
+            subtype |= BGPStatics.UPDATE_TYPE_WITHDRAWAL
+
+        if len(payload) > 4 + withdrawn_routes_length + path_attributes_length:
+            subtype |= BGPStatics.UPDATE_TYPE_ANNOUNCE
+
+        return subtype
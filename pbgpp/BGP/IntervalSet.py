@@ -0,0 +1,222 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import socket
+import struct
+from array import array
+from bisect import bisect_right
+
+from pbgpp.BGP.Exceptions import BGPIntervalSetError
+
+
+class BGPIntervalSet:
+    # Set of integers stored as sorted, non-overlapping intervals [start, end] in two flat arrays.
+    # Used for very long lists (IRR prefix lists, bogons, AS sets) where a radix trie with one Python list per
+    # node would be too large: an IPv4 prefix or ASN range costs 8 bytes, a lookup is a single bisect.
+    #
+    # Intervals are collected with add() and merged when the set is frozen - afterwards the set is read only.
+
+    def __init__(self, bits=32):
+        self.bits = bits
+        self.pending = []
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    @staticmethod
+    def typecode(bits):
+        # Smallest unsigned array type holding the values - None if values are too large for an array (IPv6)
+        for code in ("I", "L", "Q"):
+            if array(code).itemsize * 8 >= bits:
+                return code
+
+        return None
+
+    def add(self, start, end):
+        if not 0 <= start <= end < (1 << self.bits):
+            raise BGPIntervalSetError("invalid interval " + str(start) + "-" + str(end))
+
+        self.pending.append((start, end))
+
+    def freeze(self):
+        # Sort and merge overlapping or adjacent intervals into the lookup arrays
+        intervals = self.pending
+        intervals.extend(zip(self.starts, self.ends))
+        intervals.sort()
+        self.pending = []
+
+        starts = []
+        ends = []
+
+        for start, end in intervals:
+            if ends and start <= ends[-1] + 1:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+
+        code = self.typecode(self.bits)
+
+        if code is not None:
+            self.starts = array(code, starts)
+            self.ends = array(code, ends)
+        else:
+            self.starts = starts
+            self.ends = ends
+
+        return self
+
+    def contains(self, value):
+        return self.covers(value, value)
+
+    def covers(self, start, end):
+        # Returns True if all values from start to end are in the set
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and self.ends[i] >= end
+
+
+class BGPPrefixIntervalSet:
+    # Prefix list on top of BGPIntervalSet - one set per IP version. A prefix matches if its whole address
+    # range is covered by the listed prefixes, i.e. it equals or is more specific than a listed prefix
+    # (orlonger match). Adjacent prefixes are merged, so 10.0.0.0/25 and 10.0.0.128/25 also cover 10.0.0.0/24.
+
+    ADDRESS_BITS = {4: 32, 6: 128}
+
+    def __init__(self):
+        self.sets = {4: BGPIntervalSet(32), 6: BGPIntervalSet(128)}
+
+    def __len__(self):
+        return len(self.sets[4]) + len(self.sets[6])
+
+    @staticmethod
+    def parse_prefix(prefix):
+        # Fast path for IPv4 prefixes (the usual case for millions of lines) - returns (version, first, last)
+        try:
+            address, length = prefix.split("/", 1) if "/" in prefix else (prefix, None)
+
+            if ":" in address:
+                version = 6
+                high, low = struct.unpack("!QQ", socket.inet_pton(socket.AF_INET6, address))
+                network = (high << 64) | low
+            else:
+                version = 4
+                network = struct.unpack("!I", socket.inet_aton(address))[0]
+
+                if address.count(".") != 3:
+                    # inet_aton accepts short forms like 10.1
+                    raise ValueError
+
+            bits = BGPPrefixIntervalSet.ADDRESS_BITS[version]
+            length = bits if length is None else int(length)
+        except (ValueError, socket.error, struct.error):
+            raise BGPIntervalSetError("invalid prefix '" + str(prefix) + "'")
+
+        if not 0 <= length <= bits:
+            raise BGPIntervalSetError("invalid prefix length in '" + str(prefix) + "'")
+
+        host = (1 << (bits - length)) - 1
+        network &= ~host
+        return version, network, network | host
+
+    def add(self, prefix):
+        version, first, last = self.parse_prefix(prefix)
+        self.sets[version].add(first, last)
+
+    def freeze(self):
+        self.sets[4].freeze()
+        self.sets[6].freeze()
+        return self
+
+    def covers(self, version, network, length):
+        bits = self.ADDRESS_BITS[version]
+        return self.sets[version].covers(network, network | ((1 << (bits - length)) - 1))
+
+    @classmethod
+    def from_file(cls, path):
+        # One prefix per line; empty lines, comments (#) and trailing columns are ignored
+        # Plain IPv4 prefixes are converted inline to keep loading of millions of lines fast
+        prefixes = cls()
+        pending = prefixes.sets[4].pending
+        inet_aton = socket.inet_aton
+        unpack = struct.Struct("!I").unpack
+
+        with open(path, "r") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+
+                if not line:
+                    continue
+
+                prefix = line.split(None, 1)[0]
+                address, _, length = prefix.partition("/")
+
+                if address.count(".") == 3 and length.isdigit() and int(length) <= 32:
+                    try:
+                        network = unpack(inet_aton(address))[0]
+                    except socket.error:
+                        raise BGPIntervalSetError("invalid prefix '" + prefix + "'")
+
+                    host = (1 << (32 - int(length))) - 1
+                    pending.append((network & ~host, network | host))
+                else:
+                    prefixes.add(prefix)
+
+        return prefixes.freeze()
+
+
+class BGPASNIntervalSet(BGPIntervalSet):
+    # List of 4-byte AS numbers - lines contain a single ASN (65000 or AS65000) or a range (64512-65534)
+
+    def __init__(self):
+        BGPIntervalSet.__init__(self, 32)
+
+    @staticmethod
+    def parse_asn(asn):
+        asn = asn.strip()
+
+        if asn[0:2].upper() == "AS":
+            asn = asn[2:]
+
+        try:
+            return int(asn)
+        except ValueError:
+            raise BGPIntervalSetError("invalid ASN '" + asn + "'")
+
+    def add_range(self, value):
+        if "-" in value:
+            start, end = value.split("-", 1)
+            self.add(self.parse_asn(start), self.parse_asn(end))
+        else:
+            asn = self.parse_asn(value)
+            self.add(asn, asn)
+
+    @classmethod
+    def from_file(cls, path):
+        asns = cls()
+
+        with open(path, "r") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+
+                if line:
+                    asns.add_range(line.split(None, 1)[0])
+
+        return asns.freeze()
@@ -25,6 +25,8 @@ from pbgpp.BGP.Translation import BGPTranslation
 
 
 class BGPMessage:
+    MARKER = b'\xff' * 16
+
     def __init__(self, payload, length, pcap_information, flags=None):
         self.payload = payload
         self.length = length
@@ -100,6 +102,10 @@ class BGPMessage:
         # Return the message length
         return self.length
 
+    def get_bytes(self):
+        # Return the message as sent on the wire (marker, header and payload)
+        return BGPMessage.MARKER + struct.pack("!HB", self.length, self.type) + self.payload
+
     @staticmethod
     def factory(payload, pcap_information, flags=None):
         logger = logging.getLogger("pbgpp.BGPMessage.factory")
@@ -118,10 +124,26 @@ class BGPMessage:
         message_type = bgp_header[1]
 
         # Plausibility-check for BGP messages
-        if message_length is not (len(payload) + 16):
+        if message_length != (len(payload) + 16):
             logger.warning("The unpacked message length does not equal the real payload length.")
             raise BGPMessageFactoryError("parsed message length does not equal real payload length.")
 
+        # Filters that only need the BGP header are applied before the message body is decoded
+        header_filter = flags["headerfilter"].get_value() if flags is not None and "headerfilter" in flags else None
+
+        # In scan-only mode the message body is never decoded
+        scan_only = flags is not None and "scanonly" in flags and flags["scanonly"].get_value() == 1
+
+        if header_filter is not None or scan_only:
+            from pbgpp.BGP.Header.Message import BGPHeaderMessage
+            header = BGPHeaderMessage(payload[3:], message_length, message_type, pcap_information)
+
+            if header_filter is not None and not header_filter(header):
+                return None
+
+            if scan_only and BGPStatics.MESSAGE_TYPE_OPEN <= message_type <= BGPStatics.MESSAGE_TYPE_ROUTE_REFRESH:
+                return header
+
         if message_type == BGPStatics.MESSAGE_TYPE_UPDATE:
             from pbgpp.BGP.Update.Message import BGPUpdateMessage
             return BGPUpdateMessage(payload[3:], message_length, pcap_information, flags)
@@ -132,7 +154,7 @@ class BGPMessage:
 
         if message_type == BGPStatics.MESSAGE_TYPE_OPEN:
             from pbgpp.BGP.Open.Message import BGPOpenMessage
-            return BGPOpenMessage(payload[3:], message_length, pcap_information)
+            return BGPOpenMessage(payload[3:], message_length, pcap_information, flags)
 
         if message_type == BGPStatics.MESSAGE_TYPE_NOTIFICATION:
             from pbgpp.BGP.Notification.Message import BGPNotificationMessage
@@ -27,8 +27,8 @@ from pbgpp.BGP.Statics import BGPStatics
 
 
 class BGPOpenMessage(BGPMessage):
-    def __init__(self, payload, length, pcap_information):
-        BGPMessage.__init__(self, payload, length, pcap_information)
+    def __init__(self, payload, length, pcap_information, flags=None):
+        BGPMessage.__init__(self, payload, length, pcap_information, flags)
         self.type = BGPStatics.MESSAGE_TYPE_OPEN
         self.optional_parameter = []
         self.__parse()
@@ -37,6 +37,11 @@ class BGPOpenMessage(BGPMessage):
         self.parsed = True
         logger = logging.getLogger('pbgpp.BGPOpenMessage.__parse')
 
+        # Optional parameters that are not required by the decode plan are skipped
+        plan = None
+        if self.flags is not None and "decodeplan" in self.flags:
+            plan = self.flags["decodeplan"].get_value()
+
         try:
             fields = struct.unpack("!BHHLB", self.payload[:10])
             self.version = fields[0]
@@ -63,7 +68,8 @@ class BGPOpenMessage(BGPMessage):
                         parameter_payload_stop = parameter_payload_start + parameter_length  # The payload of the optional parameter ends at (payload start marker + length of parameter)
 
                         # Now building the optional parameter factory
-                        self.optional_parameter.append(BGPOptionalParameter.factory(parameter_type, self.payload[parameter_payload_start:parameter_payload_stop]))
+                        if plan is None or plan.needs_optional_parameter(parameter_type):
+                            self.optional_parameter.append(BGPOptionalParameter.factory(parameter_type, self.payload[parameter_payload_start:parameter_payload_stop]))
 
                         # If adding was successful we want to continue the loop if there are more parameters left
                         # Therefore we need to adjust the current_byte_position
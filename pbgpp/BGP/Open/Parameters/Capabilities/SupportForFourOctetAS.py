@@ -17,6 +17,8 @@
 # limitations under the License.
 #
 
+import struct
+
 from pbgpp.BGP.Open.Parameters.Capability import BGPCapability
 from pbgpp.BGP.Statics import BGPStatics
 from pbgpp.BGP.Translation import BGPTranslation
@@ -26,13 +28,19 @@ class CapabilitySupportForFourOctetAS(BGPCapability):
     def __init__(self, payload):
         BGPCapability.__init__(self, payload)
         self.type = BGPStatics.CAPABILITY_SUPPORT_FOR_FOUR_OCTET_AS
+        self.asn = None
         self.__parse()
 
     def __parse(self):
         self.parsed = True
 
+        # The capability carries the 4-byte ASN of the speaker (RFC 6793)
+        if len(self.payload) >= 4:
+            self.asn = struct.unpack("!I", self.payload[:4])[0]
+
     def json(self):
         return {
             "capability": self.type,
-            "capability_string": BGPTranslation.capability(self.type)
+            "capability_string": BGPTranslation.capability(self.type),
+            "asn": self.asn
         }
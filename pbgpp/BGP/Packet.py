@@ -98,7 +98,13 @@ class BGPPacket:
         for m in messages:
             try:
                 # ... and add them to the message list of packet object using a message factory pattern
-                self.add_message(BGPMessage.factory(m, self.pcap_information, self.flags))
+                message = BGPMessage.factory(m, self.pcap_information, self.flags)
+
+                if message is None:
+                    # Message was discarded by a header filter before decoding its body
+                    continue
+
+                self.add_message(message)
             except BGPMessageFactoryError as f:
                 # This exception can be raised when no valid message type could be found
                 # It's a common exception when there is a malformed packet - therefore: log it as INFO
@@ -0,0 +1,150 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import socket
+from binascii import hexlify
+
+from pbgpp.BGP.Exceptions import BGPPrefixTrieError
+
+
+class BGPPrefixTrie:
+    # Binary radix trie holding IPv4 and IPv6 prefixes. A lookup walks at most one node per prefix bit,
+    # so its costs only depend on the prefix length and not on the number of stored prefixes.
+    #
+    # Each node is a list of [child for bit 0, child for bit 1, values of the prefix ending here, prefixes in subtree]
+    # The values are None for nodes that are no prefix; values are a list of whatever was stored with the prefix.
+
+    # Lookup modes (named like Juniper route-filter match types)
+    MODE_EXACT = "exact"          # Stored prefix equals the looked up prefix
+    MODE_OR_LONGER = "orlonger"   # Looked up prefix equals or is more specific than a stored prefix
+    MODE_OR_SHORTER = "orshorter" # Looked up prefix equals or is less specific than a stored prefix
+    MODES = [MODE_EXACT, MODE_OR_LONGER, MODE_OR_SHORTER]
+
+    ADDRESS_BITS = {4: 32, 6: 128}
+
+    def __init__(self, prefixes=None):
+        self.roots = {4: [None, None, None, 0], 6: [None, None, None, 0]}
+        self.size = 0
+
+        if prefixes is not None:
+            for p in prefixes:
+                self.add(p)
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def parse_prefix(prefix):
+        # Converts a prefix string (e.g. 80.81.82.0/24 or 2001:db8::/32) into a tuple of (version, network, length)
+        # Addresses without prefix length are handled as host routes. Host bits of the network are cleared.
+        try:
+            if "/" in prefix:
+                address, length = prefix.split("/", 1)
+                length = int(length)
+            else:
+                address, length = prefix, None
+
+            if ":" in address:
+                version = 6
+                packed = socket.inet_pton(socket.AF_INET6, address)
+            else:
+                version = 4
+                packed = socket.inet_pton(socket.AF_INET, address)
+        except (ValueError, socket.error):
+            raise BGPPrefixTrieError("invalid prefix '" + str(prefix) + "'")
+
+        bits = BGPPrefixTrie.ADDRESS_BITS[version]
+
+        if length is None:
+            length = bits
+
+        if not 0 <= length <= bits:
+            raise BGPPrefixTrieError("invalid prefix length in '" + str(prefix) + "'")
+
+        network = int(hexlify(packed), 16) & ~((1 << (bits - length)) - 1)
+        return version, network, length
+
+    def add(self, prefix, value=None):
+        version, network, length = self.parse_prefix(prefix)
+        self.insert(version, network, length, value)
+
+    def insert(self, version, network, length, value=None):
+        bits = self.ADDRESS_BITS[version]
+        node = self.roots[version]
+        path = [node]
+
+        for i in range(0, length):
+            bit = (network >> (bits - 1 - i)) & 1
+
+            if node[bit] is None:
+                node[bit] = [None, None, None, 0]
+
+            node = node[bit]
+            path.append(node)
+
+        if node[2] is None:
+            node[2] = []
+            self.size += 1
+
+            for n in path:
+                n[3] += 1
+
+        if value is not None:
+            node[2].append(value)
+
+    def count(self, version, network, length, mode=MODE_EXACT):
+        # Returns the number of stored prefixes that match the given prefix in the given mode
+        bits = self.ADDRESS_BITS[version]
+        node = self.roots[version]
+        matches = 0
+
+        for i in range(0, length):
+            if mode == self.MODE_OR_LONGER and node[2] is not None:
+                # Stored prefix on the way down is covering the looked up prefix
+                matches += 1
+
+            node = node[(network >> (bits - 1 - i)) & 1]
+
+            if node is None:
+                return matches
+
+        if mode == self.MODE_OR_SHORTER:
+            # All stored prefixes below this node are more specifics of the looked up prefix
+            return node[3]
+
+        return matches + 1 if node[2] is not None else matches
+
+    def covering(self, version, network, length):
+        # Yields tuples of (prefix length, values) of all stored prefixes that cover the given prefix
+        bits = self.ADDRESS_BITS[version]
+        node = self.roots[version]
+
+        for i in range(0, length + 1):
+            if node[2] is not None:
+                yield i, node[2]
+
+            if i == length:
+                break
+
+            node = node[(network >> (bits - 1 - i)) & 1]
+
+            if node is None:
+                break
+
+    def lookup(self, prefix, mode=MODE_EXACT):
+        return self.count(*self.parse_prefix(prefix), mode=mode) > 0
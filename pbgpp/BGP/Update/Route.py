@@ -24,6 +24,9 @@ from pbgpp.BGP.Exceptions import BGPRouteInitializeError, BGPRouteConvertionErro
 
 
 class BGPRoute:
+    # Address family of the prefix (see BGPPrefixTrie)
+    version = 4
+
     def __init__(self, prefix, prefix_length):
         # A route is universally used
         # Prefix = e.g. 123.123.123.123
@@ -38,6 +41,7 @@ class BGPRoute:
         self.prefix_string = None
         self.prefix_length_string = None
         self.prefix_length_decimal = None
+        self.prefix_decimal = None
 
         self._parse()
 
@@ -91,6 +95,35 @@ class BGPRoute:
         else:
             raise BGPRouteConvertionError("was not able to parse bytes.")
 
+        # Decimal representation of the network (host bits cleared) - used for prefix lookups (see BGPPrefixTrie)
+        network = struct.unpack("!L", (self.prefix + b"\x00\x00\x00\x00")[:4])[0]
+        self.prefix_decimal = network & ~((1 << max(0, 32 - self.prefix_length_decimal)) - 1) & 0xffffffff
+
     @staticmethod
     def decimal_ip_to_string(decimal):
         return socket.inet_ntoa(struct.pack('!L', decimal))
+
+    @staticmethod
+    def string_ip_to_decimal(address):
+        return struct.unpack('!L', socket.inet_aton(address))[0]
+
+
+class BGPIPv6Route(BGPRoute):
+    # IPv6 prefixes are only known from MRT RIB entries (see MRTTableDump) - UPDATE messages carry them in
+    # MP_REACH_NLRI which isn't decoded
+    version = 6
+
+    def _parse(self):
+        self.prefix_length_decimal = struct.unpack("!B", self.prefix_length)[0]
+        self.prefix_length_string = str(self.prefix_length_decimal)
+
+        if self.prefix_length_decimal > 128 or len(self.prefix) < (self.prefix_length_decimal + 7) // 8:
+            raise BGPRouteConvertionError("was not able to parse bytes.")
+
+        address = (self.prefix + b"\x00" * 16)[:16]
+        self.prefix_string = socket.inet_ntop(socket.AF_INET6, address) + "/" + self.prefix_length_string
+
+        # Decimal representation of the network (host bits cleared) - used for prefix lookups (see BGPPrefixTrie)
+        high, low = struct.unpack("!QQ", address)
+        network = (high << 64) | low
+        self.prefix_decimal = network & ~((1 << (128 - self.prefix_length_decimal)) - 1)
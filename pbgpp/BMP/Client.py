@@ -0,0 +1,90 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import socket
+import struct
+
+from pbgpp.BMP.Statics import BMPStatics
+
+
+class BMPReplayClient:
+    # Minimal BMP speaker that replays BGP messages (e.g. read from MRT or pcap files) as Route Monitoring messages
+    # to a BMP collector. Intended for testing a BMPListener without a router.
+    INFORMATION_SYS_NAME = 2
+
+    def __init__(self, host, port, sys_name="pbgpp"):
+        self.host = host
+        self.port = port
+        self.sys_name = sys_name
+
+        self.socket = None
+
+    def connect(self):
+        self.socket = socket.create_connection((self.host, self.port))
+
+        # An Initiation message has to be sent first (RFC 7854 section 4.3)
+        name = self.sys_name.encode("utf-8")
+        self.send(BMPStatics.MESSAGE_TYPE_INITIATION, struct.pack("!HH", self.INFORMATION_SYS_NAME, len(name)) + name)
+
+    def close(self):
+        if self.socket is None:
+            return
+
+        self.send(BMPStatics.MESSAGE_TYPE_TERMINATION, struct.pack("!HHH", 1, 2, 0))
+        self.socket.close()
+        self.socket = None
+
+    def send(self, message_type, payload):
+        self.socket.sendall(struct.pack("!BIB", BMPStatics.VERSION, BMPStatics.HEADER_LENGTH + len(payload), message_type) + payload)
+
+    def send_route_monitoring(self, bgp, address, asn, ts=(0, 0), bgp_id=0):
+        # bgp is a BGP message including its marker, address the peer address as tuple (see PCAPLayer3Information)
+        self.send(BMPStatics.MESSAGE_TYPE_ROUTE_MONITORING, self.peer_header(address, asn, ts, bgp_id) + bgp)
+
+    def send_message(self, message):
+        # Sends a parsed BGPMessage as received from the source of its PCAP information
+        information = message.pcap_information
+        asn = information.get_source_as() if hasattr(information, "get_source_as") else 0
+
+        self.send_route_monitoring(message.get_bytes(), information.get_source_ip(), asn, information.get_timestamp())
+
+    def replay(self, source, mrt=False):
+        # Sends all BGP messages of a pcap or MRT source (see pbgpp.iter_messages()) - returns the number of messages
+        from pbgpp.Application.Stream import iter_messages
+
+        count = 0
+
+        # Only the framing of the messages is needed
+        for message in iter_messages(source, mrt=mrt, scan_only=True):
+            self.send_message(message)
+            count += 1
+
+        return count
+
+    @staticmethod
+    def peer_header(address, asn, ts=(0, 0), bgp_id=0):
+        flags = 0
+
+        if len(address) == 16:
+            flags |= BMPStatics.PEER_FLAG_IPV6
+            packed = bytes(bytearray(address))
+        else:
+            packed = b"\x00" * 12 + bytes(bytearray(address))
+
+        return struct.pack("!BB8s16sIIII", BMPStatics.PEER_TYPE_GLOBAL, flags, b"\x00" * 8, packed, asn, bgp_id, ts[0], ts[1])
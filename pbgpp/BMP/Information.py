@@ -0,0 +1,51 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pbgpp.BMP.Statics import BMPStatics
+from pbgpp.PCAP.Information import PCAPInformation, PCAPLayer2Information, PCAPLayer3Information, PCAPLayer4Information
+
+
+class BMPPeerInformation(PCAPInformation):
+    # Synthesised PCAP information of a BGP message received via BMP. Source and destination are the sending and
+    # the receiving BGP speaker; the per-peer header of the BMP message and the monitoring router are kept as metadata.
+    # MAC addresses are empty, ports are only known from Peer Up notifications (0 otherwise).
+    def __init__(self, ts, source, destination, source_as, destination_as, peer_header, router=None, ports=(0, 0)):
+        PCAPInformation.__init__(self, ts, PCAPLayer2Information(None, None), PCAPLayer3Information(source, destination), PCAPLayer4Information(ports[0], ports[1]))
+
+        self.source_as = source_as
+        self.destination_as = destination_as
+
+        # Per-peer header (see BMPPeerHeader) and address tuple of the monitoring router
+        self.peer_header = peer_header
+        self.router = router
+
+        # Messages of peers flagged with the legacy 2-byte AS_PATH format carry 2-byte AS numbers
+        self.as4 = peer_header is None or not peer_header.flags & BMPStatics.PEER_FLAG_AS2
+
+    def get_source_as(self):
+        return self.source_as
+
+    def get_destination_as(self):
+        return self.destination_as
+
+    def get_peer_header(self):
+        return self.peer_header
+
+    def get_router(self):
+        return self.router
@@ -0,0 +1,203 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import logging
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pbgpp.BMP.Statics import BMPStatics
+
+
+class BMPListener:
+    # BMP collector (RFC 7854) built on asyncio. Many monitoring routers may be connected at once: every connection
+    # is framed by its own task and the contained BGP messages are decoded by a pool of worker threads. A router has
+    # at most one batch of messages in the pool at a time, so a chatty router can't stall the others - once its queue
+    # is full, reading from its connection pauses and TCP flow control slows it down.
+    # Messages are decoded by the workers concurrently; only the evaluation of decoded messages by the pipeline
+    # (filter chain statistics and reordering, message counter) is serialized by a lock (see process_message()).
+    HEADER = struct.Struct("!BIB")
+
+    # Upper bound of a single BMP message - anything larger is treated as a framing error
+    MAX_MESSAGE_LENGTH = 1048576
+
+    def __init__(self, host, port, pipeline, callback, workers=4, batch_size=64, queue_size=1024):
+        self.host = host
+        self.port = port
+
+        # Every BGP message that passes the filters of the pipeline is passed to callback (in the event loop thread)
+        self.pipeline = pipeline
+        self.callback = callback
+
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+        self.executor = None
+        self.server = None
+
+        # Serializes the evaluation of decoded messages by the worker threads
+        self.pipeline_lock = threading.Lock()
+
+        # Number of currently connected routers
+        self.connections = 0
+
+    def serve_forever(self):
+        # Runs the listener until the process is interrupted
+        loop = asyncio.new_event_loop()
+
+        try:
+            loop.run_until_complete(self.start())
+            loop.run_until_complete(self.server.serve_forever())
+        finally:
+            loop.run_until_complete(self.close())
+            loop.close()
+
+    async def start(self):
+        self.executor = ThreadPoolExecutor(self.workers)
+        self.server = await asyncio.start_server(self.__handle_connection, self.host, self.port)
+
+        logging.getLogger("pbgpp.BMPListener.start").info("Listening for BMP connections on " + str(self.host) + ":" + str(self.get_port()))
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def get_port(self):
+        # The bound port (port 0 picks a free one)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def __handle_connection(self, reader, writer):
+        logger = logging.getLogger("pbgpp.BMPListener.__handle_connection")
+
+        peer = writer.get_extra_info("peername")
+        name = str(peer[0]) + ":" + str(peer[1]) if peer else "unknown"
+        router = self.address_to_tuple(peer[0]) if peer else None
+
+        self.connections += 1
+        logger.info("BMP connection from " + name + " (" + str(self.connections) + " connected)")
+
+        queue = asyncio.Queue(self.queue_size)
+        consumer = asyncio.ensure_future(self.__consume(queue, router, writer))
+
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(BMPStatics.HEADER_LENGTH)
+                except asyncio.IncompleteReadError:
+                    break
+
+                version, length, message_type = self.HEADER.unpack(header)
+
+                if version != BMPStatics.VERSION:
+                    logger.warning("Closing BMP connection from " + name + ": unsupported version " + str(version))
+                    break
+
+                if length < BMPStatics.HEADER_LENGTH or length > self.MAX_MESSAGE_LENGTH:
+                    logger.warning("Closing BMP connection from " + name + ": invalid message length " + str(length))
+                    break
+
+                try:
+                    payload = await reader.readexactly(length - BMPStatics.HEADER_LENGTH)
+                except asyncio.IncompleteReadError:
+                    logger.warning("BMP connection from " + name + " was closed within a message")
+                    break
+
+                if message_type == BMPStatics.MESSAGE_TYPE_TERMINATION:
+                    logger.info("BMP connection from " + name + " was terminated by the router")
+                    break
+
+                await queue.put((message_type, payload))
+
+        except (ConnectionError, OSError) as e:
+            logger.warning("BMP connection from " + name + " failed: " + str(e))
+
+        finally:
+            await queue.put(None)
+            await consumer
+
+            writer.close()
+            self.connections -= 1
+            logger.info("BMP connection from " + name + " closed")
+
+    async def __consume(self, queue, router, writer):
+        # Hands the messages of one connection to the worker pool in batches until None is received
+        loop = asyncio.get_event_loop()
+        failed = False
+
+        while True:
+            batch = [await queue.get()]
+
+            while batch[-1] is not None and len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            end = batch[-1] is None
+
+            if end:
+                batch.pop()
+
+            if batch and not failed:
+                try:
+                    messages = await loop.run_in_executor(self.executor, self.__decode, batch, router)
+
+                    for m in messages:
+                        self.callback(m)
+
+                except Exception as e:
+                    # Stop handling this connection but keep draining its queue so the reading task doesn't block
+                    logging.getLogger("pbgpp.BMPListener.__consume").exception("Handling BMP messages failed: " + str(e))
+                    writer.close()
+                    failed = True
+
+            if end:
+                return
+
+    def __decode(self, batch, router):
+        # Runs in a worker thread
+        result = []
+
+        for message_type, payload in batch:
+            result.extend(self.pipeline.process_bmp(message_type, payload, router, self.pipeline_lock))
+
+        return result
+
+    @staticmethod
+    def address_to_tuple(address):
+        # Converts an IPv4 or IPv6 address string into the tuple representation of PCAPLayer3Information
+        address = address.split("%")[0]
+
+        try:
+            return tuple(bytearray(socket.inet_pton(socket.AF_INET, address)))
+        except (socket.error, ValueError):
+            pass
+
+        packed = socket.inet_pton(socket.AF_INET6, address)
+
+        # IPv4-mapped addresses of dual stack sockets
+        if packed[0:12] == b"\x00" * 10 + b"\xff\xff":
+            return tuple(bytearray(packed[12:16]))
+
+        return tuple(bytearray(packed))
@@ -0,0 +1,151 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import struct
+import time
+
+from pbgpp.BMP.Exceptions import BMPMessageError
+from pbgpp.BMP.Information import BMPPeerInformation
+from pbgpp.BMP.Statics import BMPStatics
+
+
+class BMPPeerHeader:
+    # Per-peer header of Route Monitoring, Peer Up and Peer Down messages (RFC 7854 section 4.2)
+    FORMAT = struct.Struct("!BB8s16sIIII")
+
+    def __init__(self, payload):
+        if len(payload) < BMPStatics.PEER_HEADER_LENGTH:
+            raise BMPMessageError("BMP message is too short to contain a per-peer header")
+
+        fields = self.FORMAT.unpack_from(payload)
+
+        self.peer_type = fields[0]
+        self.flags = fields[1]
+        self.distinguisher = fields[2]
+        self.asn = fields[4]
+        self.bgp_id = fields[5]
+        self.ts = (fields[6], fields[7])
+
+        self.ipv6 = (self.flags & BMPStatics.PEER_FLAG_IPV6) != 0
+        self.post_policy = (self.flags & BMPStatics.PEER_FLAG_POST_POLICY) != 0
+
+        # IPv4 addresses are stored in the last 4 bytes of the address field
+        self.address = self.unpack_address(fields[3], self.ipv6)
+
+    @staticmethod
+    def unpack_address(address, ipv6):
+        return tuple(bytearray(address)) if ipv6 else tuple(bytearray(address[12:16]))
+
+    def __str__(self):
+        return "<BMPPeerHeader type={0} flags={1} asn={2} bgp_id={3}>".format(self.peer_type, self.flags, self.asn, self.bgp_id)
+
+
+class BMPMessage:
+    # A single BMP message (without common header). BGP messages contained in Route Monitoring, Peer Up
+    # and Peer Down messages are unwrapped together with a BMPPeerInformation describing their origin.
+    def __init__(self, message_type, payload, router=None):
+        self.type = message_type
+        self.payload = payload
+
+        # Address tuple of the monitoring router that sent this message (see PCAPLayer3Information)
+        self.router = router if router is not None else (0, 0, 0, 0)
+
+        self.peer_header = None
+
+        # List of (BMPPeerInformation, BGP message including its marker)
+        self.bgp_messages = []
+
+        self.__parse()
+
+    def __parse(self):
+        if self.type == BMPStatics.MESSAGE_TYPE_ROUTE_MONITORING:
+            self.peer_header = BMPPeerHeader(self.payload)
+            self.__add(self.peer_header.address, self.router, self.peer_header.asn, 0, self.payload[BMPStatics.PEER_HEADER_LENGTH:])
+
+        elif self.type == BMPStatics.MESSAGE_TYPE_PEER_UP:
+            self.peer_header = BMPPeerHeader(self.payload)
+            self.__parse_peer_up()
+
+        elif self.type == BMPStatics.MESSAGE_TYPE_PEER_DOWN:
+            self.peer_header = BMPPeerHeader(self.payload)
+            self.__parse_peer_down()
+
+        # Initiation, Termination, Statistics Reports and Route Mirroring messages don't contain BGP messages we decode
+
+    def __parse_peer_up(self):
+        # Local address (16 bytes), local port, remote port, sent OPEN, received OPEN and optional information TLVs
+        position = BMPStatics.PEER_HEADER_LENGTH
+
+        if len(self.payload) < position + 20:
+            raise BMPMessageError("Peer Up notification is too short")
+
+        local_address = BMPPeerHeader.unpack_address(self.payload[position:position + 16], self.peer_header.ipv6)
+        local_port, remote_port = struct.unpack("!HH", self.payload[position + 16:position + 20])
+        position += 20
+
+        sent_open = self.__read_bgp_message(position)
+        received_open = self.__read_bgp_message(position + len(sent_open))
+
+        # My Autonomous System field of the sent OPEN message - AS_TRANS for 4-byte ASN
+        local_as = struct.unpack("!H", sent_open[20:22])[0] if len(sent_open) >= 22 else 0
+
+        self.__add(local_address, self.peer_header.address, local_as, self.peer_header.asn, sent_open, (local_port, remote_port))
+        self.__add(self.peer_header.address, local_address, self.peer_header.asn, local_as, received_open, (remote_port, local_port))
+
+    def __parse_peer_down(self):
+        position = BMPStatics.PEER_HEADER_LENGTH
+
+        if len(self.payload) < position + 1:
+            raise BMPMessageError("Peer Down notification is too short")
+
+        reason = struct.unpack("!B", self.payload[position:position + 1])[0]
+
+        # Only these reasons are followed by the NOTIFICATION message that closed the session
+        if reason == BMPStatics.PEER_DOWN_LOCAL_NOTIFICATION:
+            self.__add(self.router, self.peer_header.address, 0, self.peer_header.asn, self.__read_bgp_message(position + 1))
+        elif reason == BMPStatics.PEER_DOWN_REMOTE_NOTIFICATION:
+            self.__add(self.peer_header.address, self.router, self.peer_header.asn, 0, self.__read_bgp_message(position + 1))
+
+    def __read_bgp_message(self, position):
+        if len(self.payload) < position + 19:
+            raise BMPMessageError("BMP message ends within a BGP message header")
+
+        length = struct.unpack("!H", self.payload[position + 16:position + 18])[0]
+
+        if length < 19 or len(self.payload) < position + length:
+            raise BMPMessageError("BMP message ends within a BGP message")
+
+        return self.payload[position:position + length]
+
+    def __add(self, source, destination, source_as, destination_as, payload, ports=(0, 0)):
+        ts = self.peer_header.ts
+
+        # A timestamp of zero means that the router didn't provide one
+        if ts[0] == 0:
+            now = time.time()
+            ts = (int(now), int((now % 1) * 1000000))
+
+        information = BMPPeerInformation(ts, source, destination, source_as, destination_as, self.peer_header, self.router, ports)
+        self.bgp_messages.append((information, payload))
+
+    def get_bgp_messages(self):
+        return self.bgp_messages
+
+    def __str__(self):
+        return "<BMPMessage type={0} length={1} bgp_messages={2}>".format(self.type, len(self.payload) + BMPStatics.HEADER_LENGTH, len(self.bgp_messages))
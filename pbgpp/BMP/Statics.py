@@ -0,0 +1,58 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+
+class BMPStatics:
+    # ** BMPMessage **
+    # Common header according to RFC 7854 (version, message length, message type)
+    ##
+    VERSION = 3
+    HEADER_LENGTH = 6
+
+    # Message types according to RFC 7854
+    MESSAGE_TYPE_ROUTE_MONITORING = 0
+    MESSAGE_TYPE_STATISTICS_REPORT = 1
+    MESSAGE_TYPE_PEER_DOWN = 2
+    MESSAGE_TYPE_PEER_UP = 3
+    MESSAGE_TYPE_INITIATION = 4
+    MESSAGE_TYPE_TERMINATION = 5
+    MESSAGE_TYPE_ROUTE_MIRRORING = 6
+
+    # ** Per-peer header **
+    ##
+    PEER_HEADER_LENGTH = 42
+
+    # Peer types
+    PEER_TYPE_GLOBAL = 0
+    PEER_TYPE_RD_INSTANCE = 1
+    PEER_TYPE_LOCAL = 2
+
+    # Peer flags
+    PEER_FLAG_IPV6 = 0x80
+    PEER_FLAG_POST_POLICY = 0x40
+    PEER_FLAG_AS2 = 0x20
+
+    # ** Peer Down reasons **
+    ##
+    PEER_DOWN_LOCAL_NOTIFICATION = 1
+    PEER_DOWN_LOCAL_NO_NOTIFICATION = 2
+    PEER_DOWN_REMOTE_NOTIFICATION = 3
+    PEER_DOWN_REMOTE_NO_NOTIFICATION = 4
+    PEER_DOWN_PEER_DECONFIGURED = 5
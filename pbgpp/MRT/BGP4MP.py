@@ -0,0 +1,76 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import struct
+
+from pbgpp.MRT.Exceptions import MRTRecordError
+from pbgpp.MRT.Information import MRTPeerInformation
+from pbgpp.MRT.Statics import MRTStatics
+
+
+class MRTBGP4MPMessage:
+    # BGP message of a BGP4MP or BGP4MP_ET record (RFC 6396 section 4.4) together with the peering it belongs to
+    PEERS_AS2 = struct.Struct("!HHHH")
+    PEERS_AS4 = struct.Struct("!IIHH")
+
+    def __init__(self, record):
+        try:
+            as4, local, add_path = MRTStatics.BGP4MP_MESSAGE_SUBTYPES[record.subtype]
+        except KeyError:
+            raise MRTRecordError("BGP4MP sub-type " + str(record.subtype) + " does not contain a BGP message")
+
+        body = record.body
+        peers = self.PEERS_AS4 if as4 else self.PEERS_AS2
+
+        if len(body) < peers.size:
+            raise MRTRecordError("BGP4MP record is too short")
+
+        self.peer_as, self.local_as, self.interface_index, self.afi = peers.unpack_from(body)
+
+        if self.afi == MRTStatics.AFI_IPV4:
+            address_length = 4
+        elif self.afi == MRTStatics.AFI_IPV6:
+            address_length = 16
+        else:
+            raise MRTRecordError("BGP4MP record has unknown address family " + str(self.afi))
+
+        position = peers.size
+        self.peer_ip = tuple(bytearray(body[position:position + address_length]))
+        self.local_ip = tuple(bytearray(body[position + address_length:position + 2 * address_length]))
+
+        # The BGP message including its marker
+        self.payload = body[position + 2 * address_length:]
+
+        if len(self.payload) < 19:
+            raise MRTRecordError("BGP4MP record is too short to contain a BGP message")
+
+        self.ts = record.getts()
+        self.as4 = as4
+        self.local = local
+        self.add_path = add_path
+
+    def get_pcap_information(self):
+        # Messages logged as sent by the local system go from the local to the peer address
+        if self.local:
+            return MRTPeerInformation(self.ts, self.local_ip, self.peer_ip, self.local_as, self.peer_as, self.interface_index, self.as4)
+
+        return MRTPeerInformation(self.ts, self.peer_ip, self.local_ip, self.peer_as, self.local_as, self.interface_index, self.as4)
+
+    def __str__(self):
+        return "<MRTBGP4MPMessage peer_as={0} local_as={1} afi={2} local={3} add_path={4}>".format(self.peer_as, self.local_as, self.afi, self.local, self.add_path)
@@ -0,0 +1,40 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pbgpp.PCAP.Information import PCAPInformation, PCAPLayer2Information, PCAPLayer3Information, PCAPLayer4Information
+
+
+class MRTPeerInformation(PCAPInformation):
+    # Synthesised PCAP information of a message read from an MRT file. MRT records contain no link layer
+    # or transport information: MAC addresses are empty and ports are 0. Source and destination are the
+    # sending and the receiving BGP speaker, each with its AS number. as4 tells whether the record sub-type declared
+    # 4-byte AS numbers.
+    def __init__(self, ts, source, destination, source_as, destination_as, interface_index=0, as4=True):
+        PCAPInformation.__init__(self, ts, PCAPLayer2Information(None, None), PCAPLayer3Information(source, destination), PCAPLayer4Information(0, 0))
+
+        self.source_as = source_as
+        self.destination_as = destination_as
+        self.interface_index = interface_index
+        self.as4 = as4
+
+    def get_source_as(self):
+        return self.source_as
+
+    def get_destination_as(self):
+        return self.destination_as
@@ -0,0 +1,123 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import bz2
+import gzip
+import io
+import struct
+import sys
+
+from pbgpp.MRT.Exceptions import MRTReaderError
+from pbgpp.MRT.Statics import MRTStatics
+
+
+class MRTRecord:
+    # A single MRT record. The interface of getts() mimics the Pkthdr objects of pcapy.
+    def __init__(self, ts_sec, ts_usec, type, subtype, body):
+        self.ts_sec = ts_sec
+        self.ts_usec = ts_usec
+        self.type = type
+        self.subtype = subtype
+        self.body = body
+
+    def getts(self):
+        return self.ts_sec, self.ts_usec
+
+    def __str__(self):
+        return "<MRTRecord ts={0}.{1} type={2} subtype={3} length={4}>".format(self.ts_sec, self.ts_usec, self.type, self.subtype, len(self.body))
+
+
+class MRTFileReader:
+    # Reader for MRT files (RFC 6396) as written by route servers, RIPE RIS and RouteViews.
+    # Works on any binary file-like object; use open() to read gzip or bzip2 compressed files transparently.
+    HEADER = struct.Struct("!IHHI")
+    HEADER_LENGTH = 12
+
+    MAGIC_GZIP = b"\x1f\x8b"
+    MAGIC_BZIP2 = b"BZh"
+
+    def __init__(self, handle):
+        self.handle = handle
+
+        # Number of records read so far
+        self.counter = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        record = self.read_record()
+
+        if record is None:
+            raise StopIteration
+
+        return record
+
+    # Python 2 compatibility
+    next = __next__
+
+    @classmethod
+    def open(cls, path):
+        # Opens an MRT file ("-" for stdin) - compressed files are recognized by their magic number, not their name
+        if path == "-":
+            handle = io.BufferedReader(getattr(sys.stdin, "buffer", sys.stdin))
+        else:
+            handle = io.open(path, "rb")
+
+        magic = handle.peek(3)[0:3]
+
+        if magic[0:2] == cls.MAGIC_GZIP:
+            return gzip.GzipFile(fileobj=handle, mode="rb")
+
+        if magic == cls.MAGIC_BZIP2:
+            return bz2.BZ2File(handle, "rb")
+
+        return handle
+
+    def read_record(self):
+        # Returns the next MRTRecord or None at the end of the input
+        try:
+            header = self.handle.read(self.HEADER_LENGTH)
+
+            if not header:
+                return None
+
+            if len(header) < self.HEADER_LENGTH:
+                raise MRTReaderError("input ends within an MRT record header")
+
+            ts_sec, type, subtype, length = self.HEADER.unpack(header)
+            body = self.handle.read(length)
+
+        except (EOFError, IOError, OSError) as e:
+            # Truncated or corrupt compressed input (e.g. an aborted download)
+            raise MRTReaderError("can't read MRT input (" + str(e) + ")")
+
+        if len(body) < length:
+            raise MRTReaderError("input ends within MRT record " + str(self.counter))
+
+        self.counter += 1
+
+        # Extended timestamp records carry the microseconds as first field of the body
+        if type == MRTStatics.TYPE_BGP4MP_ET:
+            if length < 4:
+                raise MRTReaderError("MRT record " + str(self.counter - 1) + " is too short for an extended timestamp")
+
+            return MRTRecord(ts_sec, struct.unpack("!I", body[0:4])[0], type, subtype, body[4:])
+
+        return MRTRecord(ts_sec, 0, type, subtype, body)
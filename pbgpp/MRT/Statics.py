@@ -0,0 +1,85 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+
+class MRTStatics:
+    # ** MRTRecord **
+    # Record types according to RFC 6396 and RFC 8050 (only types pbgpp is able to read)
+    ##
+    TYPE_TABLE_DUMP_V2 = 13
+    TYPE_BGP4MP = 16
+    TYPE_BGP4MP_ET = 17
+
+    # ** BGP4MP sub-types **
+    ##
+    BGP4MP_STATE_CHANGE = 0
+    BGP4MP_MESSAGE = 1
+    BGP4MP_MESSAGE_AS4 = 4
+    BGP4MP_STATE_CHANGE_AS4 = 5
+    BGP4MP_MESSAGE_LOCAL = 6
+    BGP4MP_MESSAGE_AS4_LOCAL = 7
+    BGP4MP_MESSAGE_ADDPATH = 8
+    BGP4MP_MESSAGE_AS4_ADDPATH = 9
+    BGP4MP_MESSAGE_LOCAL_ADDPATH = 10
+    BGP4MP_MESSAGE_AS4_LOCAL_ADDPATH = 11
+
+    # BGP4MP sub-types containing a BGP message mapped to (4-byte ASN, sent by the local system, ADD-PATH)
+    BGP4MP_MESSAGE_SUBTYPES = {
+        BGP4MP_MESSAGE: (False, False, False),
+        BGP4MP_MESSAGE_AS4: (True, False, False),
+        BGP4MP_MESSAGE_LOCAL: (False, True, False),
+        BGP4MP_MESSAGE_AS4_LOCAL: (True, True, False),
+        BGP4MP_MESSAGE_ADDPATH: (False, False, True),
+        BGP4MP_MESSAGE_AS4_ADDPATH: (True, False, True),
+        BGP4MP_MESSAGE_LOCAL_ADDPATH: (False, True, True),
+        BGP4MP_MESSAGE_AS4_LOCAL_ADDPATH: (True, True, True)
+    }
+
+    # ** TABLE_DUMP_V2 sub-types **
+    # According to RFC 6396 and RFC 8050 (ADD-PATH)
+    ##
+    TABLE_DUMP_V2_PEER_INDEX_TABLE = 1
+    TABLE_DUMP_V2_RIB_IPV4_UNICAST = 2
+    TABLE_DUMP_V2_RIB_IPV4_MULTICAST = 3
+    TABLE_DUMP_V2_RIB_IPV6_UNICAST = 4
+    TABLE_DUMP_V2_RIB_IPV6_MULTICAST = 5
+    TABLE_DUMP_V2_RIB_GENERIC = 6
+    TABLE_DUMP_V2_RIB_IPV4_UNICAST_ADDPATH = 8
+    TABLE_DUMP_V2_RIB_IPV4_MULTICAST_ADDPATH = 9
+    TABLE_DUMP_V2_RIB_IPV6_UNICAST_ADDPATH = 10
+    TABLE_DUMP_V2_RIB_IPV6_MULTICAST_ADDPATH = 11
+    TABLE_DUMP_V2_RIB_GENERIC_ADDPATH = 12
+
+    # TABLE_DUMP_V2 sub-types containing unicast RIB entries mapped to (IP version, ADD-PATH)
+    TABLE_DUMP_V2_RIB_SUBTYPES = {
+        TABLE_DUMP_V2_RIB_IPV4_UNICAST: (4, False),
+        TABLE_DUMP_V2_RIB_IPV6_UNICAST: (6, False),
+        TABLE_DUMP_V2_RIB_IPV4_UNICAST_ADDPATH: (4, True),
+        TABLE_DUMP_V2_RIB_IPV6_UNICAST_ADDPATH: (6, True)
+    }
+
+    # Peer type bits of PEER_INDEX_TABLE entries
+    PEER_TYPE_IPV6 = 0x01
+    PEER_TYPE_AS4 = 0x02
+
+    # ** Address families **
+    ##
+    AFI_IPV4 = 1
+    AFI_IPV6 = 2
@@ -0,0 +1,286 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import logging
+import struct
+
+from pbgpp.BGP.Message import BGPMessage
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.BGP.Update.Message import BGPUpdateMessage
+from pbgpp.BGP.Update.Route import BGPRoute, BGPIPv6Route
+from pbgpp.MRT.Exceptions import MRTRecordError
+from pbgpp.MRT.Information import MRTPeerInformation
+from pbgpp.MRT.Statics import MRTStatics
+
+
+class MRTRIBEntry(BGPUpdateMessage):
+    # A single entry of a TABLE_DUMP_V2 RIB record. It's presented as UPDATE message announcing one prefix so that
+    # all filters and formatters work on RIB snapshots. The path attributes are shared by all entries with an
+    # identical attribute blob and must not be modified.
+    shared_path_attributes = True
+
+    def __init__(self, payload, length, pcap_information, route, path_attributes, originated_time, path_id=None, error=False):
+        BGPMessage.__init__(self, payload, length, pcap_information)
+        self.type = BGPStatics.MESSAGE_TYPE_UPDATE
+        self.subtype = BGPStatics.UPDATE_TYPE_ANNOUNCE
+        self.parsed = True
+        self.error = error
+
+        self.path_attributes = path_attributes
+        self.path_attributes_length = len(payload)
+
+        self.withdrawn_routes = []
+        self.withdrawn_routes_length = 0
+
+        self.nlri = [route]
+        self.rov = None
+
+        self.path_id = path_id
+        self.add_path = path_id is not None
+
+        # Time the route was received by the collector (seconds since epoch)
+        self.originated_time = originated_time
+
+    def get_bytes(self):
+        # Returns an UPDATE message announcing the prefix of this entry. IPv6 prefixes are announced in MP_REACH_NLRI,
+        # which is abbreviated to the next hop in RIB entries (RFC 6396 section 4.3.4) and expanded here.
+        route = self.nlri[0]
+        nlri = route.prefix_length + (route.prefix if route.prefix_length_decimal > 0 else b"")
+        path_id = struct.pack("!I", self.path_id) if self.add_path else b""
+
+        if route.version == 4:
+            attributes = self.payload
+            body = struct.pack("!HH", 0, len(attributes)) + attributes + path_id + nlri
+        else:
+            attributes = self.expand_mp_reach_nlri(self.payload, path_id + nlri)
+            body = struct.pack("!HH", 0, len(attributes)) + attributes
+
+        return BGPMessage.MARKER + struct.pack("!HB", 19 + len(body), BGPStatics.MESSAGE_TYPE_UPDATE) + body
+
+    @staticmethod
+    def expand_mp_reach_nlri(attributes, nlri):
+        result = b""
+        position = 0
+        expanded = False
+
+        while position < len(attributes):
+            flags, attribute_type = struct.unpack("!BB", attributes[position:position + 2])
+
+            if flags & 0x10:
+                length = struct.unpack("!H", attributes[position + 2:position + 4])[0]
+                start = position + 4
+            else:
+                length = struct.unpack("!B", attributes[position + 2:position + 3])[0]
+                start = position + 3
+
+            value = attributes[start:start + length]
+            position = start + length
+
+            if attribute_type == BGPStatics.UPDATE_ATTRIBUTE_MP_REACH_NLRI:
+                # AFI IPv6, SAFI unicast, next hop (length and address), reserved byte and NLRI
+                value = struct.pack("!HB", 2, 1) + value + b"\x00" + nlri
+                expanded = True
+
+            if len(value) > 255:
+                result += struct.pack("!BBH", flags | 0x10, attribute_type, len(value)) + value
+            else:
+                result += struct.pack("!BBB", flags & ~0x10, attribute_type, len(value)) + value
+
+        if not expanded:
+            # Entry without next hop
+            value = struct.pack("!HBB", 2, 1, 0) + b"\x00" + nlri
+            result += struct.pack("!BBB", 0x80, BGPStatics.UPDATE_ATTRIBUTE_MP_REACH_NLRI, len(value)) + value
+
+        return result
+
+
+class MRTTableDump:
+    # Decodes the records of a TABLE_DUMP_V2 RIB snapshot (RFC 6396 section 4.3). The PEER_INDEX_TABLE is read once,
+    # RIB entries reference their peer by index. Many prefixes share the same path: attribute blobs are decoded once
+    # using the decoders of UPDATE messages and reused for all entries with identical bytes.
+    PEER_INDEX_HEADER = struct.Struct("!IH")
+    RIB_ENTRY_HEADER = struct.Struct("!HIH")
+    RIB_ENTRY_HEADER_ADDPATH = struct.Struct("!HIIH")
+
+    # Upper bound of distinct attribute blobs kept in memory
+    MAX_CACHED_ATTRIBUTES = 1000000
+
+    def __init__(self, flags=None):
+        self.flags = flags
+
+        # Values that need to be assigned due to parsing of the PEER_INDEX_TABLE
+        self.collector_id = None
+        self.view_name = None
+        self.peers = None
+
+        # Decoded path attributes by attribute blob
+        self.attributes = {}
+
+        # PCAP information per peer index for the timestamp of the current record
+        self.peer_information = {}
+        self.peer_information_ts = None
+
+    def read_peer_index_table(self, record):
+        body = record.body
+
+        try:
+            self.collector_id, view_name_length = self.PEER_INDEX_HEADER.unpack_from(body)
+            position = self.PEER_INDEX_HEADER.size
+            self.view_name = body[position:position + view_name_length].decode("utf-8", "replace")
+            position += view_name_length
+
+            peer_count = struct.unpack_from("!H", body, position)[0]
+            position += 2
+
+            peers = []
+
+            for _ in range(peer_count):
+                peer_type, bgp_id = struct.unpack_from("!BI", body, position)
+                position += 5
+
+                address_length = 16 if peer_type & MRTStatics.PEER_TYPE_IPV6 else 4
+                address = tuple(bytearray(body[position:position + address_length]))
+                position += address_length
+
+                if peer_type & MRTStatics.PEER_TYPE_AS4:
+                    asn = struct.unpack_from("!I", body, position)[0]
+                    position += 4
+                else:
+                    asn = struct.unpack_from("!H", body, position)[0]
+                    position += 2
+
+                if len(address) != address_length:
+                    raise MRTRecordError("PEER_INDEX_TABLE ends within peer entry")
+
+                peers.append((address, asn))
+
+        except struct.error:
+            raise MRTRecordError("PEER_INDEX_TABLE is too short")
+
+        self.peers = peers
+        self.peer_information = {}
+
+    def decode(self, record):
+        # Returns the list of MRTRIBEntry objects of a RIB_IPV4_UNICAST or RIB_IPV6_UNICAST record (with or without ADD-PATH)
+        if self.peers is None:
+            raise MRTRecordError("RIB record without preceding PEER_INDEX_TABLE")
+
+        try:
+            version, add_path = MRTStatics.TABLE_DUMP_V2_RIB_SUBTYPES[record.subtype]
+        except KeyError:
+            raise MRTRecordError("TABLE_DUMP_V2 sub-type " + str(record.subtype) + " does not contain unicast RIB entries")
+
+        if self.peer_information_ts != record.getts():
+            self.peer_information = {}
+            self.peer_information_ts = record.getts()
+
+        plan = None
+        if self.flags is not None and "decodeplan" in self.flags:
+            plan = self.flags["decodeplan"].get_value()
+
+        body = record.body
+        entries = []
+
+        try:
+            # Sequence number (4 bytes) and prefix of all entries
+            prefix_length_bytes = body[4:5]
+            prefix_length = struct.unpack("!B", prefix_length_bytes)[0]
+            position = 5 + (prefix_length + 7) // 8
+            prefix = body[5:position]
+
+            if version == 4:
+                # A default route is represented by its (zero) length byte like in UPDATE messages
+                route = BGPRoute(prefix if prefix_length > 0 else prefix_length_bytes, prefix_length_bytes)
+            else:
+                route = BGPIPv6Route(prefix, prefix_length_bytes)
+
+            # Length of the UPDATE message that would announce an entry
+            message_length = 24 + len(prefix)
+
+            entry_count = struct.unpack_from("!H", body, position)[0]
+            position += 2
+
+            entry_header = self.RIB_ENTRY_HEADER_ADDPATH if add_path else self.RIB_ENTRY_HEADER
+            attributes = self.attributes
+            path_id = None
+
+            for _ in range(entry_count):
+                if add_path:
+                    peer_index, originated_time, path_id, attribute_length = entry_header.unpack_from(body, position)
+                else:
+                    peer_index, originated_time, attribute_length = entry_header.unpack_from(body, position)
+
+                position += entry_header.size
+                blob = body[position:position + attribute_length]
+                position += attribute_length
+
+                if len(blob) != attribute_length:
+                    raise MRTRecordError("RIB record ends within RIB entry")
+
+                decoded = attributes.get(blob)
+
+                if decoded is None:
+                    decoded = self.__decode_attributes(blob, plan)
+
+                entries.append(MRTRIBEntry(blob, message_length + attribute_length, self.__get_peer_information(peer_index),
+                                           route, decoded[0], originated_time, path_id, decoded[1]))
+
+        except struct.error:
+            raise MRTRecordError("RIB record is too short")
+        except MRTRecordError:
+            raise
+        except Exception as e:
+            # Malformed prefixes (see BGPRoute)
+            raise MRTRecordError("can't decode RIB record (" + str(e) + ")")
+
+        return entries
+
+    def __decode_attributes(self, blob, plan):
+        # Returns a tuple of (path attributes, error)
+        attributes = []
+        error = False
+
+        try:
+            BGPUpdateMessage.parse_path_attributes(blob, 0, len(blob), attributes, plan)
+        except Exception as e:
+            # Keep the attributes decoded so far - like UPDATE messages with malformed attributes
+            logging.getLogger("pbgpp.MRTTableDump.__decode_attributes").info("Malformed path attributes in RIB entry: " + str(e))
+            error = True
+
+        if len(self.attributes) >= self.MAX_CACHED_ATTRIBUTES:
+            self.attributes.clear()
+
+        decoded = (attributes, error)
+        self.attributes[blob] = decoded
+        return decoded
+
+    def __get_peer_information(self, peer_index):
+        information = self.peer_information.get(peer_index)
+
+        if information is None:
+            try:
+                address, asn = self.peers[peer_index]
+            except IndexError:
+                raise MRTRecordError("RIB entry references unknown peer index " + str(peer_index))
+
+            # The messages of a RIB snapshot are sent from the peer to the collector (identified by its BGP ID)
+            information = MRTPeerInformation(self.peer_information_ts, address, tuple(bytearray(struct.pack("!I", self.collector_id))), asn, 0, 0)
+            self.peer_information[peer_index] = information
+
+        return information
@@ -17,11 +17,199 @@
 # limitations under the License.
 #
 
+from pbgpp.BGP.Exceptions import BGPPrefixTrieError
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.Output.Exceptions import OutputFilterError
+
 
 class BGPFilter:
     # Define filter types
     FILTER_ERROR = 0
     FILTER_NEXT_HOP = 1
 
+    # Parts of a BGP message that need to be decoded for this filter (see BGPDecodePlan)
+    # None means the filter may need everything - filters that know better override these values
+    REQUIRED_ATTRIBUTES = None
+    REQUIRED_SECTIONS = ["withdrawn_routes", "nlri"]
+    REQUIRED_OPTIONAL_PARAMETERS = None
+
+    # Earliest stage at which a filter is able to decide: on PCAP information, on the BGP header
+    # (length and type only) or on the completely decoded message
+    STAGE_PCAP = 0
+    STAGE_HEADER = 1
+    STAGE_MESSAGE = 2
+    STAGE = STAGE_MESSAGE
+
     def __init__(self, values=[]):
         self.values = values
+
+        # Filter values are compiled once into a set of positive and a set of negated (~) values
+        # Filters convert the values into the type of the compared field (e.g. int for ASN)
+        self.positive = frozenset()
+        self.negated = frozenset()
+
+    def compile(self, convert=str):
+        positive = set()
+        negated = set()
+
+        try:
+            for v in self.values:
+                if v[0:1] == "~":
+                    negated.add(convert(v[1:]))
+                else:
+                    positive.add(convert(v))
+        except (ValueError, TypeError, OSError) as e:
+            raise OutputFilterError("invalid value for " + self.__class__.__name__ + ": " + str(e))
+
+        self.positive = frozenset(positive)
+        self.negated = frozenset(negated)
+
+    def compile_prefixes(self, values, mode=BGPPrefixTrie.MODE_EXACT):
+        # Prefix filters compile their values into radix tries instead of sets (see BGPPrefixTrie)
+        self.prefix_mode = mode
+        self.positive_prefixes = BGPPrefixTrie()
+        self.negated_prefixes = BGPPrefixTrie()
+
+        try:
+            for v in values:
+                if v[0:1] == "~":
+                    self.negated_prefixes.add(v[1:])
+                else:
+                    self.positive_prefixes.add(v)
+
+            self.prefix_values = [v for v in values if v[0:1] != "~"]
+        except BGPPrefixTrieError as e:
+            raise OutputFilterError(e.message)
+
+    def compile_networks(self, values):
+        # IPv4 addresses or networks (e.g. 80.81.192.0/21) compiled into integers and (network, mask) pairs
+        # Single positive addresses are looked up in a set, everything else is compared using the mask
+        hosts = set()
+        positive = []
+        negated = []
+
+        try:
+            for v in values:
+                is_negated = v[0:1] == "~"
+                version, network, length = BGPPrefixTrie.parse_prefix(v[1:] if is_negated else v)
+
+                if version != 4:
+                    raise BGPPrefixTrieError("only IPv4 addresses are supported: '" + v + "'")
+
+                mask = (0xffffffff << (32 - length)) & 0xffffffff
+
+                if is_negated:
+                    negated.append((network, mask))
+                elif length == 32:
+                    hosts.add(network)
+                else:
+                    positive.append((network, mask))
+        except BGPPrefixTrieError as e:
+            raise OutputFilterError(e.message)
+
+        self.positive_hosts = frozenset(hosts)
+        self.positive_networks = tuple(positive)
+        self.negated_networks = tuple(negated)
+
+    def match(self, message):
+        # Returns True if the message (or PCAP information for pre-filters) passes the filter
+        raise NotImplementedError
+
+    def index_keys(self):
+        # Keys of a PCAPRouteIndex of which a record must contain at least one to pass this filter, e.g.
+        # [("prefix", 4, network, length, mode), ("origin", asn)] - None if the filter can't be answered by the index
+        return None
+
+    def prefix_index_keys(self):
+        # index_keys() of filters on announced or withdrawn prefixes - negated values can't be looked up
+        if len(self.negated_prefixes) > 0:
+            return None
+
+        return [("prefix",) + BGPPrefixTrie.parse_prefix(v) + (self.prefix_mode,) for v in self.prefix_values]
+
+    def match_frame(self, ts, frame, offset):
+        # Pre-filters are evaluated on the raw captured frame before PCAP information is built
+        # ts is the capture timestamp (seconds, microseconds), offset is the start of the IPv4 header (see PCAPFrame)
+        raise NotImplementedError
+
+    def apply(self, message):
+        # Returns the message if it passes the filter, otherwise None
+        return message if self.match(message) else None
+
+    def match_value(self, value):
+        # Values of one filter are linked with a logical OR:
+        # a single value matches if it equals a positive value or differs from a negated value
+        if value in self.positive:
+            return True
+
+        for n in self.negated:
+            if n != value:
+                return True
+
+        return False
+
+    def match_any(self, values):
+        # Same as match_value() for a collection of field values (e.g. all ASN of an AS path segment):
+        # matches if one of the positive values is contained or one of the negated values is missing
+        if not self.positive.isdisjoint(values):
+            return True
+
+        for n in self.negated:
+            if n not in values:
+                return True
+
+        return False
+
+    def match_prefix(self, version, network, length):
+        # Same as match_value() for prefixes: a negated value is passed if it doesn't match the prefix
+        if self.positive_prefixes.count(version, network, length, self.prefix_mode) > 0:
+            return True
+
+        return self.negated_prefixes.count(version, network, length, self.prefix_mode) < len(self.negated_prefixes)
+
+    def match_network(self, address):
+        # Same as match_value() for IPv4 addresses given as integer (see compile_networks())
+        if address in self.positive_hosts:
+            return True
+
+        for network, mask in self.positive_networks:
+            if address & mask == network:
+                return True
+
+        for network, mask in self.negated_networks:
+            if address & mask != network:
+                return True
+
+        return False
+
+    @staticmethod
+    def chain(filters):
+        # Fuse a list of filters into a single predicate. Filters are connected with a logical AND.
+        return BGPFilter.chain_predicates([f.match for f in filters])
+
+    @staticmethod
+    def chain_frame(filters):
+        # Same as chain() for pre-filters evaluated on raw frames: predicate(ts, frame, offset)
+        matchers = tuple(f.match_frame for f in filters)
+
+        def predicate(ts, frame, offset):
+            for match in matchers:
+                if not match(ts, frame, offset):
+                    return False
+
+            return True
+
+        return predicate
+
+    @staticmethod
+    def chain_predicates(predicates):
+        matchers = tuple(predicates)
+
+        def predicate(message):
+            for match in matchers:
+                if not match(message):
+                    return False
+
+            return True
+
+        return predicate
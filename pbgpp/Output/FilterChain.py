@@ -0,0 +1,84 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from timeit import default_timer
+
+
+class BGPFilterChain:
+    # AND-chain of filters that measures evaluations, passed messages and the time spent per filter.
+    # In adaptive mode the chain is periodically reordered so that cheap filters that reject many
+    # messages run first. Filters don't depend on each other, so the order never changes the result.
+
+    # Number of evaluations of the chain between two reorderings
+    REORDER_INTERVAL = 1000
+
+    def __init__(self, filters, adaptive=False, method="match"):
+        self.adaptive = adaptive
+        self.counter = 0
+
+        # Statistics per filter: [filter, evaluations, passed, time in seconds, bound match method]
+        # Pre-filters on raw frames are chained using method="match_frame"
+        self.entries = [[f, 0, 0, 0.0, getattr(f, method)] for f in filters]
+        self.order = list(self.entries)
+
+    def __call__(self, *args):
+        self.counter += 1
+
+        if self.adaptive and self.counter % self.REORDER_INTERVAL == 0:
+            self.reorder()
+
+        for entry in self.order:
+            start = default_timer()
+            result = entry[4](*args)
+            entry[3] += default_timer() - start
+            entry[1] += 1
+
+            if not result:
+                return False
+
+            entry[2] += 1
+
+        return True
+
+    @staticmethod
+    def rank(entry):
+        # Average costs per rejected message - the lower, the earlier a filter should run
+        if entry[1] == 0:
+            return 0.0
+
+        cost = entry[3] / entry[1]
+        rejection_rate = 1.0 - float(entry[2]) / entry[1]
+
+        return cost / max(rejection_rate, 0.000001)
+
+    def reorder(self):
+        # The order is replaced instead of sorted in place - an evaluation iterating over the old list isn't affected
+        self.order = sorted(self.order, key=BGPFilterChain.rank)
+
+    def statistics(self):
+        # Returns one line per filter in the current evaluation order
+        lines = []
+
+        for f, evaluations, passed, elapsed, match in self.order:
+            pass_rate = 100.0 * passed / evaluations if evaluations > 0 else 0.0
+            per_evaluation = 1000000.0 * elapsed / evaluations if evaluations > 0 else 0.0
+
+            lines.append("{0:<24} evaluations={1:<10} passed={2:<10} pass_rate={3:6.2f}% time={4:.3f}s ({5:.2f}us/evaluation)".format(
+                f.__class__.__name__, evaluations, passed, pass_rate, elapsed, per_evaluation))
+
+        return lines
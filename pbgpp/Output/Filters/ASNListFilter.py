@@ -0,0 +1,72 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from pbgpp.BGP.Exceptions import BGPIntervalSetError
+from pbgpp.BGP.IntervalSet import BGPASNIntervalSet
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.BGP.Statics import BGPStatics
+
+
+class ASNListFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_AS_PATH]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    def __init__(self, values=[]):
+        BGPFilter.__init__(self, values)
+
+        # Values are paths to ASN list files (one ASN or range per line, e.g. bogon ASNs), ~ negates a file
+        # Like --filter-asn all ASN of the AS path are looked up
+        self.compile(ASNListFilter.load)
+
+    @staticmethod
+    def load(path):
+        try:
+            return BGPASNIntervalSet.from_file(path)
+        except BGPIntervalSetError as e:
+            raise OutputFilterError("invalid ASN list file '" + path + "': " + e.message)
+
+    def match(self, message):
+        try:
+            # AS_PATH is a path attribute of BGP UPDATE message
+            # Therefore we first need to make that we are currently handling an UPDATE message
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
+                # Skip messages that are no UPDATE messages
+                return False
+
+            for attribute in message.path_attributes:
+                # Skip attributes that are no AS_PATH attributes
+                if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_AS_PATH:
+                    continue
+
+                for path_segment in attribute.path_segments:
+                    for asn in path_segment.segments:
+                        for asns in self.positive:
+                            if asns.contains(asn):
+                                return True
+
+                        for asns in self.negated:
+                            if not asns.contains(asn):
+                                return True
+
+            # Searched value was not found
+            return False
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
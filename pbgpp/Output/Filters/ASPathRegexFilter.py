@@ -0,0 +1,106 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.BGP.Statics import BGPStatics
+
+
+class ASPathRegexFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_AS_PATH]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    # Cisco/Juniper style underscore: matches the start or end of the AS path, a space or AS_SET brackets
+    UNDERSCORE = "(?:^|$|[ ,{}()])"
+
+    # Maximum number of distinct AS paths of which the result is remembered
+    CACHE_SIZE = 65536
+
+    def __init__(self, values=[]):
+        BGPFilter.__init__(self, values)
+
+        # Expressions are compiled once. They are searched in the AS path as displayed by pbgpp
+        # (e.g. "174 6939 (64512 64513)"), e.g. _6939_, ^174 (.*) 3356$ or _(65000)_\1_ (prepending)
+        self.expressions = []
+        self.negated_expressions = []
+
+        for v in values:
+            if v[0:1] == "~":
+                self.negated_expressions.append(self.compile_expression(v[1:]))
+            else:
+                self.expressions.append(self.compile_expression(v))
+
+        # Result of all expressions per AS path - AS paths are keyed by their raw attribute payload,
+        # so repeated AS paths neither need to be displayed nor searched again
+        self.cache = {}
+
+    @staticmethod
+    def compile_expression(expression):
+        # Replace each unescaped underscore by its regular expression counterpart
+        translated = re.sub(r"(?<!\\)_", lambda m: ASPathRegexFilter.UNDERSCORE, expression)
+
+        try:
+            return re.compile(translated)
+        except re.error as e:
+            raise OutputFilterError("invalid AS path regular expression '" + expression + "': " + str(e))
+
+    def match_path(self, path):
+        for expression in self.expressions:
+            if expression.search(path) is not None:
+                return True
+
+        # Negative filtering using ~ character
+        for expression in self.negated_expressions:
+            if expression.search(path) is None:
+                return True
+
+        return False
+
+    def match(self, message):
+        try:
+            # AS_PATH is a path attribute of BGP UPDATE message
+            # Therefore we first need to make that we are currently handling an UPDATE message
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
+                # Skip messages that are no UPDATE messages
+                return False
+
+            for attribute in message.path_attributes:
+                # Skip attributes that are no AS_PATH attributes
+                if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_AS_PATH:
+                    continue
+
+                key = attribute.payload
+                result = self.cache.get(key)
+
+                if result is None:
+                    if len(self.cache) >= self.CACHE_SIZE:
+                        self.cache.clear()
+
+                    result = self.match_path(str(attribute))
+                    self.cache[key] = result
+
+                return result
+
+            # Message does not contain an AS_PATH attribute
+            return False
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
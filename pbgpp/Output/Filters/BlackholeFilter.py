@@ -18,6 +18,7 @@
 #
 
 from pbgpp.BGP.Update.Route import BGPRoute
+from pbgpp.Output.Exceptions import OutputFilterError
 from pbgpp.Output.Filter import BGPFilter
 from pbgpp.BGP.Statics import BGPStatics
 
@@ -27,34 +28,45 @@ from pbgpp.BGP.Statics import BGPStatics
 #   * The preferred method is to set a well-known BGP Community value (RFC 7999).
 # The code for this filter is a combination of CommunityValueFilter and NextHopFilter.
 class BlackholeFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP, BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    # RFC 7999 well-known BLACKHOLE community (65535:666)
+    BLACKHOLE_COMMUNITY_ASN = 65535
+    BLACKHOLE_COMMUNITY_VALUE = 666
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
 
-    def apply(self, message):
+        # Blackhole next hops are compiled into a set of decimal IP addresses
+        try:
+            self.next_hops = frozenset(BGPRoute.string_ip_to_decimal(v) for v in values)
+        except (ValueError, TypeError, OSError) as e:
+            raise OutputFilterError("invalid value for " + self.__class__.__name__ + ": " + str(e))
+
+    def match(self, message):
         try:
             # NEXT_HOP and COMMUNITIES are attributes of a BGP UPDATE message
-            if message.type is not BGPStatics.MESSAGE_TYPE_UPDATE:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
                 # Skip messages that are no UPDATE messages
-                return None
+                return False
 
             for attribute in message.path_attributes:
-                # Skip attributes that are no NEXT_HOP attributes
-                if attribute.type is BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP:
+                if attribute.type == BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP:
                     # Here we found the NEXT_HOP attribute - check for blackhole next_hop
-                    for value in self.values:
-                        if str(BGPRoute.decimal_ip_to_string(attribute.next_hop)) == str(value):
-                            # Match on NEXT_HOP attribute - Return message
-                            return message
+                    if attribute.next_hop in self.next_hops:
+                        return True
 
                 # Alternatively check if well-known BGP community is set (RFC 7999)
-                if attribute.type is BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES:
+                if attribute.type == BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES:
 
                     for community in attribute.communities:
-                        if community.asn == 65535 and community.value == 666:
-                          return message
+                        if community.asn == self.BLACKHOLE_COMMUNITY_ASN and community.value == self.BLACKHOLE_COMMUNITY_VALUE:
+                            return True
 
             # Searched value was not found
-            return None
+            return False
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
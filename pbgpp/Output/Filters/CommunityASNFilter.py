@@ -17,43 +17,37 @@
 # limitations under the License.
 #
 
-from pbgpp.BGP.Update.Route import BGPRoute
 from pbgpp.Output.Filter import BGPFilter
 from pbgpp.BGP.Statics import BGPStatics
 
 
 class CommunityASNFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
+        self.compile(int)
 
-    def apply(self, message):
+    def match(self, message):
         try:
-            # NEXT_HOP is a path attribute of BGP UPDATE message
+            # COMMUNITIES is a path attribute of BGP UPDATE message
             # Therefore we first need to make that we are currently handling an UPDATE message
-            if message.type is not BGPStatics.MESSAGE_TYPE_UPDATE:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
                 # Skip messages that are no UPDATE messages
-                return None
+                return False
 
             for attribute in message.path_attributes:
-                # Skip attributes that are no NEXT_HOP attributes
-                if attribute.type is not BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES:
+                # Skip attributes that are no COMMUNITIES attributes
+                if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES:
                     continue
 
-                communities = []
-
-                for community in attribute.communities:
-                    communities.append(str(community.asn))
-
-                for value in self.values:
-                    if value in communities:
-                        return message
-
-                    # Negative filtering using ~ character
-                    if value[0:1] == "~" and value[1:] not in communities:
-                        return message
+                if self.match_any(set(community.asn for community in attribute.communities)):
+                    return True
 
             # Searched value was not found
-            return None
+            return False
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
@@ -0,0 +1,63 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.BGP.Statics import BGPStatics
+
+
+class CommunityFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    def __init__(self, values=[]):
+        BGPFilter.__init__(self, values)
+        self.compile(CommunityFilter.community_from_string)
+
+    @staticmethod
+    def community_from_string(value):
+        # Communities are given as ASN:VALUE (e.g. 65535:666) and compiled into tuples of integers
+        parts = value.split(":")
+
+        if len(parts) != 2:
+            raise OutputFilterError("community filter value '" + value + "' must consist of two parts (e.g. 65535:666)")
+
+        return int(parts[0]), int(parts[1])
+
+    def match(self, message):
+        try:
+            # COMMUNITIES is a path attribute of BGP UPDATE message
+            # Therefore we first need to make that we are currently handling an UPDATE message
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
+                # Skip messages that are no UPDATE messages
+                return False
+
+            for attribute in message.path_attributes:
+                # Skip attributes that are no COMMUNITIES attributes
+                if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES:
+                    continue
+
+                if self.match_any(set((community.asn, community.value) for community in attribute.communities)):
+                    return True
+
+            # Searched value was not found
+            return False
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
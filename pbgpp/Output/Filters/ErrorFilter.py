@@ -24,16 +24,11 @@ class ErrorFilter(BGPFilter):
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
 
-    def apply(self, message):
+    def match(self, message):
         try:
             # Do not display messages that are containing an parsing error
             # @todo Also check attributes, capabilities, etc. for errors - not just the basis class
-            if not message.error:
-                return message
-            else:
-                return None
+            return not message.error
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
-
-
+            return False
@@ -0,0 +1,355 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.Output.Filters.ASNFilter import ASNFilter
+from pbgpp.Output.Filters.ASNListFilter import ASNListFilter
+from pbgpp.Output.Filters.ASPathRegexFilter import ASPathRegexFilter
+from pbgpp.Output.Filters.BlackholeFilter import BlackholeFilter
+from pbgpp.Output.Filters.CommunityASNFilter import CommunityASNFilter
+from pbgpp.Output.Filters.CommunityFilter import CommunityFilter
+from pbgpp.Output.Filters.CommunityValueFilter import CommunityValueFilter
+from pbgpp.Output.Filters.IPDestinationFilter import IPDestinationFilter
+from pbgpp.Output.Filters.IPSourceFilter import IPSourceFilter
+from pbgpp.Output.Filters.LargeCommunityFilter import LargeCommunityFilter
+from pbgpp.Output.Filters.LastASNFilter import LastASNFilter
+from pbgpp.Output.Filters.MACDestinationFilter import MACDestinationFilter
+from pbgpp.Output.Filters.MACSourceFilter import MACSourceFilter
+from pbgpp.Output.Filters.MessageSizeFilter import MessageSizeFilter
+from pbgpp.Output.Filters.MessageSubTypeFilter import MessageSubTypeFilter
+from pbgpp.Output.Filters.MessageTypeFilter import MessageTypeFilter
+from pbgpp.Output.Filters.NextHopFilter import NextHopFilter
+from pbgpp.Output.Filters.NLRIFilter import NLRIFilter
+from pbgpp.Output.Filters.PrefixFileFilter import PrefixFileFilter
+from pbgpp.Output.Filters.PrefixListFilter import PrefixListFilter
+from pbgpp.Output.Filters.ROVFilter import ROVFilter
+from pbgpp.Output.Filters.TimestampFilter import TimestampFilter
+from pbgpp.Output.Filters.TimestampRangeFilter import TimestampRangeFilter
+from pbgpp.Output.Filters.WithdrawnFilter import WithdrawnFilter
+
+
+class ExpressionFilter(BGPFilter):
+    # Boolean filter expressions, e.g. (community 65535:666 or next-hop 80.81.193.66) and not peer 10.0.0.1
+    #
+    # expression := term ("or" term)*
+    # term       := factor ("and" factor)*
+    # factor     := "not" factor | "(" expression ")" | predicate value
+    #
+    # Each predicate is one of the existing filters with a single value (named like the command line
+    # filters without --filter-). Values containing spaces or brackets can be quoted.
+    # The expression is parsed once into a tree of nodes and compiled into a single closure:
+    #   ("filter", BGPFilter), ("not", node), ("and", [nodes]), ("or", [nodes])
+
+    PREDICATES = {
+        "timestamp": TimestampFilter,
+        "time-range": TimestampRangeFilter,
+        "message-size": MessageSizeFilter,
+        "size": MessageSizeFilter,
+        "message-type": MessageTypeFilter,
+        "type": MessageTypeFilter,
+        "message-subtype": MessageSubTypeFilter,
+        "subtype": MessageSubTypeFilter,
+        "nlri": NLRIFilter,
+        "withdrawn": WithdrawnFilter,
+        "prefix-file": PrefixFileFilter,
+        "prefix-list-file": PrefixListFilter,
+        "next-hop": NextHopFilter,
+        "as": ASNFilter,
+        "last-as": LastASNFilter,
+        "asn-list-file": ASNListFilter,
+        "as-path-regex": ASPathRegexFilter,
+        "community": CommunityFilter,
+        "community-as": CommunityASNFilter,
+        "community-value": CommunityValueFilter,
+        "large-community": LargeCommunityFilter,
+        "blackhole": BlackholeFilter,
+        "rov": ROVFilter,
+        "source-ip": IPSourceFilter,
+        "destination-ip": IPDestinationFilter,
+        "source-mac": MACSourceFilter,
+        "destination-mac": MACDestinationFilter
+    }
+
+    # Predicates that are expanded into several filters
+    # peer matches messages that were either sent by or sent to the given IP address
+    ALIASES = {
+        "peer": ("or", ["source-ip", "destination-ip"])
+    }
+
+    TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|\'([^\']*)\'|([^\s()]+))')
+
+    def __init__(self, values=[], mode=BGPPrefixTrie.MODE_EXACT):
+        BGPFilter.__init__(self, values)
+        self.prefix_mode = mode
+
+        # Several expressions are linked with a logical OR - like all other filter values
+        self.filters = []
+        trees = [self.parse(v) for v in values]
+        self.tree = trees[0] if len(trees) == 1 else ("or", trees)
+
+        self.STAGE = self.node_stage(self.tree)
+        self.__require()
+
+        self.predicate = self.compile_tree(BGPFilter.STAGE_MESSAGE)
+
+    def __require(self):
+        # A decode plan must include everything any of the contained filters requires (see BGPDecodePlan)
+        attributes = set()
+        sections = set()
+        optional_parameters = set()
+
+        for f in self.filters:
+            if attributes is not None:
+                attributes = None if f.REQUIRED_ATTRIBUTES is None else attributes | set(f.REQUIRED_ATTRIBUTES)
+
+            if optional_parameters is not None:
+                optional_parameters = None if f.REQUIRED_OPTIONAL_PARAMETERS is None else optional_parameters | set(f.REQUIRED_OPTIONAL_PARAMETERS)
+
+            sections |= set(f.REQUIRED_SECTIONS)
+
+        self.REQUIRED_ATTRIBUTES = None if attributes is None else list(attributes)
+        self.REQUIRED_SECTIONS = list(sections)
+        self.REQUIRED_OPTIONAL_PARAMETERS = None if optional_parameters is None else list(optional_parameters)
+
+    @staticmethod
+    def tokenize(expression):
+        tokens = []
+        position = 0
+        expression = expression.strip()
+
+        while position < len(expression):
+            m = ExpressionFilter.TOKEN_PATTERN.match(expression, position)
+
+            if m is None:
+                raise OutputFilterError("could not parse filter expression '" + expression + "' at position " + str(position))
+
+            if m.group(1) is not None or m.group(2) is not None:
+                # Brackets are tuples to be distinguishable from values
+                tokens.append((m.group(1) or m.group(2),))
+            else:
+                tokens.append(next(g for g in m.group(3, 4, 5) if g is not None))
+
+            position = m.end()
+
+        return tokens
+
+    def parse(self, expression):
+        self.__tokens = self.tokenize(expression)
+        self.__position = 0
+
+        if len(self.__tokens) == 0:
+            raise OutputFilterError("filter expression must not be empty")
+
+        tree = self.__parse_expression()
+
+        if self.__position != len(self.__tokens):
+            raise OutputFilterError("unexpected '" + self.__token_string(self.__position) + "' in filter expression '" + expression + "'")
+
+        return tree
+
+    def __token_string(self, position):
+        if position >= len(self.__tokens):
+            return "end of expression"
+
+        token = self.__tokens[position]
+        return token[0] if isinstance(token, tuple) else token
+
+    def __peek_keyword(self, keyword):
+        if self.__position >= len(self.__tokens):
+            return False
+
+        token = self.__tokens[self.__position]
+        return not isinstance(token, tuple) and token.lower() == keyword
+
+    def __parse_expression(self):
+        nodes = [self.__parse_term()]
+
+        while self.__peek_keyword("or"):
+            self.__position += 1
+            nodes.append(self.__parse_term())
+
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def __parse_term(self):
+        nodes = [self.__parse_factor()]
+
+        while self.__peek_keyword("and"):
+            self.__position += 1
+            nodes.append(self.__parse_factor())
+
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def __parse_factor(self):
+        if self.__position >= len(self.__tokens):
+            raise OutputFilterError("unexpected end of filter expression")
+
+        token = self.__tokens[self.__position]
+
+        if self.__peek_keyword("not"):
+            self.__position += 1
+            return "not", self.__parse_factor()
+
+        if token == ("(",):
+            self.__position += 1
+            node = self.__parse_expression()
+
+            if self.__position >= len(self.__tokens) or self.__tokens[self.__position] != (")",):
+                raise OutputFilterError("missing closing bracket in filter expression")
+
+            self.__position += 1
+            return node
+
+        if isinstance(token, tuple) or self.__position + 1 >= len(self.__tokens) or isinstance(self.__tokens[self.__position + 1], tuple):
+            raise OutputFilterError("expected predicate and value instead of '" + self.__token_string(self.__position) + "'")
+
+        name = token.lower()
+        value = self.__tokens[self.__position + 1]
+        self.__position += 2
+
+        if name in self.ALIASES:
+            operator, names = self.ALIASES[name]
+            return operator, [self.__predicate(n, value) for n in names]
+
+        return self.__predicate(name, value)
+
+    def __predicate(self, name, value):
+        if name not in self.PREDICATES:
+            raise OutputFilterError("unknown predicate '" + name + "' in filter expression")
+
+        filter_class = self.PREDICATES[name]
+
+        if filter_class is MACSourceFilter or filter_class is MACDestinationFilter:
+            f = filter_class(MACSourceFilter.clear_input([value]))
+        elif filter_class in (NLRIFilter, WithdrawnFilter, PrefixFileFilter):
+            f = filter_class([value], self.prefix_mode)
+        else:
+            f = filter_class([value])
+
+        self.filters.append(f)
+        return "filter", f
+
+    def contains(self, filter_class):
+        for f in self.filters:
+            if isinstance(f, filter_class):
+                return True
+
+        return False
+
+    @staticmethod
+    def node_stage(node):
+        # A node is only decidable at the stage of its latest filter
+        if node[0] == "filter":
+            return node[1].STAGE
+
+        if node[0] == "not":
+            return ExpressionFilter.node_stage(node[1])
+
+        return max(ExpressionFilter.node_stage(n) for n in node[1])
+
+    def compile_tree(self, stage):
+        # Returns a closure evaluating the expression at the given stage or None if nothing is decidable.
+        # The closure returns True, False or None if the result depends on filters of a later stage.
+        return self.__compile(self.tree, stage)
+
+    def __compile(self, node, stage):
+        if node[0] == "filter":
+            f = node[1]
+
+            if f.STAGE > stage:
+                return None
+
+            if f.STAGE == BGPFilter.STAGE_PCAP and stage != BGPFilter.STAGE_PCAP:
+                # Pre-parsing filters are applied on the PCAP information of a message
+                pcap_match = f.match
+                return lambda message: pcap_match(message.pcap_information)
+
+            return f.match
+
+        if node[0] == "not":
+            child = self.__compile(node[1], stage)
+
+            if child is None:
+                return None
+
+            def negation(message):
+                result = child(message)
+                return None if result is None else not result
+
+            return negation
+
+        # Cheapest checks first: nodes that are decidable on an earlier stage are evaluated first
+        nodes = sorted(node[1], key=self.node_stage)
+        children = [c for c in (self.__compile(n, stage) for n in nodes) if c is not None]
+
+        if len(children) == 0:
+            return None
+
+        # If some operands are not decidable at this stage, the result is unknown unless the known operands decide
+        undecided = None if len(children) < len(nodes) else True
+
+        if node[0] == "and":
+            def conjunction(message):
+                result = undecided
+
+                for c in children:
+                    r = c(message)
+
+                    if r is None:
+                        result = None
+                    elif not r:
+                        return False
+
+                return result
+
+            return conjunction
+
+        def disjunction(message):
+            result = None if undecided is None else False
+
+            for c in children:
+                r = c(message)
+
+                if r is None:
+                    result = None
+                elif r:
+                    return True
+
+            return result
+
+        return disjunction
+
+    def pushdown(self, stage):
+        # Returns a predicate for an earlier stage that only returns False if the expression can't match anymore
+        # or None if there's nothing to decide at that stage
+        predicate = self.compile_tree(stage)
+
+        if predicate is None:
+            return None
+
+        return lambda obj: predicate(obj) is not False
+
+    def match(self, message):
+        try:
+            return self.predicate(message) is True
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
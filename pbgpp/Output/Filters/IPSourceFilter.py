@@ -17,29 +17,46 @@
 # limitations under the License.
 #
 
+from pbgpp.PCAP.Frame import PCAPFrame
+from pbgpp.PCAP.Information import PCAPLayer3Information
 from pbgpp.Output.Filter import BGPFilter
 
 
 class IPSourceFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_PCAP
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
 
+        # Values are IPv4 addresses or networks in CIDR notation (e.g. 80.81.192.0/21)
+        self.compile_networks(values)
+
     def apply(self, pcap_information):
         # !!! Attention: This is a pre-parsing filter!
         # This filter must be applied BEFORE parsing, otherwise it will unnecessarily slow down
         # the whole application. BGP messages don't have to be parsed when applying that filter
         # directly after reading PCAP packet header
+        return self.match(pcap_information)
 
+    def match(self, pcap_information):
         try:
-            for v in self.values:
-                if pcap_information.get_ip().get_source_string() == v:
-                    return True
+            address = pcap_information.ip.source
 
-                if v[0:1] == "~" and pcap_information.get_ip().get_source_string() != v[1:]:
-                    return True
+            if len(address) != 4:
+                # IPv6 peers (MRT input) never equal an IPv4 value - only negated values are passed
+                return len(self.negated_networks) > 0
 
-            # Searched value was not found
-            return False
+            return self.match_network(PCAPLayer3Information.tuple_to_int(address))
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
             return False
+
+    def match_frame(self, ts, frame, offset):
+        try:
+            return self.match_network(PCAPFrame.unpack_address(frame, offset + PCAPFrame.OFFSET_IP_SOURCE)[0])
+        except Exception as e:
+            # On error the filtering was not successful (e.g. truncated frame)
+            return False
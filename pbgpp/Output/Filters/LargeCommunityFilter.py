@@ -17,58 +17,86 @@
 # limitations under the License.
 #
 
+from pbgpp.Output.Exceptions import OutputFilterError
 from pbgpp.Output.Filter import BGPFilter
 from pbgpp.BGP.Statics import BGPStatics
 
 
 class LargeCommunityFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_LARGE_COMMUNITIES]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
 
-    def apply(self, message):
+        # Values without wildcards are compiled into sets of (global administrator, local data 1, local data 2)
+        # tuples. Values containing wildcards are compiled into patterns with None for each wildcard part.
+        self.patterns = []
+        self.negated_patterns = []
+
+        positive = set()
+        negated = set()
+
+        for value in values:
+            is_negated = value[0:1] == "~"
+            pattern = LargeCommunityFilter.parse_pattern(value[1:] if is_negated else value)
+
+            if None in pattern:
+                (self.negated_patterns if is_negated else self.patterns).append(pattern)
+            else:
+                (negated if is_negated else positive).add(pattern)
+
+        self.positive = frozenset(positive)
+        self.negated = frozenset(negated)
+
+    @staticmethod
+    def parse_pattern(value):
+        parts = value.split(":")
+
+        if len(parts) != 3:
+            raise OutputFilterError("large community filter value '" + value + "' must consist of three parts (e.g. 11:22:33)")
+
+        return tuple(None if p == "*" else int(p) for p in parts)
+
+    @staticmethod
+    def match_pattern(pattern, community):
+        for part_idx in range(0, 3):
+            if pattern[part_idx] is not None and pattern[part_idx] != community[part_idx]:
+                return False
+
+        return True
+
+    def match(self, message):
         try:
             # LARGE_COMMUNITIES is a path attribute of BGP UPDATE message
             # Therefore we first need to make that we are currently handling an UPDATE message
-            if message.type is not BGPStatics.MESSAGE_TYPE_UPDATE:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
                 # Skip messages that are no UPDATE messages
-                return None
+                return False
 
             for attribute in message.path_attributes:
                 # Skip attributes that are no LARGE_COMMUNITIES attributes
-                if attribute.type is not BGPStatics.UPDATE_ATTRIBUTE_LARGE_COMMUNITIES:
+                if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_LARGE_COMMUNITIES:
                     continue
 
                 for community in attribute.large_communities:
+                    community_parts = (community.global_administrator, community.local_data_part_1, community.local_data_part_2)
 
-                    community_parts = str(community).split(":")
-
-                    # Here we found the LARGE_COMMUNITIES attribute - loop through allowed values
-                    for value in self.values:
-                        negated = False
-                        if value[0:1] == "~":
-                            negated = True
-                            value = value[1:]
-
-                        match = True
-
-                        value_parts = value.split(":")
-
-                        for part_idx in range(0, 3):
-                            if value_parts[part_idx] == "*":
-                                continue
-                            if community_parts[part_idx] != value_parts[part_idx]:
-                                match = False
-                                break
+                    # Here we found the LARGE_COMMUNITIES attribute - check the compiled values
+                    if self.match_value(community_parts):
+                        return True
 
-                        if not negated and match:
-                            # Match on LARGE_COMMUNITY attribute - Return message
-                            return message
+                    for pattern in self.patterns:
+                        if self.match_pattern(pattern, community_parts):
+                            return True
 
-                        if negated and not match:
-                            return message
+                    for pattern in self.negated_patterns:
+                        if not self.match_pattern(pattern, community_parts):
+                            return True
 
             # Searched value was not found
-            return None
+            return False
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
@@ -23,34 +23,40 @@ from pbgpp.BGP.Statics import BGPStatics
 
 # @todo Verify functionality
 class LastASNFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_AS_PATH]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
+        self.compile(int)
+
+    def index_keys(self):
+        # Origin AS lookups in a PCAPRouteIndex
+        if len(self.negated) > 0:
+            return None
+
+        return [("origin", asn) for asn in self.positive]
 
-    def apply(self, message):
+    def match(self, message):
         try:
             # AS_PATH is a path attribute of BGP UPDATE message
             # Therefore we first need to make that we are currently handling an UPDATE message
-            if message.type is not BGPStatics.MESSAGE_TYPE_UPDATE:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
                 # Skip messages that are no UPDATE messages
-                return None
+                return False
 
             for attribute in message.path_attributes:
-                # Skip attributes that are no NEXT_HOP attributes
-                if attribute.type is not BGPStatics.UPDATE_ATTRIBUTE_AS_PATH:
+                # Skip attributes that are no AS_PATH attributes
+                if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_AS_PATH:
                     continue
 
                 for path_segment in attribute.path_segments:
-                    segment_asn = path_segment.segments[-1:]
-                    for value in self.values:
-                        if str(segment_asn[0]) == str(value):
-                            return message
-
-                        # Negative filtering using ~ character
-                        if value[0:1] == "~" and (str(segment_asn[0]) != str(value[1:])):
-                            return message
+                    if self.match_value(path_segment.segments[-1]):
+                        return True
 
             # Searched value was not found
-            return None
+            return False
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
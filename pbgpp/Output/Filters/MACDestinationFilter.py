@@ -17,33 +17,47 @@
 # limitations under the License.
 #
 
+from binascii import unhexlify
+
+
 from pbgpp.Output.Filter import BGPFilter
+from pbgpp.PCAP.Frame import PCAPFrame
 
 
 class MACDestinationFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_PCAP
+
+    EMPTY_MAC = b"\x00" * 6
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
+        self.compile(unhexlify)
 
     def apply(self, pcap_information):
         # !!! Attention: This is a pre-parsing filter!
         # This filter must be applied BEFORE parsing, otherwise it will unnecessarily slow down
         # the whole application. BGP messages don't have to be parsed when applying that filter
         # directly after reading PCAP packet header
+        return self.match(pcap_information)
 
+    def match(self, pcap_information):
         try:
-            for v in self.values:
-                if pcap_information.get_mac().get_destination_string() == v:
-                    return True
-
-                if v[0:1] == "~" and pcap_information.get_mac().get_destination_string() != v[1:]:
-                    return True
-
-            # Searched value was not found
-            return False
+            # Linux cooked captures don't contain a destination MAC address
+            destination = pcap_information.mac.destination
+            return self.match_value(destination if destination is not None else self.EMPTY_MAC)
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
             return False
 
+    def match_frame(self, ts, frame, offset):
+        if offset != PCAPFrame.OFFSET_ETHERNET:
+            return self.match_value(self.EMPTY_MAC)
+
+        return self.match_value(frame[PCAPFrame.OFFSET_MAC_DESTINATION:PCAPFrame.OFFSET_MAC_DESTINATION + 6])
+
     @staticmethod
     def clear_input(values):
         return_values = list()
@@ -17,33 +17,41 @@
 # limitations under the License.
 #
 
+from binascii import unhexlify
+
+
 from pbgpp.Output.Filter import BGPFilter
+from pbgpp.PCAP.Frame import PCAPFrame
 
 
 class MACSourceFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_PCAP
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
+        self.compile(unhexlify)
 
     def apply(self, pcap_information):
         # !!! Attention: This is a pre-parsing filter!
         # This filter must be applied BEFORE parsing, otherwise it will unnecessarily slow down
         # the whole application. BGP messages don't have to be parsed when applying that filter
         # directly after reading PCAP packet header
+        return self.match(pcap_information)
 
+    def match(self, pcap_information):
         try:
-            for v in self.values:
-                if pcap_information.get_mac().get_source_string() == v:
-                    return True
-
-                if v[0:1] == "~" and pcap_information.get_mac().get_source_string() != v[1:]:
-                    return True
-
-            # Searched value was not found
-            return False
+            return self.match_value(pcap_information.mac.source)
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
             return False
 
+    def match_frame(self, ts, frame, offset):
+        # Source MAC address is located at the same offset in Ethernet and Linux cooked capture frames
+        return self.match_value(frame[PCAPFrame.OFFSET_MAC_SOURCE:PCAPFrame.OFFSET_MAC_SOURCE + 6])
+
     @staticmethod
     def clear_input(values):
         return_values = list()
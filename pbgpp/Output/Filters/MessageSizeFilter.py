@@ -22,20 +22,18 @@ from pbgpp.Output.Filter import BGPFilter
 
 
 class MessageSizeFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_HEADER
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
+        self.compile(int)
 
-    def apply(self, message):
+    def match(self, message):
         try:
-            for v in self.values:
-                if int(message.length) == int(v):
-                    return message
-
-                if v[0:1] == "~" and (int(v[1:]) != int(message.length)):
-                    return message
-
-            # Searched value was not found
-            return None
+            return self.match_value(message.length)
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
@@ -18,46 +18,41 @@
 #
 
 from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.Output.Exceptions import OutputFilterError
 from pbgpp.Output.Filter import BGPFilter
 
 
 class MessageSubTypeFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_HEADER
+
+    SUBTYPES = {
+        "WITHDRAWAL": BGPStatics.UPDATE_TYPE_WITHDRAWAL,
+        "ANNOUNCE": BGPStatics.UPDATE_TYPE_ANNOUNCE,
+        "BOTH": BGPStatics.UPDATE_TYPE_BOTH,
+        "NONE": BGPStatics.UPDATE_TYPE_NONE
+    }
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
+        self.compile(MessageSubTypeFilter.subtype_from_string)
+
+    @staticmethod
+    def subtype_from_string(value):
+        if value not in MessageSubTypeFilter.SUBTYPES:
+            raise OutputFilterError("unknown message sub type '" + value + "'")
 
-    def apply(self, message):
+        return MessageSubTypeFilter.SUBTYPES[value]
+
+    def match(self, message):
         try:
-            if message.type is not BGPStatics.MESSAGE_TYPE_UPDATE:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
                 # Skip messages that are no UPDATE messages
-                return None
-
-            for value in self.values:
-                negated = False
-
-                if value[0:1] == "~":
-                    negated = True
-                    value = value[1:]
-
-                if value == "WITHDRAWAL":
-                    check_value = BGPStatics.UPDATE_TYPE_WITHDRAWAL
-                elif value == "ANNOUNCE":
-                    check_value = BGPStatics.UPDATE_TYPE_ANNOUNCE
-                elif value == "BOTH":
-                    check_value = BGPStatics.UPDATE_TYPE_BOTH
-                elif value == "NONE":
-                    check_value = BGPStatics.UPDATE_TYPE_NONE
-                else:
-                    return None
-
-                if not negated and message.subtype == check_value:
-                    # Match on message type
-                    return message
-
-                if negated and message.subtype != check_value:
-                    return message
-
-            # Searched value was not found
-            return None
+                return False
+
+            return self.match_value(message.subtype)
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
@@ -18,46 +18,46 @@
 #
 
 from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.Output.Exceptions import OutputFilterError
 from pbgpp.Output.Filter import BGPFilter
 
 
 class MessageTypeFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_HEADER
+
+    TYPES = {
+        "RESERVED": BGPStatics.MESSAGE_TYPE_RESERVED,
+        "0": BGPStatics.MESSAGE_TYPE_RESERVED,
+        "OPEN": BGPStatics.MESSAGE_TYPE_OPEN,
+        "1": BGPStatics.MESSAGE_TYPE_OPEN,
+        "UPDATE": BGPStatics.MESSAGE_TYPE_UPDATE,
+        "2": BGPStatics.MESSAGE_TYPE_UPDATE,
+        "NOTIFICATION": BGPStatics.MESSAGE_TYPE_NOTIFICATION,
+        "3": BGPStatics.MESSAGE_TYPE_NOTIFICATION,
+        "KEEPALIVE": BGPStatics.MESSAGE_TYPE_KEEPALIVE,
+        "4": BGPStatics.MESSAGE_TYPE_KEEPALIVE,
+        "ROUTE-REFRESH": BGPStatics.MESSAGE_TYPE_ROUTE_REFRESH,
+        "ROUTEREFRESH": BGPStatics.MESSAGE_TYPE_ROUTE_REFRESH,
+        "5": BGPStatics.MESSAGE_TYPE_ROUTE_REFRESH
+    }
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
+        self.compile(MessageTypeFilter.type_from_string)
+
+    @staticmethod
+    def type_from_string(value):
+        if value not in MessageTypeFilter.TYPES:
+            raise OutputFilterError("unknown message type '" + value + "'")
+
+        return MessageTypeFilter.TYPES[value]
 
-    def apply(self, message):
+    def match(self, message):
         try:
-            for value in self.values:
-                negated = False
-
-                if value[0:1] == "~":
-                    negated = True
-                    value = value[1:]
-
-                if value == "RESERVED" or value == "0":
-                    check_value = BGPStatics.MESSAGE_TYPE_RESERVED
-                elif value == "OPEN" or value == "1":
-                    check_value = BGPStatics.MESSAGE_TYPE_OPEN
-                elif value == "UPDATE" or value == "2":
-                    check_value = BGPStatics.MESSAGE_TYPE_UPDATE
-                elif value == "NOTIFICATION" or value == "3":
-                    check_value = BGPStatics.MESSAGE_TYPE_NOTIFICATION
-                elif value == "KEEPALIVE" or value == "4":
-                    check_value = BGPStatics.MESSAGE_TYPE_KEEPALIVE
-                elif value == "ROUTE-REFRESH" or value == "ROUTEREFRESH" or value == "5":
-                    check_value = BGPStatics.MESSAGE_TYPE_ROUTE_REFRESH
-                else:
-                    return None
-
-                if not negated and message.type == check_value:
-                    # Match on message type
-                    return message
-
-                if negated and message.type != check_value:
-                    return message
-
-            # Searched value was not found
-            return None
+            return self.match_value(message.type)
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
@@ -17,39 +17,36 @@
 # limitations under the License.
 #
 
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
 from pbgpp.Output.Filter import BGPFilter
 from pbgpp.BGP.Statics import BGPStatics
 
 
 class NLRIFilter(BGPFilter):
-    def __init__(self, values=[]):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = ["nlri"]
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    def __init__(self, values=[], mode=BGPPrefixTrie.MODE_EXACT):
         BGPFilter.__init__(self, values)
+        self.compile_prefixes(values, mode)
+
+    def index_keys(self):
+        return self.prefix_index_keys()
 
-    def apply(self, message):
+    def match(self, message):
         try:
             # We first need to make that we are currently handling an UPDATE message
-            if message.type is not BGPStatics.MESSAGE_TYPE_UPDATE:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
                 # Skip messages that are no UPDATE messages
-                return None
-
-            if len(message.nlri) > 0:
-                # NLRI is containing values
-                for route in message.nlri:
-
-                    for value in self.values:
-                        negated = False
-                        if value[0:1] == "~":
-                            negated = True
-                            value = value[1:]
-
-                        if not negated and route.prefix_string == value:
-                            return message
+                return False
 
-                        if negated and route.prefix_string != value:
-                            return message
+            for route in message.nlri:
+                if self.match_prefix(route.version, route.prefix_decimal, route.prefix_length_decimal):
+                    return True
 
             # Searched value was not found
-            return None
+            return False
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
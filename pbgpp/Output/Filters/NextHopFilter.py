@@ -17,44 +17,41 @@
 # limitations under the License.
 #
 
-from pbgpp.BGP.Update.Route import BGPRoute
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
 from pbgpp.Output.Filter import BGPFilter
 from pbgpp.BGP.Statics import BGPStatics
 
 
 class NextHopFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP]
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
 
-    def apply(self, message):
+        # Values may also be prefixes (e.g. 80.81.192.0/21) that cover the next hop
+        self.compile_prefixes(values, BGPPrefixTrie.MODE_OR_LONGER)
+
+    def match(self, message):
         try:
             # NEXT_HOP is a path attribute of BGP UPDATE message
             # Therefore we first need to make that we are currently handling an UPDATE message
-            if message.type is not BGPStatics.MESSAGE_TYPE_UPDATE:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
                 # Skip messages that are no UPDATE messages
-                return None
+                return False
 
             for attribute in message.path_attributes:
                 # Skip attributes that are no NEXT_HOP attributes
-                if attribute.type is not BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP:
+                if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP:
                     continue
 
-                # Here we found the NEXT_HOP attribute - loop through allowed values
-                for value in self.values:
-                    negated = False
-                    if value[0:1] == "~":
-                        negated = True
-                        value = value[1:]
-
-                    if not negated and str(BGPRoute.decimal_ip_to_string(attribute.next_hop)) == str(value):
-                        # Match on NEXT_HOP attribute - Return message
-                        return message
-
-                    if negated and str(BGPRoute.decimal_ip_to_string(attribute.next_hop)) != str(value):
-                        return message
+                # Here we found the NEXT_HOP attribute - look up its decimal representation as host route
+                if self.match_prefix(4, attribute.next_hop, 32):
+                    return True
 
             # Searched value was not found
-            return None
+            return False
         except Exception as e:
             # On error the filtering was not successful (due to wrong fields, etc.)
-            return None
+            return False
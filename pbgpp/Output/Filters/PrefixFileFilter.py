@@ -0,0 +1,74 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.BGP.Statics import BGPStatics
+
+
+class PrefixFileFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = ["withdrawn_routes", "nlri"]
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    def __init__(self, values=[], mode=BGPPrefixTrie.MODE_EXACT):
+        BGPFilter.__init__(self, values)
+
+        # Values are paths to files containing one prefix per line (e.g. 80.81.82.0/24 or ~80.81.82.0/24)
+        # Empty lines and comments starting with # are ignored
+        self.compile_prefixes(self.read_prefixes(values), mode)
+
+    @staticmethod
+    def read_prefixes(paths):
+        prefixes = []
+
+        for path in paths:
+            try:
+                with open(path, "r") as f:
+                    for line in f:
+                        line = line.split("#", 1)[0].strip()
+
+                        if line:
+                            prefixes.append(line)
+            except IOError as e:
+                raise OutputFilterError("could not read prefix file '" + path + "': " + str(e))
+
+        return prefixes
+
+    def index_keys(self):
+        return self.prefix_index_keys()
+
+    def match(self, message):
+        try:
+            # We first need to make that we are currently handling an UPDATE message
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
+                # Skip messages that are no UPDATE messages
+                return False
+
+            # Announced as well as withdrawn prefixes are looked up
+            for routes in (message.nlri, message.withdrawn_routes):
+                for route in routes:
+                    if self.match_prefix(route.version, route.prefix_decimal, route.prefix_length_decimal):
+                        return True
+
+            # Searched value was not found
+            return False
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
@@ -0,0 +1,70 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from pbgpp.BGP.Exceptions import BGPIntervalSetError
+from pbgpp.BGP.IntervalSet import BGPPrefixIntervalSet
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.BGP.Statics import BGPStatics
+
+
+class PrefixListFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = ["nlri"]
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    def __init__(self, values=[]):
+        BGPFilter.__init__(self, values)
+
+        # Values are paths to prefix list files (e.g. IRR generated prefix lists or bogons), ~ negates a file:
+        # bogons.txt matches announcements of bogons, ~AS-MEMBER.txt matches announcements outside of the list
+        self.compile(PrefixListFilter.load)
+
+    @staticmethod
+    def load(path):
+        try:
+            return BGPPrefixIntervalSet.from_file(path)
+        except BGPIntervalSetError as e:
+            raise OutputFilterError("invalid prefix list file '" + path + "': " + e.message)
+
+    def match(self, message):
+        try:
+            # We first need to make that we are currently handling an UPDATE message
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
+                # Skip messages that are no UPDATE messages
+                return False
+
+            # Only announced prefixes are looked up - a prefix matches if it's covered by a prefix list
+            for route in message.nlri:
+                version = route.version
+                network = route.prefix_decimal
+                length = route.prefix_length_decimal
+
+                for prefixes in self.positive:
+                    if prefixes.covers(version, network, length):
+                        return True
+
+                for prefixes in self.negated:
+                    if not prefixes.covers(version, network, length):
+                        return True
+
+            # Searched value was not found
+            return False
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
@@ -0,0 +1,54 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.RPKI.Validator import RPKIValidator
+
+
+class ROVFilter(BGPFilter):
+    # Requires messages to be validated by a RPKIValidator before filtering (see PBGPPPipeline)
+    REQUIRED_ATTRIBUTES = [BGPStatics.UPDATE_ATTRIBUTE_AS_PATH]
+    REQUIRED_SECTIONS = ["nlri"]
+    REQUIRED_OPTIONAL_PARAMETERS = []
+
+    def __init__(self, values=[]):
+        BGPFilter.__init__(self, values)
+        self.compile(ROVFilter.state_from_string)
+
+    @staticmethod
+    def state_from_string(value):
+        value = value.lower()
+
+        if value not in RPKIValidator.STATES:
+            raise OutputFilterError("unknown route origin validation state '" + value + "' (" + ", ".join(RPKIValidator.STATES) + ")")
+
+        return value
+
+    def match(self, message):
+        try:
+            if message.type != BGPStatics.MESSAGE_TYPE_UPDATE or message.rov is None:
+                # Skip messages that are no UPDATE messages or haven't been validated
+                return False
+
+            # Matches if one of the announced prefixes has (or doesn't have for ~) the given state
+            return len(message.rov) > 0 and self.match_any(set(message.rov))
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
@@ -21,34 +21,52 @@ from pbgpp.Output.Filter import BGPFilter
 
 
 class TimestampFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_PCAP
+
     def __init__(self, values=[]):
         BGPFilter.__init__(self, values)
 
+        # Values with fractional part (e.g. 123456789.123456) are compared against the whole
+        # timestamp tuple, values without against the seconds only
+        positive = set()
+        negated = set()
+
+        for v in values:
+            is_negated = v[0:1] == "~"
+            (negated if is_negated else positive).add(TimestampFilter.parse_timestamp(v[1:] if is_negated else v))
+
+        self.positive = frozenset(positive)
+        self.negated = frozenset(negated)
+
+    @staticmethod
+    def parse_timestamp(value):
+        if "." in value:
+            parts = value.split(".")
+            return int(parts[0]), int(parts[1])
+
+        return int(value)
+
     def apply(self, pcap_information):
         # !!! Attention: This is a pre-parsing filter!
         # This filter must be applied BEFORE parsing, otherwise it will unnecessarily slow down
         # the whole application. BGP messages don't have to be parsed when applying that filter
         # directly after reading PCAP packet header
+        return self.match(pcap_information)
 
+    def match(self, pcap_information):
+        return self.match_frame(pcap_information.ts, None, None)
+
+    def match_frame(self, ts, frame, offset):
         try:
-            for v in self.values:
-                negated = False
-                if v[0:1] == "~":
-                    negated = True
-                    v = v[1:]
-
-                if "." in v:
-                    if not negated and str(pcap_information.get_timestamp()[0]) + "." + str(pcap_information.get_timestamp()[1]) == v:
-                        return True
-
-                    if negated and str(pcap_information.get_timestamp()[0]) + "." + str(pcap_information.get_timestamp()[1]) != v:
-                        return True
-                else:
-                    if not negated and int(pcap_information.get_timestamp()[0]) == int(v):
-                        return True
-
-                    if negated and int(pcap_information.get_timestamp()[0]) != int(v):
-                        return True
+            if ts in self.positive or ts[0] in self.positive:
+                return True
+
+            for n in self.negated:
+                if n != (ts if isinstance(n, tuple) else ts[0]):
+                    return True
 
             # Searched value was not found
             return False
@@ -0,0 +1,131 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import calendar
+from datetime import datetime
+
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+
+
+class TimestampRangeFilter(BGPFilter):
+    REQUIRED_ATTRIBUTES = []
+    REQUIRED_SECTIONS = []
+    REQUIRED_OPTIONAL_PARAMETERS = []
+    STAGE = BGPFilter.STAGE_PCAP
+
+    # Accepted formats besides epoch timestamps (always UTC)
+    DATETIME_FORMATS = ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d"]
+
+    def __init__(self, values=[]):
+        BGPFilter.__init__(self, values)
+
+        # Values are pairs of start and end (both inclusive) - either two values in a row (--filter-time-range START END)
+        # or a single value START..END (filter expressions). ~START negates a range.
+        # Bounds are compiled into (seconds, microseconds) tuples that compare directly against capture timestamps.
+        positive = []
+        negated = []
+
+        for start, end in TimestampRangeFilter.pairs(values):
+            is_negated = start[0:1] == "~"
+            bounds = (TimestampRangeFilter.parse_time(start[1:] if is_negated else start), TimestampRangeFilter.parse_time(end))
+
+            if bounds[0] > bounds[1]:
+                raise OutputFilterError("start of time range " + start + " " + end + " is after its end")
+
+            (negated if is_negated else positive).append(bounds)
+
+        self.positive_ranges = tuple(positive)
+        self.negated_ranges = tuple(negated)
+
+    @staticmethod
+    def pairs(values):
+        values = list(values)
+        pairs = []
+        i = 0
+
+        while i < len(values):
+            v = values[i]
+
+            if isinstance(v, (list, tuple)):
+                pairs.append((v[0], v[1]))
+                i += 1
+            elif ".." in v:
+                pairs.append(tuple(v.split("..", 1)))
+                i += 1
+            elif i + 1 < len(values):
+                pairs.append((v, values[i + 1]))
+                i += 2
+            else:
+                raise OutputFilterError("time range starting at '" + v + "' has no end")
+
+        return pairs
+
+    @staticmethod
+    def parse_time(value):
+        value = value.strip()
+
+        try:
+            seconds, _, fraction = value.partition(".")
+            return int(seconds), int((fraction + "000000")[0:6])
+        except ValueError:
+            pass
+
+        for f in TimestampRangeFilter.DATETIME_FORMATS:
+            try:
+                return calendar.timegm(datetime.strptime(value.rstrip("Z"), f).timetuple()), 0
+            except ValueError:
+                continue
+
+        raise OutputFilterError("invalid time '" + value + "' (expected epoch timestamp or YYYY-MM-DDTHH:MM:SS)")
+
+    def envelope(self):
+        # Returns (start, end) covering all matching timestamps or None if the filter may match any timestamp
+        if self.negated_ranges or not self.positive_ranges:
+            return None
+
+        return min(r[0] for r in self.positive_ranges), max(r[1] for r in self.positive_ranges)
+
+    def apply(self, pcap_information):
+        # !!! Attention: This is a pre-parsing filter!
+        # This filter must be applied BEFORE parsing, otherwise it will unnecessarily slow down
+        # the whole application. BGP messages don't have to be parsed when applying that filter
+        # directly after reading PCAP packet header
+        return self.match(pcap_information)
+
+    def match(self, pcap_information):
+        return self.match_frame(pcap_information.ts, None, None)
+
+    def match_frame(self, ts, frame, offset):
+        try:
+            ts = (ts[0], ts[1])
+
+            for start, end in self.positive_ranges:
+                if start <= ts <= end:
+                    return True
+
+            for start, end in self.negated_ranges:
+                if not start <= ts <= end:
+                    return True
+
+            # Timestamp is not within any range
+            return False
+        except Exception as e:
+            # On error the filtering was not successful (due to wrong fields, etc.)
+            return False
@@ -23,6 +23,46 @@ class BGPFormatter:
     FORMATTER_HUMAN_READABLE = 0
     FORMATTER_JSON = 1
     FORMATTER_LINE_BASED = 2
+    FORMATTER_MRT = 3
+    FORMATTER_PCAP = 4
 
     # Define available formatters here
-    CHOICES_FORMATTERS = ["HUMAN_READABLE", "JSON", "LINE_BASED"]
+    CHOICES_FORMATTERS = ["HUMAN_READABLE", "JSON", "LINE_BASED", "MRT", "PCAP"]
+
+    # Binary formatters return bytes instead of lines of text
+    BINARY = False
+
+    # Formatters returning bytes from apply_bytes() without converting text pass their output to pipes supporting
+    # bytes (see BGPPipe.BYTES) without any conversion
+    BYTES = False
+
+    # Message types the formatter needs to see before any filter is applied (see observe()). Messages of these types
+    # are decoded even if header filters would discard them.
+    OBSERVED_MESSAGE_TYPES = []
+
+    def apply(self, message):
+        # Returns the output of a message or None if there is nothing to output
+        raise NotImplementedError
+
+    def apply_bytes(self, message):
+        # Same as apply() but returns UTF-8 encoded bytes (without line break)
+        output = self.apply(message)
+
+        if output is None or isinstance(output, bytes):
+            return output
+
+        return output.encode("utf-8")
+
+    def apply_many(self, messages, as_bytes=False):
+        # Formats the messages of a packet at once. Returns a list of outputs in the order of the messages.
+        apply = self.apply_bytes if as_bytes else self.apply
+        return [apply(m) for m in messages]
+
+    def observe(self, message):
+        # Called by the pipeline with every message of OBSERVED_MESSAGE_TYPES before filters are applied
+        pass
+
+    def decode_plan(self):
+        # Formatters that don't need every part of a message return a BGPDecodePlan here
+        # None means that messages need to be decoded completely
+        return None
@@ -21,95 +21,193 @@ import json
 
 from pbgpp.BGP.Statics import BGPStatics
 from pbgpp.BGP.Translation import BGPTranslation
+from pbgpp.Output.Exceptions import OutputFormatterError
 from pbgpp.Output.Formatter import BGPFormatter
 
+# Faster serializers are used if they are installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
 
 class JSONFormatter(BGPFormatter):
-    def __init__(self):
-        pass
+    # Every message is rendered as one JSON object. The object is assembled from pre-rendered fragments instead of
+    # being serialized as a whole: the fields taken from the PCAP information are rendered once per captured frame
+    # and shared by all of its messages, and the path attributes of RIB entries (which share their attribute
+    # objects, see MRTRIBEntry) are rendered once per attribute set. Values are serialized by orjson or ujson if
+    # available; the output of the json module is identical to json.dumps() of the complete object.
+    SERIALIZER_ORJSON = "orjson"
+    SERIALIZER_UJSON = "ujson"
+    SERIALIZER_JSON = "json"
+
+    CHOICES_SERIALIZERS = [SERIALIZER_ORJSON, SERIALIZER_UJSON, SERIALIZER_JSON]
+
+    # Keys of the basic fields and of UPDATE message data
+    FIELDS = ["timestamp", "message_type", "message_type_string", "length", "source_mac", "destination_mac", "source_ip", "destination_ip", "message_data",
+              "sub_type_string", "withdrawn_routes_length", "path_attributes_length", "path_attributes", "withdrawn_routes", "pathId", "nlri", "rov"]
+
+    # Upper bounds of rendered PCAP information and attribute sets kept in memory
+    MAX_CACHED_HEADERS = 4096
+    MAX_CACHED_ATTRIBUTES = 100000
+
+    def __init__(self, serializer=None):
+        if serializer is None:
+            serializer = self.available_serializers()[0]
+
+        if serializer not in self.available_serializers():
+            raise OutputFormatterError("JSON serializer '" + str(serializer) + "' is not available")
+
+        self.serializer = serializer
+
+        if serializer == self.SERIALIZER_ORJSON:
+            self.dumps = lambda data: orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        elif serializer == self.SERIALIZER_UJSON:
+            self.dumps = ujson.dumps
+        else:
+            self.dumps = json.JSONEncoder().encode
+
+        # Strings are rendered by the C functions of the json module. The json module escapes non-ASCII characters
+        # and separates items and keys by a space, the other serializers don't
+        if serializer == self.SERIALIZER_JSON:
+            self.string = json.encoder.encode_basestring_ascii
+            self.item_separator = ", "
+            self.key_separator = ": "
+        else:
+            self.string = json.encoder.encode_basestring
+            self.item_separator = ","
+            self.key_separator = ":"
+
+        # Rendered keys including the key separator
+        self.fields = dict((name, self.string(name) + self.key_separator) for name in self.FIELDS)
+
+        # Rendered PCAP information by id() of the information (kept to keep its id() unique). RIB entries of
+        # different peers alternate, captured frames are mostly rendered once - the last one is checked first
+        self.last_information = None
+        self.header = None
+        self.headers = {}
+
+        # Rendered message type fields by message type
+        self.types = {}
+
+        # Rendered path attributes by id() of the shared attribute list (the list is kept to keep its id() unique)
+        self.attributes = {}
+
+    @classmethod
+    def available_serializers(cls):
+        return [s for s, module in ((cls.SERIALIZER_ORJSON, orjson), (cls.SERIALIZER_UJSON, ujson)) if module is not None] + [cls.SERIALIZER_JSON]
 
     def apply(self, message):
+        information = message.pcap_information
 
-        # Basic data for every message type
-        data = {
-            "timestamp": str(message.pcap_information.get_timestamp()[0]) + "." + str(message.pcap_information.get_timestamp()[1]),
+        if information is not self.last_information:
+            cached = self.headers.get(id(information))
 
-            "message_type": message.type,
-            "message_type_string": BGPTranslation.message_type(message.type),
-            "length": message.length,
+            if cached is not None and cached[0] is information:
+                self.header = cached[1]
+            else:
+                if len(self.headers) >= self.MAX_CACHED_HEADERS:
+                    self.headers.clear()
 
-            "source_mac": message.pcap_information.get_mac().get_source_string(),
-            "destination_mac": message.pcap_information.get_mac().get_destination_string(),
-            "source_ip": message.pcap_information.get_ip().get_source_string(),
-            "destination_ip": message.pcap_information.get_ip().get_destination_string(),
+                self.header = self.render_header(information)
+                self.headers[id(information)] = (information, self.header)
 
-            "message_data": None
-        }
+            self.last_information = information
+
+        fields = self.fields
+        types = self.types.get(message.type)
+
+        if types is None:
+            types = fields["message_type"] + self.value(message.type) + self.item_separator + \
+                fields["message_type_string"] + self.value(BGPTranslation.message_type(message.type)) + self.item_separator
+            self.types[message.type] = types
 
-        # Handle specific message types that contain more information than added above
+        # Handle specific message types that contain more information than the basic fields
         # Currently we just need to add information to OPEN- and UPDATE-messages
-        if message.type == BGPStatics.MESSAGE_TYPE_OPEN:
-            message_data = {
-                "asn": message.asn,
-                "hold_time": message.hold_time,
-                "identifier": message.identifier,
-                "optional_parameter_length": message.optional_parameter_length,
-
-                "optional_parameters": None
-            }
-
-            # Add optional parameters
-            optional_parameters = []
-
-            if len(message.optional_parameter) > 0:
-                for o in message.optional_parameter:
-                    optional_parameters.append(o.json())
-
-            # Assign to message data
-            message_data["optional_parameters"] = optional_parameters
-
-            # Assign message data to return data
-            data["message_data"] = message_data
-
-        elif message.type == BGPStatics.MESSAGE_TYPE_UPDATE:
-            message_data = {
-                "sub_type_string": BGPTranslation.update_subtype(message.subtype),
-                "withdrawn_routes_length": message.withdrawn_routes_length,
-                "path_attributes_length": message.path_attributes_length,
-
-                "path_attributes": None,
-                "withdrawn_routes": None,
-                "pathId": None,
-                "nlri": None
-            }
-
-            path_attributes = []
-            withdrawn_routes = []
-            nlri = []
-
-            # Add path attributes
-            if len(message.path_attributes) > 0:
-                for a in message.path_attributes:
-                    path_attributes.append(a.json())
-
-            # Add withdrawn routes
-            if len(message.withdrawn_routes) > 0:
-                for w in message.withdrawn_routes:
-                    withdrawn_routes.append(str(w))
-
-            # Add NLRI
-            if len(message.nlri) > 0:
-                for n in message.nlri:
-                    nlri.append(str(n))
-
-            # Assign to message data
-            message_data["path_attributes"] = path_attributes
-            if message.add_path:
-                message_data["pathId"] = message.path_id
-            message_data["withdrawn_routes"] = withdrawn_routes
-            message_data["nlri"] = nlri 
-
-            # Assign message data to return data
-            data["message_data"] = message_data
-
-        return json.dumps(data)
+        if message.type == BGPStatics.MESSAGE_TYPE_UPDATE:
+            message_data = self.render_update(message)
+        elif message.type == BGPStatics.MESSAGE_TYPE_OPEN:
+            message_data = self.render_open(message)
+        else:
+            message_data = "null"
+
+        return self.header[0] + types + fields["length"] + self.value(message.length) + self.item_separator + \
+            self.header[1] + fields["message_data"] + message_data + "}"
+
+    def render_header(self, information):
+        # Returns the fields before and after the message fields (timestamp; MAC and IP addresses)
+        ts = information.get_timestamp()
+        mac = information.get_mac()
+        ip = information.get_ip()
+        fields = self.fields
+
+        before = "{" + fields["timestamp"] + self.string(str(ts[0]) + "." + str(ts[1])) + self.item_separator
+        after = fields["source_mac"] + self.string(mac.get_source_string()) + self.item_separator + \
+            fields["destination_mac"] + self.string(mac.get_destination_string()) + self.item_separator + \
+            fields["source_ip"] + self.string(ip.get_source_string()) + self.item_separator + \
+            fields["destination_ip"] + self.string(ip.get_destination_string()) + self.item_separator
+
+        return before, after
+
+    def render_open(self, message):
+        message_data = {
+            "asn": message.asn,
+            "hold_time": message.hold_time,
+            "identifier": message.identifier,
+            "optional_parameter_length": message.optional_parameter_length,
+            "optional_parameters": [o.json() for o in message.optional_parameter]
+        }
+
+        return self.dumps(message_data)
+
+    def render_update(self, message):
+        fields = self.fields
+        separator = self.item_separator
+
+        # Validation states are only known if a VRP file is used (see RPKIValidator) - otherwise the key is left out
+        rov = "" if message.rov is None else separator + fields["rov"] + self.value(message.rov)
+
+        return "{" + fields["sub_type_string"] + self.value(BGPTranslation.update_subtype(message.subtype)) + separator + \
+            fields["withdrawn_routes_length"] + self.value(message.withdrawn_routes_length) + separator + \
+            fields["path_attributes_length"] + self.value(message.path_attributes_length) + separator + \
+            fields["path_attributes"] + self.render_path_attributes(message) + separator + \
+            fields["withdrawn_routes"] + self.render_routes(message.withdrawn_routes) + separator + \
+            fields["pathId"] + self.value(message.path_id if message.add_path else None) + separator + \
+            fields["nlri"] + self.render_routes(message.nlri) + rov + "}"
+
+    def render_path_attributes(self, message):
+        attributes = message.path_attributes
+
+        if not getattr(message, "shared_path_attributes", False):
+            return self.dumps([a.json() for a in attributes])
+
+        cached = self.attributes.get(id(attributes))
+
+        if cached is not None and cached[0] is attributes:
+            return cached[1]
+
+        if len(self.attributes) >= self.MAX_CACHED_ATTRIBUTES:
+            self.attributes.clear()
+
+        rendered = self.dumps([a.json() for a in attributes])
+        self.attributes[id(attributes)] = (attributes, rendered)
+        return rendered
+
+    def render_routes(self, routes):
+        string = self.string
+        return "[" + self.item_separator.join([string(str(r)) for r in routes]) + "]"
+
+    def value(self, value):
+        # Integers and strings are the most frequent values and are rendered directly
+        if type(value) is int:
+            return str(value)
+
+        if type(value) is str:
+            return self.string(value)
+
+        return self.dumps(value)
@@ -17,6 +17,7 @@
 # limitations under the License.
 #
 
+from pbgpp.BGP.DecodePlan import BGPDecodePlan
 from pbgpp.BGP.Statics import BGPStatics
 from pbgpp.BGP.Translation import BGPTranslation
 from pbgpp.BGP.Update.PathAttributes.ASPath import PathAttributeASPath
@@ -25,7 +26,6 @@ from pbgpp.BGP.Update.PathAttributes.LargeCommunities import PathAttributeLargeC
 from pbgpp.BGP.Update.PathAttributes.NextHop import PathAttributeNextHop
 from pbgpp.BGP.Update.PathAttributes.Origin import PathAttributeOrigin
 from pbgpp.Output.Formatter import BGPFormatter
-from itertools import chain
 
 
 class LineBasedFormatter(BGPFormatter):
@@ -50,6 +50,7 @@ class LineBasedFormatter(BGPFormatter):
     FIELD_UPDATE_ATTRIBUTE_NEXT_HOP = ["next_hop"]
     FIELD_UPDATE_ATTRIBUTE_COMMUNITIES = ["communities"]
     FIELD_UPDATE_ATTRIBUTE_LARGE_COMMUNITIES = ["large_communities"]
+    FIELD_UPDATE_ROV = ["rov", "rpki"]
 
     FIELD_OPEN_MYASN = ["myasn", "my_asn", "asn"]
     FIELD_OPEN_HOLD_TIME = ["hold_time", "holdtime", "holdtimer", "hold_timer"]
@@ -76,21 +77,62 @@ class LineBasedFormatter(BGPFormatter):
                          FIELD_UPDATE_ATTRIBUTE_NEXT_HOP,
                          FIELD_UPDATE_ATTRIBUTE_COMMUNITIES,
                          FIELD_UPDATE_ATTRIBUTE_LARGE_COMMUNITIES,
+                         FIELD_UPDATE_ROV,
                          FIELD_OPEN_MYASN,
                          FIELD_OPEN_HOLD_TIME,
                          FIELD_OPEN_VERSION,
                          FIELD_OPEN_BGP_IDENTIFIER]
 
+    # Accessor (method name) of every field
+    FIELD_ACCESSORS = [(FIELD_MESSAGE_TIMESTAMP, "field_timestamp"),
+                       (FIELD_MESSAGE_IP_SOURCE, "field_source_ip"),
+                       (FIELD_MESSAGE_IP_DESTINATION, "field_destination_ip"),
+                       (FIELD_MESSAGE_MAC_SOURCE, "field_source_mac"),
+                       (FIELD_MESSAGE_MAC_DESTINATION, "field_destination_mac"),
+                       (FIELD_MESSAGE_LENGTH, "field_length"),
+                       (FIELD_MESSAGE_TYPE, "field_type"),
+                       (FIELD_UPDATE_SUBTYPE, "field_subtype"),
+                       (FIELD_UPDATE_PATH_ATTRIBUTES_LENGTH, "field_path_attributes_length"),
+                       (FIELD_UPDATE_PATH_IDENTIFIER, "field_path_identifier"),
+                       (FIELD_UPDATE_WITHDRAWN_ROUTES_LENGTH, "field_withdrawn_routes_length"),
+                       (FIELD_UPDATE_WITHDRAWN_ROUTES, "field_withdrawn_routes"),
+                       (FIELD_UPDATE_NLRI, "field_nlri"),
+                       (FIELD_UPDATE_NLRI_LENGTH, "field_nlri_length"),
+                       (FIELD_UPDATE_ATTRIBUTE_ORIGIN, "field_origin"),
+                       (FIELD_UPDATE_ATTRIBUTE_AS_PATH, "field_as_path"),
+                       (FIELD_UPDATE_ATTRIBUTE_AS_PATH_LAST_ASN, "field_unknown"),  # Not rendered yet
+                       (FIELD_UPDATE_ATTRIBUTE_NEXT_HOP, "field_next_hop"),
+                       (FIELD_UPDATE_ATTRIBUTE_COMMUNITIES, "field_communities"),
+                       (FIELD_UPDATE_ATTRIBUTE_LARGE_COMMUNITIES, "field_large_communities"),
+                       (FIELD_UPDATE_ROV, "field_rov"),
+                       (FIELD_OPEN_MYASN, "field_asn"),
+                       (FIELD_OPEN_HOLD_TIME, "field_hold_time"),
+                       (FIELD_OPEN_VERSION, "field_version"),
+                       (FIELD_OPEN_BGP_IDENTIFIER, "field_bgp_identifier")]
+
+    # Fields that are filled from PCAP information and the 19-byte BGP header only
+    HEADER_FIELDS = [FIELD_MESSAGE_TIMESTAMP,
+                     FIELD_MESSAGE_IP_SOURCE,
+                     FIELD_MESSAGE_IP_DESTINATION,
+                     FIELD_MESSAGE_MAC_SOURCE,
+                     FIELD_MESSAGE_MAC_DESTINATION,
+                     FIELD_MESSAGE_LENGTH,
+                     FIELD_MESSAGE_TYPE,
+                     FIELD_UPDATE_SUBTYPE]
+
     def __init__(self, fields=None, separator='\t'):
         if not fields:
             # If the user is not using --fields parameter fallback to default field set
             # Default: timestamp, message_type, message_subtype, prefixes, withdrawn_routes
-            self.fields = [self.FIELD_MESSAGE_TIMESTAMP, self.FIELD_MESSAGE_TYPE, self.FIELD_UPDATE_SUBTYPE, self.FIELD_UPDATE_NLRI, self.FIELD_UPDATE_WITHDRAWN_ROUTES]
+            self.fields = [self.FIELD_MESSAGE_TIMESTAMP[0], self.FIELD_MESSAGE_TYPE[0], self.FIELD_UPDATE_SUBTYPE[0], self.FIELD_UPDATE_NLRI[0], self.FIELD_UPDATE_WITHDRAWN_ROUTES[0]]
         else:
             self.fields = fields
 
         self.separator = separator
 
+        # Fields are looked up once - apply() only calls the accessor of every field
+        self.accessors = self.compile_fields(self.fields)
+
     @staticmethod
     def available_fields():
         output = ""
@@ -109,161 +151,211 @@ class LineBasedFormatter(BGPFormatter):
 
         return False
 
+    @staticmethod
+    def header_fields():
+        return [field[0] for field in LineBasedFormatter.HEADER_FIELDS]
+
+    @staticmethod
+    def is_header_field(field):
+        for f in LineBasedFormatter.HEADER_FIELDS:
+            if field in f:
+                return True
+
+        return False
+
+    def decode_plan(self):
+        # Only the path attributes and prefix sections of the selected fields need to be decoded
+        plan = BGPDecodePlan.empty()
+
+        for f in self.fields:
+            if f in self.FIELD_UPDATE_WITHDRAWN_ROUTES:
+                plan.require(attributes=[], withdrawn_routes=True, optional_parameters=[])
+            elif f in self.FIELD_UPDATE_NLRI or f in self.FIELD_UPDATE_NLRI_LENGTH:
+                plan.require(attributes=[], nlri=True, optional_parameters=[])
+            elif f in self.FIELD_UPDATE_PATH_IDENTIFIER:
+                # The path identifier is read while parsing the prefixes
+                plan.require(attributes=[], withdrawn_routes=True, nlri=True, optional_parameters=[])
+            elif f in self.FIELD_UPDATE_ATTRIBUTE_ORIGIN:
+                plan.require(attributes=[BGPStatics.UPDATE_ATTRIBUTE_ORIGIN], optional_parameters=[])
+            elif f in self.FIELD_UPDATE_ATTRIBUTE_AS_PATH or f in self.FIELD_UPDATE_ATTRIBUTE_AS_PATH_LAST_ASN:
+                plan.require(attributes=[BGPStatics.UPDATE_ATTRIBUTE_AS_PATH], optional_parameters=[])
+            elif f in self.FIELD_UPDATE_ATTRIBUTE_NEXT_HOP:
+                plan.require(attributes=[BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP], optional_parameters=[])
+            elif f in self.FIELD_UPDATE_ATTRIBUTE_COMMUNITIES:
+                plan.require(attributes=[BGPStatics.UPDATE_ATTRIBUTE_COMMUNITIES], optional_parameters=[])
+            elif f in self.FIELD_UPDATE_ATTRIBUTE_LARGE_COMMUNITIES:
+                plan.require(attributes=[BGPStatics.UPDATE_ATTRIBUTE_LARGE_COMMUNITIES], optional_parameters=[])
+            elif f in self.FIELD_UPDATE_ROV:
+                plan.require(attributes=[BGPStatics.UPDATE_ATTRIBUTE_AS_PATH], nlri=True, optional_parameters=[])
+
+        return plan
+
+    def compile_fields(self, fields):
+        # Returns a tuple of functions rendering the values of the given fields of a message as string
+        accessors = {}
+
+        for field, accessor in self.FIELD_ACCESSORS:
+            for name in field:
+                accessors[name] = getattr(self, accessor)
+
+        return tuple(accessors.get(f, self.field_unknown) for f in fields)
+
     def get_field_value(self, f, message):
-        # Timestamp
-        if f in self.FIELD_MESSAGE_TIMESTAMP:
-            return str(message.pcap_information.get_timestamp()[0]) + "." + str(message.pcap_information.get_timestamp()[1])
-
-        # Source IP
-        if f in self.FIELD_MESSAGE_IP_SOURCE:
-            return message.pcap_information.get_ip().get_source_string()
-
-        # Destination IP
-        if f in self.FIELD_MESSAGE_IP_DESTINATION:
-            return message.pcap_information.get_ip().get_destination_string()
-
-        # Source MAC
-        if f in self.FIELD_MESSAGE_MAC_SOURCE:
-            return message.pcap_information.get_mac().get_source_string()
-
-        # Destination MAC
-        if f in self.FIELD_MESSAGE_MAC_DESTINATION:
-            return message.pcap_information.get_mac().get_destination_string()
-
-        # ASN
-        if f in self.FIELD_OPEN_MYASN:
-            asn = getattr(message, "asn", False)
-            if asn:
-                return str(asn)
-            return None
-
-        # Hold time
-        if f in self.FIELD_OPEN_HOLD_TIME:
-            hold_time = getattr(message, "hold_time", False)
-            if hold_time:
-                return str(hold_time)
-            return None
-
-        # BGP Version
-        if f in self.FIELD_OPEN_VERSION:
-            version = getattr(message, "version", False)
-            if version:
-                return str(version)
-            return None
-
-        # BGP Identifier
-        if f in self.FIELD_OPEN_BGP_IDENTIFIER:
-            bgp_identifier = getattr(message, "identifier", False)
-            if bgp_identifier:
-                return str(bgp_identifier)
-            return None
-
-        # Message length
-        if f in self.FIELD_MESSAGE_LENGTH:
-            return str(message.length)
-
-        # Path attributes length
-        if f in self.FIELD_UPDATE_PATH_ATTRIBUTES_LENGTH:
-            path_attributes_length = getattr(message, "path_attributes_length", False)
-            if path_attributes_length:
-                return str(path_attributes_length)
-            return None
-
-        # Withdrawn routes length
-        if f in self.FIELD_UPDATE_WITHDRAWN_ROUTES_LENGTH:
-            withdrawn_routes_length = getattr(message, "withdrawn_routes_length", False)
-            if withdrawn_routes_length:
-                return str(withdrawn_routes_length)
-            return None
-
-        # Message type
-        if f in self.FIELD_MESSAGE_TYPE:
-            return BGPTranslation.message_type(message.type)
-
-        # Message sub type
-        if f in self.FIELD_UPDATE_SUBTYPE:
-            subtype = getattr(message, "subtype", False)
-            if subtype:
-                return BGPTranslation.update_subtype(subtype)
-            return None
-
-        # Withdrawn routes
-        if f in self.FIELD_UPDATE_WITHDRAWN_ROUTES:
-            w_routes = getattr(message, "withdrawn_routes", False)
-            if w_routes:
-                return [str(r) for r in w_routes]
-            return None
-
-        # Path Identifier
-        if f in self.FIELD_UPDATE_PATH_IDENTIFIER:
-            add_path = getattr(message, "add_path", False)
-            if add_path:
-                return [message.path_id]
-            return None
-
-        # NLRI (announced prefixes)
-        if f in self.FIELD_UPDATE_NLRI:
-            prefixes = getattr(message, "nlri", False)
-            if prefixes:
-                return [str(r) for r in prefixes]
-            return None
-
-        # NLRI length
-        if f in self.FIELD_UPDATE_NLRI_LENGTH:
-            prefixes = getattr(message, "nlri", False)
-            if prefixes:
-                return [r.prefix_length_string for r in prefixes]
-            return None
-
-        # Attribute: Origin
-        if f in self.FIELD_UPDATE_ATTRIBUTE_ORIGIN:
-            path_attributes = getattr(message, "path_attributes", False)
-            if path_attributes:
-                return [str(a) for a in path_attributes if isinstance(a, PathAttributeOrigin)]
-            return None
-
-        # Next hop
-        if f in self.FIELD_UPDATE_ATTRIBUTE_NEXT_HOP:
-            path_attributes = getattr(message, "path_attributes", False)
-            if path_attributes:
-                return [str(a) for a in path_attributes if isinstance(a, PathAttributeNextHop)]
-            return None
-
-        # Communities
-        if f in self.FIELD_UPDATE_ATTRIBUTE_COMMUNITIES:
-            path_attributes = getattr(message, "path_attributes", False)
-            if path_attributes:  # The split is necessary because communities are not returned as a list?
-                communities = [str(pa).split(" ") for pa in path_attributes if isinstance(pa, PathAttributeCommunities)]
-                return list(chain.from_iterable(communities))  # Flattens the resulting list
-            return None
-
-        # Large Communities
-        if f in self.FIELD_UPDATE_ATTRIBUTE_LARGE_COMMUNITIES:
-            path_attributes = getattr(message, "path_attributes", False)
-            if path_attributes:  # The split is necessary because communities are not returned as a list?
-                communities = [str(pa).split(" ") for pa in path_attributes if isinstance(pa, PathAttributeLargeCommunities)]
-                return list(chain.from_iterable(communities))  # Flattens the resulting list
-            return None
-
-        # AS path (AS Sets remain unhandled?)
-        if f in self.FIELD_UPDATE_ATTRIBUTE_AS_PATH:
-            path_attributes = getattr(message, "path_attributes", False)
-            if path_attributes:  # The split is necessary because segments are not returned as a list?
-                segments = [str(seg).split(" ") for seg in path_attributes if isinstance(seg, PathAttributeASPath)]
-                return list(chain.from_iterable(segments))  # Flattens the resulting list
-            return None
+        return self.compile_fields([f])[0](message)
 
     def apply(self, message):
+        return self.separator.join([accessor(message) for accessor in self.accessors])
+
+    # Field accessors - fields that are not available are rendered as "None", lists are joined by spaces
+    @staticmethod
+    def field_unknown(message):
+        return "None"
+
+    @staticmethod
+    def field_timestamp(message):
+        ts = message.pcap_information.get_timestamp()
+        return str(ts[0]) + "." + str(ts[1])
+
+    @staticmethod
+    def field_source_ip(message):
+        return message.pcap_information.get_ip().get_source_string()
+
+    @staticmethod
+    def field_destination_ip(message):
+        return message.pcap_information.get_ip().get_destination_string()
+
+    @staticmethod
+    def field_source_mac(message):
+        return message.pcap_information.get_mac().get_source_string()
+
+    @staticmethod
+    def field_destination_mac(message):
+        return message.pcap_information.get_mac().get_destination_string()
+
+    @staticmethod
+    def field_length(message):
+        return str(message.length)
+
+    @staticmethod
+    def field_type(message):
+        return BGPTranslation.message_type(message.type)
+
+    @staticmethod
+    def field_subtype(message):
+        subtype = getattr(message, "subtype", False)
+        return BGPTranslation.update_subtype(subtype) if subtype else "None"
+
+    @staticmethod
+    def field_asn(message):
+        asn = getattr(message, "asn", False)
+        return str(asn) if asn else "None"
+
+    @staticmethod
+    def field_hold_time(message):
+        hold_time = getattr(message, "hold_time", False)
+        return str(hold_time) if hold_time else "None"
+
+    @staticmethod
+    def field_version(message):
+        version = getattr(message, "version", False)
+        return str(version) if version else "None"
+
+    @staticmethod
+    def field_bgp_identifier(message):
+        bgp_identifier = getattr(message, "identifier", False)
+        return str(bgp_identifier) if bgp_identifier else "None"
+
+    @staticmethod
+    def field_path_attributes_length(message):
+        path_attributes_length = getattr(message, "path_attributes_length", False)
+        return str(path_attributes_length) if path_attributes_length else "None"
+
+    @staticmethod
+    def field_withdrawn_routes_length(message):
+        withdrawn_routes_length = getattr(message, "withdrawn_routes_length", False)
+        return str(withdrawn_routes_length) if withdrawn_routes_length else "None"
+
+    @staticmethod
+    def field_withdrawn_routes(message):
+        w_routes = getattr(message, "withdrawn_routes", False)
+        return " ".join([str(r) for r in w_routes]) if w_routes else "None"
+
+    @staticmethod
+    def field_path_identifier(message):
+        return str(message.path_id) if getattr(message, "add_path", False) else "None"
+
+    @staticmethod
+    def field_nlri(message):
+        prefixes = getattr(message, "nlri", False)
+        return " ".join([str(r) for r in prefixes]) if prefixes else "None"
+
+    @staticmethod
+    def field_nlri_length(message):
+        prefixes = getattr(message, "nlri", False)
+        return " ".join([r.prefix_length_string for r in prefixes]) if prefixes else "None"
+
+    @staticmethod
+    def field_rov(message):
+        # Route origin validation state per NLRI
+        rov = getattr(message, "rov", None)
+
+        if not rov:
+            return "None"
+
+        return " ".join(map(str, rov)) if isinstance(rov, list) else str(rov)
+
+    @staticmethod
+    def field_origin(message):
+        path_attributes = getattr(message, "path_attributes", False)
+
+        if not path_attributes:
+            return "None"
+
+        return " ".join([str(a) for a in path_attributes if isinstance(a, PathAttributeOrigin)])
+
+    @staticmethod
+    def field_next_hop(message):
+        path_attributes = getattr(message, "path_attributes", False)
+
+        if not path_attributes:
+            return "None"
+
+        return " ".join([str(a) for a in path_attributes if isinstance(a, PathAttributeNextHop)])
+
+    @staticmethod
+    def field_communities(message):
+        path_attributes = getattr(message, "path_attributes", False)
+
+        if not path_attributes:
+            return "None"
+
+        return " ".join([str(c) for a in path_attributes if isinstance(a, PathAttributeCommunities) for c in a.communities])
+
+    @staticmethod
+    def field_large_communities(message):
+        path_attributes = getattr(message, "path_attributes", False)
+
+        if not path_attributes:
+            return "None"
+
+        return " ".join([str(c) for a in path_attributes if isinstance(a, PathAttributeLargeCommunities) for c in a.large_communities])
+
+    @staticmethod
+    def field_as_path(message):
+        # AS_SEQUENCE segments are rendered as plain ASN, AS_SET segments in brackets
+        path_attributes = getattr(message, "path_attributes", False)
+
+        if not path_attributes:
+            return "None"
+
+        segments = []
+
+        for a in path_attributes:
+            if isinstance(a, PathAttributeASPath):
+                for segment in a.path_segments:
+                    if segment.segment_type == BGPStatics.AS_PATH_SEGMENT_SEQUENCE:
+                        segments.append(" ".join(map(str, segment.segments)))
+                    elif segment.segment_type == BGPStatics.AS_PATH_SEGMENT_SET:
+                        segments.append("(" + " ".join(map(str, segment.segments)) + ")")
 
-        # Get the values
-        values = [self.get_field_value(f, message) for f in self.fields]
-
-        # Convert and return to a nice output string, assuming list of lists contained in values
-        r = ""
-        for i in values:
-            if not isinstance(i, list):
-                r += str(i)
-            else:
-                r += " ".join(map(str, i))
-            r += self.separator
-        return r[:-1]
+        return " ".join(segments)
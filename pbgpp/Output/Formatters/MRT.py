@@ -0,0 +1,119 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import struct
+
+from pbgpp.BGP.DecodePlan import BGPDecodePlan
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.MRT.Statics import MRTStatics
+from pbgpp.Output.Formatter import BGPFormatter
+
+
+class MRTFormatter(BGPFormatter):
+    # Writes every message as BGP4MP_ET record (RFC 6396) containing the original message bytes. Such archives are
+    # a fraction of the size of JSON output and can be read by pbgpp (--mrt), bgpdump and bgpkit.
+    # Peer addresses and timestamps are taken from the PCAP information. AS numbers are known from MRT and BMP input;
+    # for captured traffic they are learned from the OPEN messages of the sessions (0 until an OPEN was seen), also
+    # from OPEN messages that don't pass the filters (see observe()).
+    # Readers decode the AS_PATH of AS4 sub-types as 4-byte ASNs, so sessions whose speakers didn't both announce the
+    # 4-byte ASN capability are written as BGP4MP_MESSAGE with 2-byte AS numbers (AS_TRANS for larger ones). Sessions
+    # without a known OPEN are written as AS4 sub-types.
+    BINARY = True
+    BYTES = True
+
+    RECORD_HEADER = struct.Struct("!IHHII")
+    PEERS_AS2 = struct.Struct("!HHHH")
+    PEERS_AS4 = struct.Struct("!IIHH")
+
+    # Placeholder of ASNs that don't fit into 2 bytes (RFC 6793)
+    AS_TRANS = 23456
+
+    IPV4_MAPPED_PREFIX = (0,) * 10 + (0xff, 0xff)
+
+    OBSERVED_MESSAGE_TYPES = [BGPStatics.MESSAGE_TYPE_OPEN]
+
+    def __init__(self):
+        # AS number and support of 4-byte ASN (capability 65) by speaker address learned from OPEN messages
+        self.asns = {}
+        self.as4 = {}
+
+    def decode_plan(self):
+        # The message bytes are written as they are - only OPEN capabilities (4-byte ASN) and the prefixes
+        # (ADD-PATH path identifiers) need to be decoded
+        plan = BGPDecodePlan.empty()
+        plan.require(attributes=[], withdrawn_routes=True, nlri=True, optional_parameters=[BGPStatics.OPEN_CAPABILITY])
+        return plan
+
+    def apply(self, message):
+        information = message.pcap_information
+        source = information.get_source_ip()
+        destination = information.get_destination_ip()
+
+        if message.type == BGPStatics.MESSAGE_TYPE_OPEN:
+            self.observe(message)
+
+        source_as = getattr(information, "source_as", 0) or self.asns.get(source, 0)
+        destination_as = getattr(information, "destination_as", 0) or self.asns.get(destination, 0)
+
+        # MRT and BMP input tell the AS_PATH encoding of the session, otherwise both OPEN messages need the capability
+        as4 = getattr(information, "as4", None)
+
+        if as4 is None:
+            as4 = self.as4.get(source, True) and self.as4.get(destination, True)
+
+        # Both addresses have to be of the same family - IPv4 addresses are mapped into IPv6 if necessary
+        if len(source) != len(destination):
+            source = self.IPV4_MAPPED_PREFIX + source if len(source) == 4 else source
+            destination = self.IPV4_MAPPED_PREFIX + destination if len(destination) == 4 else destination
+
+        afi = MRTStatics.AFI_IPV6 if len(source) == 16 else MRTStatics.AFI_IPV4
+        add_path = getattr(message, "add_path", False)
+        interface_index = getattr(information, "interface_index", 0)
+
+        if as4:
+            subtype = MRTStatics.BGP4MP_MESSAGE_AS4_ADDPATH if add_path else MRTStatics.BGP4MP_MESSAGE_AS4
+            peers = self.PEERS_AS4.pack(source_as, destination_as, interface_index, afi)
+        else:
+            subtype = MRTStatics.BGP4MP_MESSAGE_ADDPATH if add_path else MRTStatics.BGP4MP_MESSAGE
+            peers = self.PEERS_AS2.pack(self.as2(source_as), self.as2(destination_as), interface_index, afi)
+
+        body = peers + bytes(bytearray(source)) + bytes(bytearray(destination)) + message.get_bytes()
+
+        ts = information.get_timestamp()
+        return self.RECORD_HEADER.pack(ts[0], MRTStatics.TYPE_BGP4MP_ET, subtype, len(body) + 4, ts[1]) + body
+
+    def observe(self, message):
+        # Learns the AS number of the sender of an OPEN message
+        source = message.pcap_information.get_source_ip()
+        self.asns[source], self.as4[source] = self.open_asn(message)
+
+    @staticmethod
+    def open_asn(message):
+        # Returns the AS number of the sender of an OPEN message and whether it supports 4-byte ASN
+        # The 4-byte ASN capability supersedes the 2-byte My Autonomous System field (AS_TRANS)
+        for parameter in message.optional_parameter:
+            for capability in getattr(parameter, "capability_list", []):
+                if capability.type == BGPStatics.CAPABILITY_SUPPORT_FOR_FOUR_OCTET_AS and capability.asn is not None:
+                    return capability.asn, True
+
+        return message.asn, False
+
+    @staticmethod
+    def as2(asn):
+        return asn if asn <= 0xffff else MRTFormatter.AS_TRANS
@@ -0,0 +1,105 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import struct
+
+from pbgpp.BGP.DecodePlan import BGPDecodePlan
+from pbgpp.Output.Formatter import BGPFormatter
+from pbgpp.PCAP.Frame import PCAPFrame
+
+
+class PCAPFormatter(BGPFormatter):
+    # Writes the captured frames of all messages that passed the filters as pcap file, e.g. to extract the packets
+    # of a few sessions or prefixes from a large capture in a single pass. Frames containing several matching
+    # messages are written once. With flows enabled, all later frames of the TCP connections of written frames
+    # (including ACKs and frames without matching messages) are written too, see apply_frame().
+    # Messages without a captured frame (MRT and BMP input) are skipped.
+    # The link type of the file is taken from the first frame. Later frames of the other link type (Ethernet and Linux
+    # cooked capture can be mixed when reading several captures) are converted, see PCAPFrame.to_ethernet().
+    BINARY = True
+    BYTES = True
+
+    MAGIC = 0xa1b2c3d4
+    VERSION = (2, 4)
+    SNAPLEN = 262144
+
+    LINK_TYPE_ETHERNET = 1
+    LINK_TYPE_LINUX_SLL = 113
+
+    GLOBAL_HEADER = struct.Struct("<IHHiIII")
+    RECORD_HEADER = struct.Struct("<IIII")
+
+    def __init__(self, flows=False):
+        self.flows = flows
+
+        # The global header is written in front of the first frame, which determines the link type
+        self.header_written = False
+        self.link_type = None
+
+        # Information of the last written frame - all messages of a frame share the same instance
+        self.last_information = None
+
+        # Connections of written frames (see PCAPFrame.flow_key())
+        self.flow_keys = set()
+
+    def decode_plan(self):
+        # Frames are written as they are - nothing but the BGP header is needed
+        return BGPDecodePlan.empty()
+
+    def apply(self, message):
+        information = message.pcap_information
+
+        if information is self.last_information or getattr(information, "frame", None) is None:
+            return None
+
+        self.last_information = information
+
+        if self.flows:
+            self.flow_keys.add(PCAPFrame.flow_key(information.frame, PCAPFrame.ip_offset(information.frame)))
+
+        return self.record(information.get_timestamp(), information.frame, information.frame_length)
+
+    def apply_frame(self, header, payload):
+        # Frames without matching messages are only written if they belong to a connection of a written frame
+        if not self.flow_keys:
+            return None
+
+        offset = PCAPFrame.ip_offset(payload)
+
+        if offset is None or not PCAPFrame.is_tcp(payload, offset) or PCAPFrame.flow_key(payload, offset) not in self.flow_keys:
+            return None
+
+        return self.record(header.getts(), payload, header.getlen())
+
+    def record(self, ts, frame, length):
+        length = length or len(frame)
+        link_type = self.LINK_TYPE_LINUX_SLL if PCAPFrame.ip_offset(frame) == PCAPFrame.OFFSET_COOKED_CAPTURE else self.LINK_TYPE_ETHERNET
+        header = b""
+
+        if not self.header_written:
+            self.header_written = True
+            self.link_type = link_type
+            header = self.GLOBAL_HEADER.pack(self.MAGIC, self.VERSION[0], self.VERSION[1], 0, 0, self.SNAPLEN, link_type)
+
+        elif link_type != self.link_type:
+            converted = PCAPFrame.to_ethernet(frame) if link_type == self.LINK_TYPE_LINUX_SLL else PCAPFrame.to_cooked_capture(frame)
+            length += len(converted) - len(frame)
+            frame = converted
+
+        return header + self.RECORD_HEADER.pack(ts[0], ts[1], len(frame), length) + bytes(frame)
@@ -19,6 +19,7 @@
 
 from pbgpp.BGP.Message import BGPMessage
 from pbgpp.Output.Exceptions import OutputHandlerError
+from pbgpp.Output.Filter import BGPFilter
 from pbgpp.Output.Formatter import BGPFormatter
 from pbgpp.Output.Pipe import BGPPipe
 
@@ -26,9 +27,13 @@ from pbgpp.Output.Pipe import BGPPipe
 class OutputHandler:
 
     def __init__(self, message, filter=[], formatter=None, pipe=None):
+        # A single message or the list of messages of a packet, which are formatted and piped in one go
+        messages = message if isinstance(message, list) else [message]
+
         # Pre-check variables
-        if not isinstance(message, BGPMessage):
-            raise OutputHandlerError("packet must be instance of BGPPacket.")
+        for m in messages:
+            if not isinstance(m, BGPMessage):
+                raise OutputHandlerError("packet must be instance of BGPPacket.")
 
         if not isinstance(formatter, BGPFormatter):
             raise OutputHandlerError("formatter must be instance of Formatters.")
@@ -38,11 +43,18 @@ class OutputHandler:
 
         # Assign class variables
         self.message = message
+        self.messages = messages
 
-        self.filter = filter
+        # Filters may be passed as list of filters or as predicate that was already fused by BGPFilter.chain()
+        self.filter = filter if callable(filter) else BGPFilter.chain(filter)
         self.formatter = formatter
         self.pipe = pipe
 
+        # Negotiate the output path: if both sides support it, the formatter returns bytes which the pipe writes
+        # without any conversion. Otherwise the pipe encodes the text returned by the formatter.
+        self.bytes = formatter.BYTES and pipe.BYTES
+
+        # Outputs in the order of self.messages (None if a message can't be formatted)
         self.output = None
 
     def __filter(self):
@@ -56,42 +68,42 @@ class OutputHandler:
         # Example: _OR_ (next-hop == 12.12.12.12))
         # Example: _AND_ (source-ip == 13.13.13.13)
 
-        for f in self.filter:
-            if self.message is None:
-                # We don't need to try to apply filters on a message that was already set to None
-                break
-
-            # Apply post-parsing filter to parsed packet
-            self.message = f.apply(self.message)
+        self.messages = [m for m in self.messages if self.filter(m)]
 
     def __format(self):
-        # Format the packet or a single message (e.g. apply JSON-formatting)
+        # Format the messages (e.g. apply JSON-formatting)
+        try:
+            self.output = self.formatter.apply_many(self.messages, self.bytes)
+        except (TypeError, AttributeError):
+            # Format one by one so that an error only drops the affected message
+            self.output = [self.__format_message(m) for m in self.messages]
+
+    def __format_message(self, message):
         try:
-            self.output = self.formatter.apply(self.message)
+            return self.formatter.apply_bytes(message) if self.bytes else self.formatter.apply(message)
         except TypeError:
-            self.output = None
+            return None
         except AttributeError:
-            self.output = None
+            return None
 
     def __pipe(self):
         # Pipe the filtered and formatted output (e.g. into a file or into stdout)
-        self.pipe.output(self.output)
+        # Messages are passed along for pipes deriving metadata from them (e.g. Kafka record keys)
+        output = self.output
+        messages = self.messages
+
+        if None in output:
+            # Don't display messages if there occurred an error during formatting
+            messages = [m for o, m in zip(output, messages) if o is not None]
+            output = [o for o in output if o is not None]
+
+        if output:
+            self.pipe.write_many(output, messages)
 
     def handle(self):
-        # Filters will set self.packet to None if no filter will apply
-        if self.message is not None:
-            self.__filter()
-
-            if self.message is not None:
-                self.__format()
-
-                if self.output is not None:
-                    self.__pipe()
-                else:
-                    # Don't display message if there occurred an error during formatting
-                    pass
-
-            else:
-                # Don't display message if there occurred an error during filtering
-                # or if the packet is set to None during filtering
-                pass
+        # Filters remove all messages that don't need to be displayed
+        self.__filter()
+
+        if self.messages:
+            self.__format()
+            self.__pipe()
@@ -25,4 +25,24 @@ class BGPPipe:
     PIPE_STDOUT = 2
 
     # Define available pipes here
-    CHOICES_PIPES = ["FILE", "KAFKA", "STDOUT"]
\ No newline at end of file
+    CHOICES_PIPES = ["FILE", "KAFKA", "STDOUT"]
+
+    # Pipes writing bytes from formatters (see BGPFormatter.BYTES) without any conversion
+    BYTES = False
+
+    def output(self, output, message=None):
+        # Writes the formatted output of a message - pipes may use the message itself for metadata
+        raise NotImplementedError
+
+    def write_bytes(self, data, message=None):
+        # Writes output returned by BGPFormatter.apply_bytes()
+        self.output(data, message)
+
+    def write_many(self, outputs, messages):
+        # Writes the outputs of the messages of a packet at once
+        for output, message in zip(outputs, messages):
+            self.output(output, message)
+
+    def flush(self):
+        # Pipes that buffer output write it out here
+        pass
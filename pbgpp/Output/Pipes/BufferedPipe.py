@@ -0,0 +1,113 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import atexit
+import threading
+import time
+
+from pbgpp.Output.Pipe import BGPPipe
+
+
+class BufferedPipe(BGPPipe):
+    # Base of pipes writing to a byte stream. Output is collected in a buffer and written in large chunks once
+    # buffer_size bytes are buffered or flush_interval seconds passed since the last write (0 writes every message
+    # immediately). On idle feeds a timer thread writes buffered output after flush_interval, so the buffer is
+    # guarded by a lock. Remaining output is written at exit - the handler turns SIGTERM into a regular exit for
+    # that reason.
+    BYTES = True
+
+    BUFFER_SIZE = 65536
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, binary=False, buffer_size=None, flush_interval=None):
+        # Output of binary formatters (e.g. MRT) is written as it is - text output is encoded line by line
+        self.binary = binary
+
+        self.buffer_size = self.BUFFER_SIZE if buffer_size is None else buffer_size
+        self.flush_interval = self.FLUSH_INTERVAL if flush_interval is None else flush_interval
+
+        self.buffer = bytearray()
+        self.last_flush = time.time()
+
+        # Pending timer flushing the buffer (see __schedule())
+        self.lock = threading.Lock()
+        self.timer = None
+
+        atexit.register(self.flush)
+
+    def output(self, output, message=None):
+        if not isinstance(output, bytes):
+            output = output.encode("utf-8")
+
+        self.write_bytes(output, message)
+
+    def write_bytes(self, data, message=None):
+        with self.lock:
+            self.buffer += data
+
+            if not self.binary:
+                self.buffer += b"\n"
+
+            self.__buffered()
+
+    def write_many(self, outputs, messages):
+        # Text is joined and encoded once for all messages
+        if self.binary:
+            data = b"".join(outputs)
+        elif isinstance(outputs[0], bytes):
+            data = b"\n".join(outputs) + b"\n"
+        else:
+            data = ("\n".join(outputs) + "\n").encode("utf-8")
+
+        with self.lock:
+            self.buffer += data
+            self.__buffered()
+
+    def flush(self):
+        with self.lock:
+            self.__flush()
+
+    def __buffered(self):
+        # Called with the lock held after output was added to the buffer
+        if len(self.buffer) >= self.buffer_size or time.time() - self.last_flush >= self.flush_interval:
+            self.__flush()
+        elif self.timer is None:
+            self.__schedule()
+
+    def __schedule(self):
+        # Output that stays in the buffer is written after flush_interval even if no further output arrives
+        self.timer = threading.Timer(self.flush_interval, self.__flush_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def __flush_timer(self):
+        with self.lock:
+            self.timer = None
+            self.__flush()
+
+    def __flush(self):
+        if self.buffer:
+            self.write(bytes(self.buffer))
+            del self.buffer[:]
+
+        self.last_flush = time.time()
+
+    def write(self, data):
+        # Writes a chunk of output to the underlying stream - implemented by the pipes
+        raise NotImplementedError
@@ -17,20 +17,27 @@
 # limitations under the License.
 #
 
-from pbgpp.Output.Pipe import BGPPipe
+from pbgpp.Output.Pipes.BufferedPipe import BufferedPipe
 
 
-class FilePipe(BGPPipe):
-    def __init__(self, target, append=False):
+class FilePipe(BufferedPipe):
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, target, append=False, binary=False, buffer_size=None, flush_interval=None):
         # File handle initialization
         self.target = target
         self.append = "a" if append else "w"
 
         # Class specific variables
-        self.file = open(self.target, self.append)
+        # The file is always opened in binary mode, text output is encoded by BufferedPipe
+        self.file = open(self.target, self.append + "b")
+
+        BufferedPipe.__init__(self, binary, buffer_size, flush_interval)
 
     def __del__(self):
+        self.flush()
         self.file.close()
 
-    def output(self, output):
-        self.file.write(output + "\n")
+    def write(self, data):
+        self.file.write(data)
+        self.file.flush()
@@ -16,8 +16,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import atexit
 import logging
 import sys
+import threading
 
 from kafka import KafkaProducer
 from kafka.errors import KafkaError
@@ -27,7 +29,32 @@ from pbgpp.Output.Pipe import BGPPipe
 
 
 class KafkaPipe(BGPPipe):
-    def __init__(self, server, topic):
+    # Sends every message as Kafka record. Records are batched and compressed by the producer (see linger_ms,
+    # batch_size and compression_type). With a key, all records of a peer (KEY_PEER) or of a BGP session in both
+    # directions (KEY_SESSION) go to the same partition, so their order is kept.
+    # At most max_in_flight records are waiting for their delivery report - output() blocks until reports arrive,
+    # which slows down the input instead of growing the producer buffer. Remaining records are sent at exit.
+    KEY_NONE = "none"
+    KEY_PEER = "peer"
+    KEY_SESSION = "session"
+
+    BYTES = True
+
+    CHOICES_KEYS = [KEY_NONE, KEY_PEER, KEY_SESSION]
+    CHOICES_COMPRESSION = ["none", "gzip", "snappy", "lz4", "zstd"]
+
+    # Producer settings favouring throughput over latency - options passed to the constructor take precedence
+    PRODUCER_DEFAULTS = {
+        "linger_ms": 20,
+        "batch_size": 262144
+    }
+
+    MAX_IN_FLIGHT = 10000
+
+    # Timeout (seconds) of the flush at exit
+    FLUSH_TIMEOUT = 60
+
+    def __init__(self, server, topic, key=KEY_NONE, max_in_flight=None, **options):
         logger = logging.getLogger("pbgpp.KafkaPipe.__init__")
 
         # Kafka server initialization
@@ -36,15 +63,106 @@ class KafkaPipe(BGPPipe):
         self.handle = None
 
         # Class specific variables
+        self.key = key
+        self.keys = {}
+
+        self.window = threading.BoundedSemaphore(max_in_flight or self.MAX_IN_FLIGHT)
+
+        # Delivery reports are counted by the I/O thread of the producer
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+
+        settings = dict(self.PRODUCER_DEFAULTS)
+        settings.update((name, value) for name, value in options.items() if value is not None)
+
+        if settings.get("compression_type") == "none":
+            del settings["compression_type"]
+
         try:
-            self.handle = KafkaProducer(bootstrap_servers=[server])
+            self.handle = KafkaProducer(bootstrap_servers=[server], **settings)
         except Exception as e:
             logger.error("could not initialize connection to Apache Kafka server. Following exception has been reported: " + str(e))
             raise BGPError("Could not establish a connection to target pipe (Apache Kafka). Cancelling ...")
 
-    def output(self, output):
+        atexit.register(self.close)
+
+    def output(self, output, message=None):
+        if isinstance(output, bytes) or sys.version_info[0] < 3:
+            self.write_bytes(output, message)
+        else:
+            self.write_bytes(bytes(output, "utf-8"), message)
+
+    def write_bytes(self, value, message=None):
         if self.handle is not None:
-            if sys.version_info[0] < 3:
-                self.handle.send(self.topic, output)
+            key = self.get_key(message) if self.key != self.KEY_NONE and message is not None else None
+
+            # Blocks while the maximum number of records is waiting for delivery
+            self.window.acquire()
+
+            self.sent += 1
+
+            # Any error (not only KafkaError, e.g. invalid values) releases the slot again
+            try:
+                future = self.handle.send(self.topic, value, key=key)
+            except Exception as e:
+                self.__failed(e)
+                return
+
+            future.add_callback(self.__delivered)
+            future.add_errback(self.__failed)
+
+    def get_key(self, message):
+        # Keys are the IP address of the peer or the IP addresses of both speakers of the session in a fixed order
+        ip = message.pcap_information.get_ip()
+        addresses = ip.source if self.key == self.KEY_PEER else (min(ip.source, ip.destination), max(ip.source, ip.destination))
+
+        key = self.keys.get(addresses)
+
+        if key is None:
+            if self.key == self.KEY_PEER:
+                key = ip.get_source_string()
+            elif ip.source <= ip.destination:
+                key = ip.get_source_string() + "-" + ip.get_destination_string()
             else:
-                self.handle.send(self.topic, bytes(output, "utf-8"))
+                key = ip.get_destination_string() + "-" + ip.get_source_string()
+
+            key = key.encode("utf-8")
+            self.keys[addresses] = key
+
+        return key
+
+    def __delivered(self, metadata):
+        self.delivered += 1
+        self.window.release()
+
+    def __failed(self, exception):
+        logger = logging.getLogger("pbgpp.KafkaPipe.__failed")
+
+        # Only the first failure is logged in detail - the number of failures is reported at exit
+        if self.failed == 0:
+            logger.error("Could not deliver message to Apache Kafka server: " + str(exception))
+
+        self.failed += 1
+        self.window.release()
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.flush(self.FLUSH_TIMEOUT)
+
+    def close(self):
+        logger = logging.getLogger("pbgpp.KafkaPipe.close")
+
+        if self.handle is None:
+            return
+
+        try:
+            self.flush()
+        except KafkaError as e:
+            logger.error("Could not send remaining messages to Apache Kafka server: " + str(e))
+
+        self.handle.close()
+        self.handle = None
+
+        if self.failed:
+            logger.warning(str(self.failed) + " of " + str(self.sent) + " messages could not be delivered to Apache Kafka server.")
@@ -17,14 +17,23 @@
 # limitations under the License.
 #
 
-from pbgpp.Output.Pipe import BGPPipe
+import sys
 
+from pbgpp.Output.Pipes.BufferedPipe import BufferedPipe
 
-class StdOutPipe(BGPPipe):
 
-    def __init__(self):
-        # No initialization required
-        pass
+class StdOutPipe(BufferedPipe):
 
-    def output(self, output):
-        print(output)
+    def __init__(self, binary=False, buffer_size=None, flush_interval=None):
+        # Interactive sessions show every message immediately
+        if flush_interval is None and sys.stdout.isatty():
+            flush_interval = 0
+
+        BufferedPipe.__init__(self, binary, buffer_size, flush_interval)
+
+        # Output is written to the underlying binary stream (Python 3) to avoid the text layer
+        self.stream = getattr(sys.stdout, "buffer", sys.stdout)
+
+    def write(self, data):
+        self.stream.write(data)
+        self.stream.flush()
@@ -28,3 +28,7 @@ class PCAPInformationError(PCAPError):
 
 class PCAPOfflineReaderError(PCAPError):
     pass
+
+
+class PCAPIndexError(PCAPError):
+    pass
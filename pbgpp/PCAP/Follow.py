@@ -0,0 +1,338 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import ctypes
+import ctypes.util
+import fnmatch
+import json
+import logging
+import os
+import select
+import time
+
+from pbgpp.PCAP.Exceptions import PCAPOfflineReaderError
+from pbgpp.PCAP.Index import PCAPTimeIndex
+from pbgpp.PCAP.Reader import PCAPFileReader
+from pbgpp.PCAP.RouteIndex import PCAPRouteIndex
+
+
+class PCAPChangeNotifier:
+    # Waits until something in a directory changes. Uses inotify on Linux and falls back to polling elsewhere
+    # (or if inotify is not available, e.g. no more watches left). Even with inotify wait() returns after the
+    # poll interval at the latest, so changes inotify doesn't report (e.g. on network file systems) are noticed.
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = 0x00000800
+
+    def __init__(self, directory, poll_interval=1.0):
+        logger = logging.getLogger("pbgpp.PCAPChangeNotifier")
+
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.fd = None
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(self.IN_NONBLOCK)
+
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+            mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+
+            if libc.inotify_add_watch(fd, directory.encode("utf-8"), mask) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+            self.fd = fd
+            logger.debug("Watching " + directory + " using inotify")
+        except (OSError, AttributeError, TypeError) as e:
+            # AttributeError: no inotify in the C library (e.g. macOS), TypeError: no C library found
+            logger.debug("inotify is not available (" + str(e) + ") - polling " + directory + " every " + str(poll_interval) + "s")
+
+    def wait(self):
+        # Returns True if a change was reported, False if the poll interval elapsed
+        if self.fd is None:
+            time.sleep(self.poll_interval)
+            return False
+
+        readable = select.select([self.fd], [], [], self.poll_interval)[0]
+
+        if not readable:
+            return False
+
+        # Events are only used as wake-up signal - drain them
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except OSError:
+            pass
+
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class PCAPCheckpoint:
+    # Position of the follower persisted as JSON: {"file": ..., "inode": ..., "offset": ...}
+    # Each frame is decoded on its own (BGP messages are not reassembled across TCP segments), so the position is all
+    # there is to restore. The file is replaced atomically, a crash while saving leaves the previous checkpoint.
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        logger = logging.getLogger("pbgpp.PCAPCheckpoint.load")
+
+        if not os.path.isfile(self.path):
+            return None
+
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+
+            return state["file"], state["inode"], int(state["offset"])
+        except (IOError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable checkpoint " + self.path + ": " + str(e))
+            return None
+
+    def save(self, path, inode, offset):
+        temporary = self.path + ".tmp"
+
+        with open(temporary, "w") as f:
+            json.dump({"file": path, "inode": inode, "offset": offset, "time": int(time.time())}, f)
+
+        os.rename(temporary, self.path)
+
+
+class PCAPFollower:
+    # Yields (header, payload) records of a pcap file that is still being written (follow mode) or of all files in
+    # a directory of rotated captures (e.g. tcpdump -G / -C), waiting for new data at the end. Incomplete records at
+    # the end of a file are picked up once they are complete (see PCAPFileReader.read_record()).
+    #
+    # In directory mode files are processed in the order they were written (modification time, then name). A file
+    # is finished once a newer file exists and it has been read to its end.
+
+    # Checkpoints are saved after this number of records or seconds (and by save_checkpoint())
+    CHECKPOINT_RECORDS = 10000
+    CHECKPOINT_SECONDS = 5.0
+
+    # Sidecar files that are never treated as captures
+    IGNORED_SUFFIXES = (PCAPTimeIndex.SUFFIX, PCAPRouteIndex.SUFFIX, ".tmp")
+
+    def __init__(self, path=None, directory=None, pattern="*", checkpoint=None, poll_interval=1.0, stop_at_end=False):
+        if (path is None) == (directory is None):
+            raise PCAPOfflineReaderError("either a file or a directory has to be followed")
+
+        self.path = os.path.abspath(path) if path is not None else None
+        self.directory = os.path.abspath(directory) if directory is not None else os.path.dirname(self.path)
+        self.pattern = pattern
+        self.checkpoint = PCAPCheckpoint(checkpoint) if checkpoint is not None else None
+        self.poll_interval = poll_interval
+
+        # Stop instead of waiting when there's no more data (reads everything that's available once)
+        self.stop_at_end = stop_at_end
+
+        # Current file and offset of the next record that has not been processed completely
+        self.current = None
+        self.handle = None
+        self.reader = None
+        self.offset = None
+
+        self.unsaved_records = 0
+        self.last_save = time.time()
+
+    def __iter__(self):
+        notifier = PCAPChangeNotifier(self.directory, self.poll_interval)
+
+        try:
+            self.__restore()
+
+            while True:
+                read = 0
+
+                if self.reader is None:
+                    self.__open_next()
+
+                if self.reader is not None:
+                    while True:
+                        record = self.reader.read_record()
+
+                        if record is None:
+                            break
+
+                        read += 1
+                        yield record
+                        self.__record_done()
+
+                    if read == 0 and self.__current_finished():
+                        continue
+
+                if read == 0:
+                    if self.stop_at_end:
+                        break
+
+                    notifier.wait()
+        finally:
+            notifier.close()
+            self.save_checkpoint()
+            self.__close()
+
+    def __restore(self):
+        logger = logging.getLogger("pbgpp.PCAPFollower.__restore")
+
+        if self.checkpoint is None:
+            return
+
+        state = self.checkpoint.load()
+
+        if state is None:
+            return
+
+        path, inode, offset = state
+
+        if not os.path.isfile(path) or os.stat(path).st_ino != inode or os.path.getsize(path) < offset:
+            logger.warning("Checkpoint " + self.checkpoint.path + " refers to a file that was replaced or removed - starting over")
+            return
+
+        if self.path is not None and path != self.path:
+            logger.warning("Checkpoint " + self.checkpoint.path + " belongs to another file - starting over")
+            return
+
+        if self.__open(path):
+            self.reader.seek(offset)
+            self.offset = offset
+            logger.info("Resuming " + path + " at offset " + str(offset))
+
+    def __candidates(self):
+        # Captures in the order they were written
+        if self.path is not None:
+            return [self.path] if os.path.isfile(self.path) else []
+
+        files = []
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+
+            if not fnmatch.fnmatch(name, self.pattern) or name.endswith(self.IGNORED_SUFFIXES) or not os.path.isfile(path):
+                continue
+
+            if self.checkpoint is not None and path == os.path.abspath(self.checkpoint.path):
+                continue
+
+            try:
+                files.append((os.path.getmtime(path), name, path))
+            except OSError:
+                # Removed in the meantime (e.g. tcpdump -W)
+                continue
+
+        return [f[2] for f in sorted(files)]
+
+    def __open(self, path):
+        logger = logging.getLogger("pbgpp.PCAPFollower.__open")
+
+        handle = open(path, "rb")
+
+        try:
+            reader = PCAPFileReader(handle)
+        except PCAPOfflineReaderError:
+            # The global header has not been written completely, yet
+            handle.close()
+            return False
+
+        self.__close()
+        self.current = path
+        self.handle = handle
+        self.reader = reader
+        self.offset = reader.offset
+
+        logger.info("Following " + path)
+        return True
+
+    def __open_next(self):
+        if self.path is not None:
+            if os.path.isfile(self.path):
+                self.__open(self.path)
+            return
+
+        candidates = self.__candidates()
+
+        if self.current is not None and self.current in candidates:
+            candidates = candidates[candidates.index(self.current) + 1:]
+
+        for path in candidates:
+            if path != self.current:
+                self.__open(path)
+                return
+
+    def __current_finished(self):
+        # Returns True if the reader was switched to another file (directory mode: a newer file exists,
+        # follow mode: the file was replaced or truncated)
+        if self.path is not None:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                return False
+
+            if stat.st_ino != os.fstat(self.handle.fileno()).st_ino or stat.st_size < self.reader.offset:
+                self.__close()
+                return self.__open(self.path)
+
+            return False
+
+        candidates = self.__candidates()
+
+        if self.current not in candidates or candidates.index(self.current) < len(candidates) - 1:
+            # Read anything that was written after the last read before switching
+            previous = self.current
+            self.__open_next()
+            return self.current != previous
+
+        return False
+
+    def __record_done(self):
+        self.offset = self.reader.offset
+        self.unsaved_records += 1
+
+        if self.checkpoint is None:
+            return
+
+        if self.unsaved_records >= self.CHECKPOINT_RECORDS or time.time() - self.last_save >= self.CHECKPOINT_SECONDS:
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        # Saves the offset of the next record that has not been processed
+        if self.checkpoint is None or self.reader is None:
+            return
+
+        self.checkpoint.save(self.current, os.fstat(self.handle.fileno()).st_ino, self.offset)
+        self.unsaved_records = 0
+        self.last_save = time.time()
+
+    def __close(self):
+        if self.handle is not None:
+            self.handle.close()
+
+        self.handle = None
+        self.reader = None
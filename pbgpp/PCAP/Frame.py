@@ -0,0 +1,83 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import struct
+
+from pbgpp.PCAP.CookedCapture import PCAPCookedCapture
+
+
+class PCAPFrame:
+    # Field offsets within raw captured frames. Pre-filters compare these bytes (or integers unpacked from them)
+    # directly, so frames of irrelevant peers or time windows are dropped before any PCAP object is created.
+
+    ETH_TYPE_IPV4 = b"\x08\x00"
+    PROTO_TCP = b"\x06"
+
+    # Length of the link layer header = offset of the IPv4 header
+    OFFSET_ETHERNET = 14
+    OFFSET_COOKED_CAPTURE = 16
+
+    # Relative to the start of the frame
+    OFFSET_MAC_DESTINATION = 0
+    OFFSET_MAC_SOURCE = 6
+
+    # Relative to the start of the IPv4 header
+    OFFSET_IP_PROTOCOL = 9
+    OFFSET_IP_SOURCE = 12
+    OFFSET_IP_DESTINATION = 16
+
+    # Link layer header of Ethernet frames converted to SLL (see to_cooked_capture()): packet type (sent to us),
+    # ARPHRD_ETHER and the length of the MAC address
+    COOKED_CAPTURE_PREFIX = b"\x00\x00\x00\x01\x00\x06"
+
+    # Unpacks an IPv4 address as integer: unpack_address(frame, offset)[0]
+    unpack_address = struct.Struct("!I").unpack_from
+
+    @staticmethod
+    def ip_offset(frame):
+        # Returns the offset of the IPv4 header of an Ethernet or Linux cooked capture (SLL) frame, None for any other frame
+        if frame[12:14] == PCAPFrame.ETH_TYPE_IPV4:
+            return PCAPFrame.OFFSET_ETHERNET
+
+        if frame[14:16] == PCAPFrame.ETH_TYPE_IPV4 and PCAPCookedCapture(frame).get_type() == PCAPCookedCapture.ETH_TYPE_IPV4:
+            return PCAPFrame.OFFSET_COOKED_CAPTURE
+
+        return None
+
+    @staticmethod
+    def to_ethernet(frame):
+        # Converts a Linux cooked capture (SLL) frame into an Ethernet frame. SLL only records the source MAC address,
+        # the destination address is left empty.
+        return b"\x00" * 6 + bytes(frame[6:12]) + bytes(frame[14:])
+
+    @staticmethod
+    def to_cooked_capture(frame):
+        # Converts an Ethernet frame into a Linux cooked capture (SLL) frame - the destination MAC address is lost
+        return PCAPFrame.COOKED_CAPTURE_PREFIX + bytes(frame[6:12]) + b"\x00\x00" + bytes(frame[12:])
+
+    @staticmethod
+    def is_tcp(frame, offset):
+        return frame[offset + PCAPFrame.OFFSET_IP_PROTOCOL:offset + PCAPFrame.OFFSET_IP_PROTOCOL + 1] == PCAPFrame.PROTO_TCP
+
+    @staticmethod
+    def flow_key(frame, offset):
+        # Returns a key of the TCP connection of a frame that is equal for both directions
+        ihl = (ord(frame[offset:offset + 1]) & 0x0f) * 4
+        source = frame[offset + PCAPFrame.OFFSET_IP_SOURCE:offset + PCAPFrame.OFFSET_IP_SOURCE + 4] + frame[offset + ihl:offset + ihl + 2]
+        destination = frame[offset + PCAPFrame.OFFSET_IP_DESTINATION:offset + PCAPFrame.OFFSET_IP_DESTINATION + 4] + frame[offset + ihl + 2:offset + ihl + 4]
+        return (source, destination) if source <= destination else (destination, source)
@@ -0,0 +1,222 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import logging
+import os
+import struct
+from bisect import bisect_left, bisect_right
+
+from pbgpp.PCAP.Exceptions import PCAPIndexError
+from pbgpp.PCAP.Reader import PCAPFileReader
+
+
+class PCAPTimeIndex:
+    # Sidecar time index of a pcap file (<file>.pbgppidx, written by "pbgpp index"). The records of the file are
+    # split into blocks of INTERVAL records; per block the file offset of its first record and the smallest and
+    # largest timestamp are stored. A time range is then mapped to a range of file offsets by two binary searches,
+    # so only the blocks overlapping the range are read. Timestamps are (seconds, microseconds) tuples.
+    #
+    # File format (little endian): header (magic, interval, indexed size of the pcap file, number of blocks)
+    # followed by one entry (offset, min seconds, min microseconds, max seconds, max microseconds) per block.
+
+    MAGIC = b"PBGPPTI1"
+    SUFFIX = ".pbgppidx"
+    DEFAULT_INTERVAL = 1000
+
+    HEADER = struct.Struct("<8sIQQ")
+    ENTRY = struct.Struct("<QIIII")
+
+    # Captures are not strictly ordered by time (e.g. merged captures) - without an index a scan stops
+    # once a record is more than this number of seconds after the end of the range
+    REORDER_TOLERANCE = 5
+
+    # Smallest step of the galloping search in bytes
+    GALLOP_STEP = 1048576
+
+    def __init__(self, interval, size, offsets, minimums, maximums):
+        self.interval = interval
+        self.size = size
+        self.offsets = offsets
+        self.minimums = minimums
+        self.maximums = maximums
+
+        # Running maximum and trailing minimum are monotonic and can be searched with bisect even if
+        # the timestamps in the capture are slightly out of order
+        self.running_max = []
+        self.trailing_min = [None] * len(minimums)
+
+        for ts in maximums:
+            self.running_max.append(ts if not self.running_max or ts > self.running_max[-1] else self.running_max[-1])
+
+        for i in range(len(minimums) - 1, -1, -1):
+            ts = minimums[i]
+            self.trailing_min[i] = ts if i == len(minimums) - 1 or ts < self.trailing_min[i + 1] else self.trailing_min[i + 1]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @staticmethod
+    def path_for(pcap_path):
+        return pcap_path + PCAPTimeIndex.SUFFIX
+
+    @classmethod
+    def build(cls, pcap_path, interval=DEFAULT_INTERVAL):
+        offsets = []
+        minimums = []
+        maximums = []
+
+        with open(pcap_path, "rb") as handle:
+            reader = PCAPFileReader(handle)
+            count = 0
+
+            while True:
+                offset = reader.offset
+                record = reader.read_record()
+
+                if record is None:
+                    break
+
+                ts = record[0].getts()
+
+                if count % interval == 0:
+                    offsets.append(offset)
+                    minimums.append(ts)
+                    maximums.append(ts)
+                else:
+                    if ts < minimums[-1]:
+                        minimums[-1] = ts
+                    if ts > maximums[-1]:
+                        maximums[-1] = ts
+
+                count += 1
+
+            # Only complete records are indexed - a file that is still written may be indexed again later
+            size = reader.offset
+
+        return cls(interval, size, offsets, minimums, maximums)
+
+    def write(self, path):
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.interval, self.size, len(self.offsets)))
+
+            for i in range(0, len(self.offsets)):
+                f.write(self.ENTRY.pack(self.offsets[i], self.minimums[i][0], self.minimums[i][1], self.maximums[i][0], self.maximums[i][1]))
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if len(data) < cls.HEADER.size:
+            raise PCAPIndexError("index file '" + path + "' is too short")
+
+        magic, interval, size, count = cls.HEADER.unpack_from(data, 0)
+
+        if magic != cls.MAGIC:
+            raise PCAPIndexError("'" + path + "' is no pbgpp time index")
+
+        if len(data) < cls.HEADER.size + count * cls.ENTRY.size:
+            raise PCAPIndexError("index file '" + path + "' is truncated")
+
+        offsets = []
+        minimums = []
+        maximums = []
+
+        for i in range(0, count):
+            entry = cls.ENTRY.unpack_from(data, cls.HEADER.size + i * cls.ENTRY.size)
+            offsets.append(entry[0])
+            minimums.append((entry[1], entry[2]))
+            maximums.append((entry[3], entry[4]))
+
+        return cls(interval, size, offsets, minimums, maximums)
+
+    @classmethod
+    def load(cls, pcap_path):
+        # Returns the index of the given pcap file or None if there is no usable index
+        logger = logging.getLogger("pbgpp.PCAPTimeIndex.load")
+        path = cls.path_for(pcap_path)
+
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            index = cls.read(path)
+        except (PCAPIndexError, IOError) as e:
+            logger.warning("Ignoring time index: " + str(e))
+            return None
+
+        # Files may only grow (e.g. a running capture) - the indexed part is still valid then
+        if os.path.getsize(pcap_path) < index.size:
+            logger.warning("Ignoring outdated time index '" + path + "' (pcap file is smaller than indexed)")
+            return None
+
+        return index
+
+    def seek_range(self, start, end):
+        # Returns the file offset to start reading at and the offset to stop at (None: read to the end of the file)
+        first = bisect_left(self.running_max, start)
+        start_offset = self.offsets[first] if first < len(self.offsets) else self.size
+
+        last = bisect_right(self.trailing_min, end)
+        stop_offset = self.offsets[last] if last < len(self.offsets) else None
+
+        return start_offset, stop_offset
+
+    @classmethod
+    def gallop(cls, reader, start):
+        # Fallback without index: returns the offset of a record before the given time (or of the first record).
+        # The distance to the read position is doubled until a later record is found (galloping), then the
+        # remaining interval is bisected. Record boundaries are found using PCAPFileReader.find_record().
+        target = (start[0] - cls.REORDER_TOLERANCE, start[1])
+        low = reader.offset
+
+        ts = reader.peek_timestamp(low)
+
+        if ts is None or ts >= target:
+            return low
+
+        high = None
+        step = cls.GALLOP_STEP
+
+        while high is None:
+            offset = reader.find_record(low + step)
+            ts = reader.peek_timestamp(offset) if offset is not None else None
+
+            if ts is None:
+                # Reached the end of the file
+                reader.handle.seek(0, 2)
+                high = reader.handle.tell()
+                reader.handle.seek(reader.offset)
+            elif ts >= target:
+                high = offset
+            else:
+                low = offset
+                step *= 2
+
+        while high - low > cls.GALLOP_STEP:
+            offset = reader.find_record((low + high) // 2)
+
+            if offset is None or offset >= high:
+                break
+
+            if reader.peek_timestamp(offset) < target:
+                low = offset
+            else:
+                high = offset
+
+        return low
@@ -20,12 +20,13 @@
 from binascii import hexlify
 
 import datetime
+import socket
 
 from pbgpp.PCAP.Exceptions import PCAPInformationError
 
 
 class PCAPInformation:
-    def __init__(self, ts, mac, ip, ports):
+    def __init__(self, ts, mac, ip, ports, frame=None, frame_length=None):
         if not isinstance(mac, PCAPLayer2Information):
             raise PCAPInformationError("parameter 'mac' must be instance of PCAPLayer2Information")
 
@@ -41,6 +42,10 @@ class PCAPInformation:
         self.ip = ip # (IP address set)
         self.ports = ports # (Port set)
 
+        # Captured frame and its original length on the wire (only known for captured traffic)
+        self.frame = frame
+        self.frame_length = frame_length
+
     def get_timestamp(self):
         return self.ts
 
@@ -114,11 +119,27 @@ class PCAPLayer3Information:
         self.destination = destination
 
     def get_source_string(self):
+        if len(self.source) == 16:
+            # IPv6 peers are only known from MRT input (see MRTPeerInformation)
+            return socket.inet_ntop(socket.AF_INET6, bytes(bytearray(self.source)))
+
         return str(self.source[0]) + "." + str(self.source[1]) + "." + str(self.source[2]) + "." + str(self.source[3])
 
     def get_destination_string(self):
+        if len(self.destination) == 16:
+            return socket.inet_ntop(socket.AF_INET6, bytes(bytearray(self.destination)))
+
         return str(self.destination[0]) + "." + str(self.destination[1]) + "." + str(self.destination[2]) + "." + str(self.destination[3])
 
+    @staticmethod
+    def string_to_tuple(address):
+        # Converts a dotted IP address string into the tuple representation used for source and destination
+        return tuple(bytearray(socket.inet_aton(address)))
+
+    @staticmethod
+    def tuple_to_int(address):
+        return (address[0] << 24) | (address[1] << 16) | (address[2] << 8) | address[3]
+
     def __str__(self):
         return "<PCAPLayer3Information source={0} destination={1}>".format(self.get_source_string(), self.get_destination_string())
 
@@ -0,0 +1,218 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import logging
+import struct
+
+from pbgpp.PCAP.Exceptions import PCAPOfflineReaderError
+
+
+class PCAPRecordHeader:
+    # Record header of a single captured packet. The interface mimics the Pkthdr objects of pcapy
+    # so that records read by PCAPFileReader can be passed to the same packet handlers.
+    def __init__(self, ts_sec, ts_usec, caplen, length):
+        self.ts_sec = ts_sec
+        self.ts_usec = ts_usec
+        self.caplen = caplen
+        self.length = length
+
+    def getts(self):
+        return self.ts_sec, self.ts_usec
+
+    def getcaplen(self):
+        return self.caplen
+
+    def getlen(self):
+        return self.length
+
+    def __str__(self):
+        return "<PCAPRecordHeader ts={0}.{1} caplen={2} length={3}>".format(self.ts_sec, self.ts_usec, self.caplen, self.length)
+
+
+class PCAPFileReader:
+    # Pure python reader for the classic libpcap file format. Unlike pcapy it works on any
+    # file-like object (pipes, sockets, in-memory buffers) and it knows the file offset of
+    # every record, which makes seeking and resuming possible.
+    MAGIC_MICROSECONDS = 0xa1b2c3d4
+    MAGIC_NANOSECONDS = 0xa1b23c4d
+
+    GLOBAL_HEADER_LENGTH = 24
+    RECORD_HEADER_LENGTH = 16
+
+    # Plausibility limits used to find record boundaries at arbitrary file offsets (see find_record())
+    MAX_RECORD_LENGTH = 262144
+    MAX_RECORD_GAP = 3600
+    SYNC_CHAIN = 3
+    SYNC_WINDOW = 65536
+
+    def __init__(self, handle):
+        self.handle = handle
+
+        # Values that need to be assigned due to parsing of the global header
+        self.byte_order = None
+        self.nanoseconds = False
+        self.version = None
+        self.snaplen = None
+        self.link_type = None
+
+        # Offset of the next record in the file
+        self.offset = 0
+
+        self.__parse_global_header()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        record = self.read_record()
+
+        if record is None:
+            raise StopIteration
+
+        return record
+
+    # Python 2 compatibility
+    next = __next__
+
+    def __parse_global_header(self):
+        header = self.__read(self.GLOBAL_HEADER_LENGTH)
+
+        if len(header) < self.GLOBAL_HEADER_LENGTH:
+            raise PCAPOfflineReaderError("input is too short to contain a pcap file header")
+
+        # The magic number tells us the byte order and the timestamp resolution of the file
+        magic = struct.unpack("<I", header[0:4])[0]
+
+        if magic == self.MAGIC_MICROSECONDS or magic == self.MAGIC_NANOSECONDS:
+            self.byte_order = "<"
+        else:
+            magic = struct.unpack(">I", header[0:4])[0]
+            self.byte_order = ">"
+
+        if magic == self.MAGIC_NANOSECONDS:
+            self.nanoseconds = True
+        elif magic != self.MAGIC_MICROSECONDS:
+            raise PCAPOfflineReaderError("input is not a pcap file (unknown magic number " + hex(magic) + ")")
+
+        fields = struct.unpack(self.byte_order + "HHiIII", header[4:24])
+        self.version = (fields[0], fields[1])
+        self.snaplen = fields[4]
+        self.link_type = fields[5]
+
+        self.offset = self.GLOBAL_HEADER_LENGTH
+
+    def __read(self, length):
+        data = self.handle.read(length)
+        return data if data is not None else b""
+
+    def read_record(self):
+        # Returns a tuple of (PCAPRecordHeader, payload) or None if there is no complete record left.
+        # An incomplete record at the end of the input is not consumed: if the handle is seekable we
+        # rewind to the beginning of that record so that a later call can pick it up once it's complete.
+        start = self.offset
+        record_header = self.__read(self.RECORD_HEADER_LENGTH)
+
+        if len(record_header) < self.RECORD_HEADER_LENGTH:
+            self.__rewind(start, len(record_header))
+            return None
+
+        ts_sec, ts_fraction, caplen, length = struct.unpack(self.byte_order + "IIII", record_header)
+        payload = self.__read(caplen)
+
+        if len(payload) < caplen:
+            self.__rewind(start, self.RECORD_HEADER_LENGTH + len(payload))
+            return None
+
+        if self.nanoseconds:
+            # pcapy always reports microseconds, so do we
+            ts_fraction //= 1000
+
+        self.offset = start + self.RECORD_HEADER_LENGTH + caplen
+        return PCAPRecordHeader(ts_sec, ts_fraction, caplen, length), payload
+
+    def seek(self, offset):
+        # Continue reading at the given file offset, which must be the beginning of a record
+        self.handle.seek(offset)
+        self.offset = offset
+
+    def peek_timestamp(self, offset):
+        # Returns the timestamp of the record at the given offset without changing the read position
+        self.handle.seek(offset)
+        record_header = self.__read(self.RECORD_HEADER_LENGTH)
+        self.handle.seek(self.offset)
+
+        if len(record_header) < self.RECORD_HEADER_LENGTH:
+            return None
+
+        ts_sec, ts_fraction = struct.unpack(self.byte_order + "II", record_header[0:8])
+        return ts_sec, ts_fraction // 1000 if self.nanoseconds else ts_fraction
+
+    def find_record(self, offset):
+        # Returns the offset of the first record at or after the given (arbitrary) file offset or None if there is none
+        # within SYNC_WINDOW bytes. pcap files contain no sync markers, so a record is assumed where SYNC_CHAIN record
+        # headers in a row have plausible lengths and timestamps (the same heuristic tcpslice uses).
+        max_caplen = self.snaplen if 0 < self.snaplen <= self.MAX_RECORD_LENGTH else self.MAX_RECORD_LENGTH
+        span = self.SYNC_WINDOW + self.SYNC_CHAIN * (self.RECORD_HEADER_LENGTH + max_caplen)
+
+        self.handle.seek(offset)
+        data = self.__read(span)
+        self.handle.seek(self.offset)
+
+        at_eof = len(data) < span
+
+        for position in range(0, min(self.SYNC_WINDOW, len(data))):
+            if self.__plausible_chain(data, position, max_caplen, at_eof):
+                return offset + position
+
+        return None
+
+    def __plausible_chain(self, data, position, max_caplen, at_eof):
+        fraction_limit = 1000000000 if self.nanoseconds else 1000000
+        header_format = self.byte_order + "IIII"
+        previous = None
+
+        for n in range(0, self.SYNC_CHAIN):
+            if position + self.RECORD_HEADER_LENGTH > len(data):
+                # A chain may end exactly at the end of the file
+                return at_eof and n > 0 and position == len(data)
+
+            ts_sec, ts_fraction, caplen, length = struct.unpack_from(header_format, data, position)
+
+            if ts_fraction >= fraction_limit or caplen > max_caplen or caplen > length or length > self.MAX_RECORD_LENGTH:
+                return False
+
+            if previous is not None and abs(ts_sec - previous) > self.MAX_RECORD_GAP:
+                return False
+
+            previous = ts_sec
+            position += self.RECORD_HEADER_LENGTH + caplen
+
+        return True
+
+    def __rewind(self, start, consumed):
+        logger = logging.getLogger("pbgpp.PCAPFileReader.__rewind")
+
+        if consumed == 0:
+            return
+
+        try:
+            self.handle.seek(-consumed, 1)
+        except Exception:
+            # Pipes and sockets can't be rewound - the truncated record is lost
+            logger.warning("Discarding truncated pcap record at offset " + str(start) + ".")
@@ -0,0 +1,290 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import logging
+import os
+import struct
+
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.PCAP.Exceptions import PCAPIndexError
+
+
+class PCAPRouteIndex:
+    # Inverted index of a pcap file (<file>.pbgpprix, written by "pbgpp index --routes"): maps every announced or
+    # withdrawn prefix and every origin AS (last ASN of an AS_PATH segment, see LastASNFilter) to the file offsets of
+    # the records containing it. Queries only read the sorted directories and the posting lists of the hits.
+    #
+    # Prefixes are only meaningful if the file is queried with the ADD-PATH setting (--add-path-metric) it was indexed
+    # with, so the setting is part of the header and indexes of other settings are ignored.
+    #
+    # File format (little endian): header (magic, indexed size of the pcap file, number of prefixes, number of ASN,
+    # ADD-PATH setting),
+    # prefix directory, ASN directory and posting lists. Directory entries are (key, posting offset, posting length),
+    # sorted by key - prefix keys are network << 8 | length. Posting lists are ascending record offsets stored as
+    # deltas in LEB128 variable length integers.
+
+    MAGIC = b"PBGPPRI2"
+    SUFFIX = ".pbgpprix"
+
+    # Indexes of the first format don't record the ADD-PATH setting and need to be rebuilt
+    MAGIC_V1 = b"PBGPPRI1"
+
+    HEADER = struct.Struct("<8sQIIB")
+    ENTRY = struct.Struct("<QQI")
+
+    KEY_PREFIX = "prefix"
+    KEY_ORIGIN = "origin"
+
+    def __init__(self, handle, size, prefix_count, asn_count, add_path=0):
+        self.handle = handle
+        self.size = size
+        self.add_path = add_path
+
+        self.prefixes = handle.read(prefix_count * self.ENTRY.size)
+        self.asns = handle.read(asn_count * self.ENTRY.size)
+        self.postings_start = self.HEADER.size + len(self.prefixes) + len(self.asns)
+
+        if len(self.prefixes) + len(self.asns) != (prefix_count + asn_count) * self.ENTRY.size:
+            raise PCAPIndexError("route index is truncated")
+
+    @staticmethod
+    def path_for(pcap_path):
+        return pcap_path + PCAPRouteIndex.SUFFIX
+
+    @staticmethod
+    def prefix_key(network, length):
+        return (network << 8) | length
+
+    @classmethod
+    def load(cls, pcap_path, add_path=0):
+        # Returns the route index of the given pcap file or None if there is no usable index for the given ADD-PATH
+        # setting (see AddPathFlag)
+        logger = logging.getLogger("pbgpp.PCAPRouteIndex.load")
+        path = cls.path_for(pcap_path)
+
+        if not os.path.isfile(path):
+            return None
+
+        handle = open(path, "rb")
+
+        try:
+            header = handle.read(cls.HEADER.size)
+
+            if header[0:8] == cls.MAGIC_V1:
+                raise PCAPIndexError("route index '" + path + "' has an old format - rebuild it using pbgpp index --routes")
+
+            if len(header) < cls.HEADER.size or header[0:8] != cls.MAGIC:
+                raise PCAPIndexError("'" + path + "' is no pbgpp route index")
+
+            magic, size, prefix_count, asn_count, index_add_path = cls.HEADER.unpack(header)
+
+            if index_add_path != add_path:
+                raise PCAPIndexError("route index '" + path + "' was built with --add-path-metric " + str(index_add_path) + ", not " + str(add_path))
+
+            if os.path.getsize(pcap_path) < size:
+                raise PCAPIndexError("route index '" + path + "' is outdated (pcap file is smaller than indexed)")
+
+            return cls(handle, size, prefix_count, asn_count, add_path)
+        except PCAPIndexError as e:
+            handle.close()
+            logger.warning("Ignoring route index: " + str(e))
+            return None
+
+    def close(self):
+        self.handle.close()
+
+    def __lower_bound(self, directory, key):
+        # Index of the first directory entry with a key >= the given key
+        low = 0
+        high = len(directory) // self.ENTRY.size
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self.ENTRY.unpack_from(directory, middle * self.ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def __postings(self, entry):
+        key, offset, length = entry
+        self.handle.seek(self.postings_start + offset)
+        return self.decode(self.handle.read(length))
+
+    def __lookup_range(self, directory, first_key, last_key, accept=None):
+        # Union of the posting lists of all keys from first_key to last_key
+        offsets = set()
+        i = self.__lower_bound(directory, first_key)
+
+        while i * self.ENTRY.size < len(directory):
+            entry = self.ENTRY.unpack_from(directory, i * self.ENTRY.size)
+
+            if entry[0] > last_key:
+                break
+
+            if accept is None or accept(entry[0]):
+                offsets.update(self.__postings(entry))
+
+            i += 1
+
+        return offsets
+
+    def lookup_prefix(self, network, length, mode=BGPPrefixTrie.MODE_EXACT):
+        # Record offsets of all records containing the prefix (or a more/less specific one, see BGPPrefixTrie modes)
+        if mode == BGPPrefixTrie.MODE_OR_LONGER:
+            last = network | ((1 << (32 - length)) - 1)
+            return self.__lookup_range(self.prefixes, self.prefix_key(network, length), self.prefix_key(last, 32),
+                                       lambda key: key & 0xff >= length)
+
+        if mode == BGPPrefixTrie.MODE_OR_SHORTER:
+            offsets = set()
+
+            for l in range(0, length + 1):
+                key = self.prefix_key(network & ~((1 << (32 - l)) - 1) & 0xffffffff, l)
+                offsets.update(self.__lookup_range(self.prefixes, key, key))
+
+            return offsets
+
+        key = self.prefix_key(network, length)
+        return self.__lookup_range(self.prefixes, key, key)
+
+    def lookup_origin(self, asn):
+        return self.__lookup_range(self.asns, asn, asn)
+
+    def query(self, constraints):
+        # Constraints are linked with a logical AND, the keys of one constraint with a logical OR (like filters)
+        # Keys are (KEY_PREFIX, version, network, length, mode) or (KEY_ORIGIN, asn). Returns sorted record offsets.
+        result = None
+
+        for keys in constraints:
+            offsets = set()
+
+            for key in keys:
+                if key[0] == self.KEY_PREFIX:
+                    if key[1] == 4:
+                        offsets.update(self.lookup_prefix(key[2], key[3], key[4]))
+                else:
+                    offsets.update(self.lookup_origin(key[1]))
+
+            result = offsets if result is None else result & offsets
+
+        return sorted(result) if result is not None else []
+
+    @staticmethod
+    def encode(offsets):
+        data = bytearray()
+        previous = 0
+
+        for offset in offsets:
+            value = offset - previous
+            previous = offset
+
+            while value >= 0x80:
+                data.append((value & 0x7f) | 0x80)
+                value >>= 7
+
+            data.append(value)
+
+        return bytes(data)
+
+    @staticmethod
+    def decode(data):
+        offsets = []
+        previous = 0
+        value = 0
+        shift = 0
+
+        for byte in bytearray(data):
+            value |= (byte & 0x7f) << shift
+
+            if byte & 0x80:
+                shift += 7
+            else:
+                previous += value
+                offsets.append(previous)
+                value = 0
+                shift = 0
+
+        return offsets
+
+
+class PCAPRouteIndexBuilder:
+    # Collects the keys of decoded BGP messages per record offset and writes a PCAPRouteIndex file.
+    # Posting lists are kept encoded while building, so memory grows with the number of hits and not with the capture.
+
+    def __init__(self, add_path=0):
+        self.add_path = add_path
+
+        # key -> [last record offset, encoded deltas]
+        self.prefixes = {}
+        self.asns = {}
+        self.size = 0
+
+    @staticmethod
+    def __append(postings, key, offset):
+        entry = postings.get(key)
+
+        if entry is None:
+            postings[key] = [offset, bytearray(PCAPRouteIndex.encode([offset]))]
+        elif entry[0] != offset:
+            entry[1].extend(PCAPRouteIndex.encode([offset - entry[0]]))
+            entry[0] = offset
+
+    def add(self, offset, message):
+        # Offsets must be added in ascending order
+        if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
+            return
+
+        for routes in (message.nlri, message.withdrawn_routes):
+            for route in routes:
+                self.__append(self.prefixes, PCAPRouteIndex.prefix_key(route.prefix_decimal, route.prefix_length_decimal), offset)
+
+        for attribute in message.path_attributes:
+            if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_AS_PATH:
+                continue
+
+            for path_segment in attribute.path_segments:
+                if len(path_segment.segments) > 0:
+                    self.__append(self.asns, path_segment.segments[-1], offset)
+
+    def write(self, path):
+        directories = []
+        postings = []
+        position = 0
+
+        for keys in (self.prefixes, self.asns):
+            directory = []
+
+            for key in sorted(keys):
+                data = keys[key][1]
+                directory.append(PCAPRouteIndex.ENTRY.pack(key, position, len(data)))
+                postings.append(data)
+                position += len(data)
+
+            directories.append(b"".join(directory))
+
+        with open(path, "wb") as f:
+            f.write(PCAPRouteIndex.HEADER.pack(PCAPRouteIndex.MAGIC, self.size, len(self.prefixes), len(self.asns), self.add_path))
+            f.write(directories[0])
+            f.write(directories[1])
+
+            for data in postings:
+                f.write(data)
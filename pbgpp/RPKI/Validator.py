@@ -0,0 +1,186 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: Tobias Hannaske <tobias.hannaske@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import csv
+import json
+import logging
+import threading
+
+from pbgpp.BGP.Exceptions import BGPPrefixTrieError
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.RPKI.Exceptions import RPKIVRPFileError
+
+
+class RPKIValidator:
+    # Route origin validation (RFC 6811) against a local export of validated ROA payloads (VRPs), e.g.
+    #   rpki-client -j / Routinator --format json: {"roas": [{"asn": "AS13335", "prefix": "1.0.0.0/24", "maxLength": 24, ...}]}
+    #   rpki-client -c / Routinator --format csv:  AS13335,1.0.0.0/24,24,apnic
+    #
+    # VRPs are stored in a prefix trie with a list of (max length, ASN) per prefix. A route is validated by walking
+    # the covering prefixes only, so a lookup takes one node per prefix bit. Results are cached per (prefix, origin).
+
+    STATE_VALID = "valid"
+    STATE_INVALID = "invalid"
+    STATE_NOT_FOUND = "not-found"
+    STATES = [STATE_VALID, STATE_INVALID, STATE_NOT_FOUND]
+
+    # Maximum number of cached validation results
+    CACHE_SIZE = 1048576
+
+    def __init__(self, path):
+        self.path = path
+
+        # Index and cache are replaced together when the VRP file is reloaded
+        self.index = (self.load(path), {})
+
+    @staticmethod
+    def load(path):
+        logger = logging.getLogger("pbgpp.RPKIValidator.load")
+        trie = BGPPrefixTrie()
+        count = 0
+
+        try:
+            with open(path, "r") as f:
+                content = f.read()
+        except IOError as e:
+            raise RPKIVRPFileError("could not read VRP file '" + str(path) + "': " + str(e))
+
+        vrps = RPKIValidator.parse_json(content) if content.lstrip()[0:1] == "{" else RPKIValidator.parse_csv(content)
+
+        for prefix, max_length, asn in vrps:
+            try:
+                version, network, length = BGPPrefixTrie.parse_prefix(prefix)
+            except BGPPrefixTrieError as e:
+                raise RPKIVRPFileError("invalid VRP in '" + str(path) + "': " + e.message)
+
+            trie.insert(version, network, length, (length if max_length is None else max_length, asn))
+            count += 1
+
+        logger.info("Loaded " + str(count) + " VRPs for " + str(len(trie)) + " prefixes from " + str(path))
+        return trie
+
+    @staticmethod
+    def parse_asn(asn):
+        # ASN may be given as integer or as string with or without AS prefix
+        if isinstance(asn, int):
+            return asn
+
+        asn = str(asn).strip()
+        return int(asn[2:] if asn[0:2].upper() == "AS" else asn)
+
+    @staticmethod
+    def parse_json(content):
+        try:
+            data = json.loads(content)
+            return [(vrp["prefix"], vrp.get("maxLength"), RPKIValidator.parse_asn(vrp["asn"])) for vrp in data["roas"]]
+        except (ValueError, KeyError, TypeError) as e:
+            raise RPKIVRPFileError("could not parse JSON VRP file: " + str(e))
+
+    @staticmethod
+    def parse_csv(content):
+        vrps = []
+
+        for row in csv.reader(content.splitlines()):
+            if len(row) < 3:
+                continue
+
+            try:
+                asn = RPKIValidator.parse_asn(row[0])
+            except ValueError:
+                # Header line (e.g. ASN,IP Prefix,Max Length,Trust Anchor)
+                continue
+
+            try:
+                max_length = int(row[2]) if row[2].strip() else None
+            except ValueError:
+                raise RPKIVRPFileError("invalid max length in CSV VRP file: " + ",".join(row))
+
+            vrps.append((row[1].strip(), max_length, asn))
+
+        return vrps
+
+    def reload(self):
+        # Build the new index completely before replacing the old one - messages are validated against
+        # either the old or the new VRPs but never against a half loaded index
+        logger = logging.getLogger("pbgpp.RPKIValidator.reload")
+
+        try:
+            self.index = (self.load(self.path), {})
+        except RPKIVRPFileError as e:
+            logger.error("Reloading VRPs failed, keeping previous VRPs: " + e.message)
+
+    def reload_in_background(self):
+        # Used by the SIGHUP handler, so message processing is not blocked while loading
+        thread = threading.Thread(target=self.reload)
+        thread.daemon = True
+        thread.start()
+
+    def validate(self, version, network, length, origin):
+        # Validate a single route - origin is None if the origin AS can't be determined (e.g. AS_SET)
+        trie, cache = self.index
+        key = (version, network, length, origin)
+        state = cache.get(key)
+
+        if state is not None:
+            return state
+
+        state = self.STATE_NOT_FOUND
+
+        for vrp_length, vrps in trie.covering(version, network, length):
+            # A covering VRP makes the route at least invalid
+            state = self.STATE_INVALID
+
+            for max_length, asn in vrps:
+                if origin is not None and asn == origin and asn != 0 and length <= max_length:
+                    state = self.STATE_VALID
+                    break
+
+            if state == self.STATE_VALID:
+                break
+
+        if len(cache) >= self.CACHE_SIZE:
+            cache.clear()
+
+        cache[key] = state
+        return state
+
+    @staticmethod
+    def origin(message):
+        # The origin AS is the last ASN of the AS_PATH if it's part of an AS_SEQUENCE (RFC 6811)
+        for attribute in message.path_attributes:
+            if attribute.type != BGPStatics.UPDATE_ATTRIBUTE_AS_PATH:
+                continue
+
+            if len(attribute.path_segments) > 0:
+                segment = attribute.path_segments[-1]
+
+                if segment.segment_type == BGPStatics.AS_PATH_SEGMENT_SEQUENCE and len(segment.segments) > 0:
+                    return segment.segments[-1]
+
+            return None
+
+        return None
+
+    def validate_message(self, message):
+        # Tags the announced prefixes of an UPDATE message with one validation state per prefix
+        if message.type != BGPStatics.MESSAGE_TYPE_UPDATE:
+            return
+
+        origin = self.origin(message)
+        message.rov = [self.validate(r.version, r.prefix_decimal, r.prefix_length_decimal, origin) for r in message.nlri]
@@ -18,8 +18,55 @@
 #
 
 import unittest
+from binascii import unhexlify
+
 import pbgpp
+from pbgpp.Application.Flags.AddPathFlag import AddPathFlag
+from pbgpp.Application.Flags.DecodePlanFlag import DecodePlanFlag
+from pbgpp.BGP.Message import BGPMessage
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.Output.Filters.NextHopFilter import NextHopFilter
+from pbgpp.Output.Formatters.LineBased import LineBasedFormatter
 
 
 class UpdateTestCase(unittest.TestCase):
-    pass
+
+    """
+    VALID_UPDATE_MESSAGE (without marker)
+
+    | 00 35 02 | 00 00 | 00 12 | 40 01 01 00 | 40 02 04 02 01 fd e8 | 40 03 04 0a 00 00 01 | 18 1e 0a 00 | 10 0a 0b |
+    | Header   | Withdrawn length | Attributes length | ORIGIN | AS_PATH | NEXT_HOP | NLRI 30.10.0.0/24 | NLRI 10.11.0.0/16 |
+    """
+    VALID_UPDATE_MESSAGE = "00300200000012400101004002040201fde84003040a000001181e0a00100a0b"
+
+    def parse(self, plan=None):
+        flags = {"addpath": AddPathFlag(), "decodeplan": DecodePlanFlag(plan)}
+        return BGPMessage.factory(unhexlify(self.VALID_UPDATE_MESSAGE), None, flags)
+
+    def test_update_message(self):
+        message = self.parse()
+
+        self.assertFalse(message.error)
+        self.assertEqual(message.subtype, BGPStatics.UPDATE_TYPE_ANNOUNCE)
+        self.assertEqual([a.type for a in message.path_attributes], [1, 2, 3])
+        self.assertEqual([str(r) for r in message.nlri], ["30.10.0.0/24", "10.11.0.0/16"])
+
+    def test_malformed_attribute(self):
+        # The AS_PATH attribute is cut off - attributes parsed before are kept, but the error is reported
+        flags = {"addpath": AddPathFlag(), "decodeplan": DecodePlanFlag()}
+        message = BGPMessage.factory(unhexlify("001d0200000010400101004002"), None, flags)
+
+        self.assertTrue(message.error)
+        self.assertEqual([a.type for a in message.path_attributes], [BGPStatics.UPDATE_ATTRIBUTE_ORIGIN])
+
+    def test_decode_plan(self):
+        plan = LineBasedFormatter(fields=["timestamp", "type", "subtype", "next_hop"]).decode_plan()
+        message = self.parse(plan)
+
+        self.assertEqual(message.subtype, BGPStatics.UPDATE_TYPE_ANNOUNCE)
+        self.assertEqual([a.type for a in message.path_attributes], [BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP])
+        self.assertEqual(message.nlri, [])
+
+        plan.require_filter(NextHopFilter(["10.0.0.1"]))
+        self.assertEqual(plan.attributes, set([BGPStatics.UPDATE_ATTRIBUTE_NEXT_HOP]))
+        self.assertFalse(plan.nlri)
@@ -0,0 +1,127 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import io
+import struct
+import threading
+import time
+import unittest
+from binascii import unhexlify
+
+from pbgpp.Application.Pipeline import PBGPPPipeline
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.BMP.Client import BMPReplayClient
+from pbgpp.BMP.Listener import BMPListener
+from pbgpp.BMP.Statics import BMPStatics
+from pbgpp.MRT.Statics import MRTStatics
+
+
+class BMPTestCase(unittest.TestCase):
+    KEEPALIVE = "ffffffffffffffffffffffffffffffff001304"
+    UPDATE = "ffffffffffffffffffffffffffffffff002d0200000012400101004002040201fde84003040a000001181e0a00"
+    OPEN = "ffffffffffffffffffffffffffffffff001d0104fde800b40a00000100"
+    NOTIFICATION = "ffffffffffffffffffffffffffffffff0015030400"
+
+    def test_route_monitoring(self):
+        pipeline = PBGPPPipeline()
+        payload = BMPReplayClient.peer_header((10, 0, 0, 1), 65000, (5, 6)) + unhexlify(self.UPDATE)
+        messages = pipeline.process_bmp(BMPStatics.MESSAGE_TYPE_ROUTE_MONITORING, payload, (192, 0, 2, 1))
+
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(str(messages[0].nlri[0]), "30.10.0.0/24")
+
+        information = messages[0].pcap_information
+        self.assertEqual(information.get_timestamp(), (5, 6))
+        self.assertEqual(information.get_ip().get_source_string(), "10.0.0.1")
+        self.assertEqual(information.get_ip().get_destination_string(), "192.0.2.1")
+        self.assertEqual(information.get_source_as(), 65000)
+        self.assertEqual(information.get_peer_header().asn, 65000)
+
+    def test_peer_up_and_down(self):
+        pipeline = PBGPPPipeline(PBGPPPipeline.build_filters({"filter_message_type": ["OPEN", "NOTIFICATION"]})[0])
+        peer_header = BMPReplayClient.peer_header((10, 0, 0, 1), 65001, (5, 0))
+
+        payload = peer_header + b"\x00" * 12 + bytes(bytearray([10, 0, 0, 2])) + struct.pack("!HH", 179, 40000) + unhexlify(self.OPEN) * 2
+        messages = pipeline.process_bmp(BMPStatics.MESSAGE_TYPE_PEER_UP, payload)
+
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_OPEN] * 2)
+        self.assertEqual(messages[0].pcap_information.get_ip().get_source_string(), "10.0.0.2")
+        self.assertEqual(messages[0].pcap_information.get_ports().get_source_string(), "179")
+        self.assertEqual(messages[1].pcap_information.get_source_as(), 65001)
+
+        payload = peer_header + struct.pack("!B", BMPStatics.PEER_DOWN_REMOTE_NOTIFICATION) + unhexlify(self.NOTIFICATION)
+        messages = pipeline.process_bmp(BMPStatics.MESSAGE_TYPE_PEER_DOWN, payload)
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_NOTIFICATION])
+
+        # Truncated messages are discarded
+        self.assertEqual(pipeline.process_bmp(BMPStatics.MESSAGE_TYPE_PEER_UP, peer_header), [])
+
+    def test_listener(self):
+        messages = []
+        loop = asyncio.new_event_loop()
+        listener = BMPListener("127.0.0.1", 0, PBGPPPipeline.from_options({"filter_message_type": ["UPDATE"]}), messages.append, workers=2)
+        loop.run_until_complete(listener.start())
+
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+
+        try:
+            record = struct.pack("!IIHH4B4B", 65000, 65001, 0, MRTStatics.AFI_IPV4, 10, 0, 0, 1, 10, 0, 0, 2)
+            mrt = b""
+
+            for i in range(100):
+                for bgp in (self.KEEPALIVE, self.UPDATE):
+                    body = record + unhexlify(bgp)
+                    mrt += struct.pack("!IHHI", i, MRTStatics.TYPE_BGP4MP, MRTStatics.BGP4MP_MESSAGE_AS4, len(body)) + body
+
+            clients = [BMPReplayClient("127.0.0.1", listener.get_port()) for _ in range(3)]
+
+            for client in clients:
+                client.connect()
+                self.assertEqual(client.replay(io.BytesIO(mrt), mrt=True), 200)
+
+            for client in clients:
+                client.close()
+
+            deadline = time.time() + 10
+
+            while len(messages) < 300 and time.time() < deadline:
+                time.sleep(0.01)
+
+            self.assertEqual(len(messages), 300)
+            self.assertEqual(messages[0].pcap_information.get_source_as(), 65000)
+            self.assertEqual(messages[0].pcap_information.get_router(), (127, 0, 0, 1))
+
+            # Workers decode concurrently but evaluate messages one at a time - no message is lost from the counter
+            self.assertEqual(listener.pipeline.packet_counter, 600)
+        finally:
+            asyncio.run_coroutine_threadsafe(listener.close(), loop).result(10)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def test_address_to_tuple(self):
+        self.assertEqual(BMPListener.address_to_tuple("192.0.2.1"), (192, 0, 2, 1))
+        self.assertEqual(BMPListener.address_to_tuple("::ffff:192.0.2.1"), (192, 0, 2, 1))
+        self.assertEqual(len(BMPListener.address_to_tuple("2001:db8::1")), 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import tempfile
+import unittest
+from binascii import unhexlify
+
+from pbgpp.Application.Flags.AddPathFlag import AddPathFlag
+from pbgpp.BGP.Exceptions import BGPIntervalSetError
+from pbgpp.BGP.Header.Message import BGPHeaderMessage
+from pbgpp.BGP.IntervalSet import BGPASNIntervalSet, BGPPrefixIntervalSet
+from pbgpp.BGP.Message import BGPMessage
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filter import BGPFilter
+from pbgpp.Output.FilterChain import BGPFilterChain
+from pbgpp.Output.Filters.ASNFilter import ASNFilter
+from pbgpp.Output.Filters.ASNListFilter import ASNListFilter
+from pbgpp.Output.Filters.ASPathRegexFilter import ASPathRegexFilter
+from pbgpp.Output.Filters.BlackholeFilter import BlackholeFilter
+from pbgpp.Output.Filters.ExpressionFilter import ExpressionFilter
+from pbgpp.Output.Filters.IPDestinationFilter import IPDestinationFilter
+from pbgpp.Output.Filters.IPSourceFilter import IPSourceFilter
+from pbgpp.Output.Filters.LargeCommunityFilter import LargeCommunityFilter
+from pbgpp.Output.Filters.MACDestinationFilter import MACDestinationFilter
+from pbgpp.Output.Filters.MACSourceFilter import MACSourceFilter
+from pbgpp.Output.Filters.MessageSizeFilter import MessageSizeFilter
+from pbgpp.Output.Filters.MessageTypeFilter import MessageTypeFilter
+from pbgpp.Output.Filters.NextHopFilter import NextHopFilter
+from pbgpp.Output.Filters.NLRIFilter import NLRIFilter
+from pbgpp.Output.Filters.PrefixListFilter import PrefixListFilter
+from pbgpp.Output.Filters.TimestampRangeFilter import TimestampRangeFilter
+from pbgpp.PCAP.Information import PCAPInformation, PCAPLayer2Information, PCAPLayer3Information, PCAPLayer4Information
+
+
+class FilterTestCase(unittest.TestCase):
+
+    """
+    UPDATE_MESSAGE (without marker)
+
+    | 00 3c 02 | 00 00 | 00 21 | ORIGIN | AS_PATH 65000 | NEXT_HOP 10.0.0.1 | LARGE_COMMUNITIES 1:2:3 | NLRI 30.10.0.0/24 |
+    """
+    UPDATE_MESSAGE = "003c0200000021400101004002040201fde84003040a000001c0200c000000010000000200000003181e0a00"
+
+    def setUp(self):
+        self.message = BGPMessage.factory(unhexlify(self.UPDATE_MESSAGE), None, {"addpath": AddPathFlag()})
+
+    def test_compiled_values(self):
+        self.assertTrue(ASNFilter(["65000"]).match(self.message))
+        self.assertFalse(ASNFilter(["~65000"]).match(self.message))
+        self.assertTrue(NextHopFilter(["10.0.0.1"]).match(self.message))
+        self.assertTrue(NLRIFilter(["30.10.0.0/24"]).match(self.message))
+        self.assertTrue(MessageTypeFilter(["2"]).match(self.message))
+
+        with self.assertRaises(OutputFilterError):
+            MessageTypeFilter(["FOO"])
+
+        with self.assertRaises(OutputFilterError):
+            BlackholeFilter(["80.81.193.x"])
+
+    def test_prefix_modes(self):
+        self.assertFalse(NLRIFilter(["30.10.0.0/16"]).match(self.message))
+        self.assertTrue(NLRIFilter(["30.10.0.0/16"], BGPPrefixTrie.MODE_OR_LONGER).match(self.message))
+        self.assertFalse(NLRIFilter(["30.10.0.0/16"], BGPPrefixTrie.MODE_OR_SHORTER).match(self.message))
+        self.assertTrue(NLRIFilter(["30.10.0.128/25"], BGPPrefixTrie.MODE_OR_SHORTER).match(self.message))
+        self.assertFalse(NLRIFilter(["~30.10.0.0/24"]).match(self.message))
+        self.assertTrue(NextHopFilter(["10.0.0.0/8"]).match(self.message))
+
+    def test_prefix_trie(self):
+        trie = BGPPrefixTrie(["10.0.0.0/8", "10.1.0.0/16", "2001:db8::/32", "10.1.0.0/16"])
+
+        self.assertEqual(len(trie), 3)
+        self.assertTrue(trie.lookup("10.1.0.0/16"))
+        self.assertFalse(trie.lookup("10.1.2.0/24"))
+        self.assertEqual(trie.count(*BGPPrefixTrie.parse_prefix("10.1.2.0/24"), mode=BGPPrefixTrie.MODE_OR_LONGER), 2)
+        self.assertEqual(trie.count(*BGPPrefixTrie.parse_prefix("10.0.0.0/7"), mode=BGPPrefixTrie.MODE_OR_SHORTER), 2)
+        self.assertTrue(trie.lookup("2001:db8:1::/48", BGPPrefixTrie.MODE_OR_LONGER))
+        self.assertFalse(trie.lookup("11.0.0.0/8", BGPPrefixTrie.MODE_OR_LONGER))
+
+        with self.assertRaises(OutputFilterError):
+            NLRIFilter(["10.0.0.0/33"])
+
+    def test_interval_set(self):
+        prefixes = BGPPrefixIntervalSet()
+
+        for p in ["10.0.0.0/25", "10.0.0.128/25", "192.168.0.0/16", "10.0.0.64/26", "2001:db8::/32"]:
+            prefixes.add(p)
+
+        prefixes.freeze()
+
+        self.assertEqual(len(prefixes), 3)
+        self.assertTrue(prefixes.covers(*BGPPrefixTrie.parse_prefix("10.0.0.0/24")))
+        self.assertTrue(prefixes.covers(*BGPPrefixTrie.parse_prefix("192.168.1.0/24")))
+        self.assertFalse(prefixes.covers(*BGPPrefixTrie.parse_prefix("192.0.0.0/8")))
+        self.assertFalse(prefixes.covers(*BGPPrefixTrie.parse_prefix("10.0.1.0/24")))
+        self.assertTrue(prefixes.covers(*BGPPrefixTrie.parse_prefix("2001:db8:1::/48")))
+
+        asns = BGPASNIntervalSet()
+        asns.add_range("AS64512-65534")
+        asns.add_range("23456")
+        asns.freeze()
+
+        self.assertTrue(asns.contains(65000))
+        self.assertTrue(asns.contains(23456))
+        self.assertFalse(asns.contains(3356))
+
+        with self.assertRaises(BGPIntervalSetError):
+            BGPPrefixIntervalSet().add("10.1/16")
+
+    def test_list_files(self):
+        handle, prefix_path = tempfile.mkstemp()
+
+        with os.fdopen(handle, "w") as f:
+            f.write("# bogons\n10.0.0.0/8\n30.10.0.0/16 le 24\n")
+
+        handle, asn_path = tempfile.mkstemp()
+
+        with os.fdopen(handle, "w") as f:
+            f.write("64512-65534\nAS0\n")
+
+        try:
+            self.assertTrue(PrefixListFilter([prefix_path]).match(self.message))
+            self.assertFalse(PrefixListFilter(["~" + prefix_path]).match(self.message))
+            self.assertTrue(ASNListFilter([asn_path]).match(self.message))
+            self.assertTrue(ExpressionFilter(["prefix-list-file " + prefix_path + " and not asn-list-file ~" + asn_path]).match(self.message))
+
+            with self.assertRaises(OutputFilterError):
+                ASNListFilter([prefix_path])
+        finally:
+            os.remove(prefix_path)
+            os.remove(asn_path)
+
+    def test_as_path_regex(self):
+        self.assertTrue(ASPathRegexFilter(["_65000_"]).match(self.message))
+        self.assertTrue(ASPathRegexFilter(["^65000$"]).match(self.message))
+        self.assertFalse(ASPathRegexFilter(["_6500_", "^$"]).match(self.message))
+        self.assertFalse(ASPathRegexFilter(["~_65000_"]).match(self.message))
+
+        f = ASPathRegexFilter(["_(\\d+)_\\1_"])
+        self.assertFalse(f.match(self.message))
+        self.assertEqual(len(f.cache), 1)
+        self.assertTrue(f.match_path("174 65000 65000 3356"))
+        self.assertTrue(ASPathRegexFilter(["^174 (.*) 3356$"]).match_path("174 6939 3356"))
+
+        with self.assertRaises(OutputFilterError):
+            ASPathRegexFilter(["(65000"])
+
+    def test_expression(self):
+        self.assertTrue(ExpressionFilter(["type UPDATE and (as 65000 or next-hop 1.2.3.4) and not as-path-regex '^1 '"]).match(self.message))
+        self.assertFalse(ExpressionFilter(["not (nlri 30.10.0.0/24 or community 65535:666)"]).match(self.message))
+        self.assertTrue(ExpressionFilter(["nlri 30.10.0.0/16"], BGPPrefixTrie.MODE_OR_LONGER).match(self.message))
+
+        for expression in ["", "type", "type UPDATE and", "(type UPDATE", "foo bar"]:
+            with self.assertRaises(OutputFilterError):
+                ExpressionFilter([expression])
+
+    def test_expression_pushdown(self):
+        f = ExpressionFilter(["type KEEPALIVE or (as 65000 and size ~19)"])
+        header = f.pushdown(BGPFilter.STAGE_HEADER)
+
+        self.assertIsNone(f.pushdown(BGPFilter.STAGE_PCAP))
+        self.assertFalse(header(BGPHeaderMessage(b"", 19, BGPStatics.MESSAGE_TYPE_OPEN, None)))
+        self.assertTrue(header(BGPHeaderMessage(b"", 60, BGPStatics.MESSAGE_TYPE_UPDATE, None)))
+        self.assertEqual(set(f.REQUIRED_ATTRIBUTES), set([BGPStatics.UPDATE_ATTRIBUTE_AS_PATH]))
+
+    def test_filter_chain(self):
+        filters = [ASNFilter(["65000"]), MessageTypeFilter(["KEEPALIVE"])]
+        chain = BGPFilterChain(filters, adaptive=True)
+
+        for i in range(0, BGPFilterChain.REORDER_INTERVAL + 1):
+            self.assertFalse(chain(self.message))
+
+        # The message type filter rejects every message and is moved to the front
+        self.assertIs(chain.order[0][0], filters[1])
+        self.assertEqual(chain.entries[0][1:3], [BGPFilterChain.REORDER_INTERVAL - 1, BGPFilterChain.REORDER_INTERVAL - 1])
+        self.assertEqual(len(chain.statistics()), 2)
+
+        # Reordering replaces the list, evaluations iterating over the previous order still see every filter
+        order = chain.order
+        chain.reorder()
+        self.assertIsNot(chain.order, order)
+        self.assertEqual(len(order), 2)
+
+    def test_negated_message_size(self):
+        self.assertTrue(MessageSizeFilter(["60"]).match(self.message))
+        self.assertTrue(MessageSizeFilter(["~19"]).match(self.message))
+        self.assertFalse(MessageSizeFilter(["~60"]).match(self.message))
+
+    def test_large_community(self):
+        self.assertTrue(LargeCommunityFilter(["1:2:3"]).match(self.message))
+        self.assertTrue(LargeCommunityFilter(["1:*:3"]).match(self.message))
+        self.assertFalse(LargeCommunityFilter(["~1:*:*"]).match(self.message))
+        self.assertTrue(LargeCommunityFilter(["~4:*:*"]).match(self.message))
+
+    def test_chain(self):
+        predicate = BGPFilter.chain([ASNFilter(["65000"]), NextHopFilter(["10.0.0.2", "10.0.0.1"])])
+        self.assertTrue(predicate(self.message))
+
+        predicate = BGPFilter.chain([ASNFilter(["65000"]), NextHopFilter(["10.0.0.2"])])
+        self.assertFalse(predicate(self.message))
+
+    def test_prefilter(self):
+        pcap_information = PCAPInformation((1, 0),
+                                           PCAPLayer2Information(unhexlify("112233445566"), None),
+                                           PCAPLayer3Information((10, 0, 0, 1), (10, 0, 0, 2)),
+                                           PCAPLayer4Information(179, 40000))
+
+        self.assertTrue(MACSourceFilter(MACSourceFilter.clear_input(["11:22:33:44:55:66"])).apply(pcap_information))
+        self.assertFalse(MACSourceFilter(["~112233445566"]).apply(pcap_information))
+        self.assertTrue(IPSourceFilter(["10.0.0.0/8", "192.168.0.1"]).apply(pcap_information))
+        self.assertFalse(IPDestinationFilter(["~10.0.0.0/30"]).apply(pcap_information))
+
+    def test_frame_prefilter(self):
+        frame = unhexlify("aabbccddeeff112233445566" + "0800" + "4500002800000000400600000a0000010a000002")
+
+        self.assertTrue(IPSourceFilter(["10.0.0.1"]).match_frame((1, 0), frame, 14))
+        self.assertFalse(IPDestinationFilter(["10.0.0.1", "10.0.1.0/24"]).match_frame((1, 0), frame, 14))
+        self.assertTrue(MACDestinationFilter(["aabbccddeeff"]).match_frame((1, 0), frame, 14))
+        self.assertTrue(TimestampRangeFilter(["0", "1.000001"]).match_frame((1, 0), frame, 14))
+        self.assertFalse(TimestampRangeFilter(["2017-02-01T10:00:00..2017-02-02"]).match_frame((1, 0), frame, 14))
+        self.assertTrue(TimestampRangeFilter([("~2017-02-01", "2017-02-02")]).match_frame((1, 0), frame, 14))
+
+        with self.assertRaises(OutputFilterError):
+            TimestampRangeFilter(["2", "1"])
+
+        with self.assertRaises(OutputFilterError):
+            IPSourceFilter(["10.0.0.0/33"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import bz2
+import gzip
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from binascii import unhexlify
+
+import pbgpp
+from pbgpp.Application.Flags.AddPathFlag import AddPathFlag
+from pbgpp.Application.Pipeline import PBGPPPipeline
+from pbgpp.Application.Stream import iter_records
+from pbgpp.BGP.Message import BGPMessage
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.Output.Formatters.JSON import JSONFormatter
+from pbgpp.Output.Formatters.MRT import MRTFormatter
+from pbgpp.MRT.Exceptions import MRTReaderError
+from pbgpp.MRT.Reader import MRTFileReader
+from pbgpp.MRT.Statics import MRTStatics
+from test_stream import build_frame, build_pcap
+
+
+def build_bgp4mp(ts, bgp_hex, subtype=MRTStatics.BGP4MP_MESSAGE_AS4, peer_ip=(10, 0, 0, 1), local_ip=(10, 0, 0, 2), usec=None):
+    if subtype in (MRTStatics.BGP4MP_MESSAGE, MRTStatics.BGP4MP_MESSAGE_LOCAL):
+        peers = struct.pack("!HHHH", 65000, 65001, 0, MRTStatics.AFI_IPV4 if len(peer_ip) == 4 else MRTStatics.AFI_IPV6)
+    else:
+        peers = struct.pack("!IIHH", 65000, 65001, 0, MRTStatics.AFI_IPV4 if len(peer_ip) == 4 else MRTStatics.AFI_IPV6)
+
+    body = peers + bytes(bytearray(peer_ip + local_ip)) + unhexlify(bgp_hex)
+
+    if usec is None:
+        return struct.pack("!IHHI", ts, MRTStatics.TYPE_BGP4MP, subtype, len(body)) + body
+
+    return struct.pack("!IHHII", ts, MRTStatics.TYPE_BGP4MP_ET, subtype, len(body) + 4, usec) + body
+
+
+def build_table_dump(subtype, body, ts=1):
+    return struct.pack("!IHHI", ts, MRTStatics.TYPE_TABLE_DUMP_V2, subtype, len(body)) + body
+
+
+def build_peer_index_table(peers):
+    body = struct.pack("!IH", 0x0a0000fe, 4) + b"test" + struct.pack("!H", len(peers))
+
+    for address, asn in peers:
+        peer_type = MRTStatics.PEER_TYPE_AS4 | (MRTStatics.PEER_TYPE_IPV6 if len(address) == 16 else 0)
+        body += struct.pack("!BI", peer_type, 1) + bytes(bytearray(address)) + struct.pack("!I", asn)
+
+    return build_table_dump(MRTStatics.TABLE_DUMP_V2_PEER_INDEX_TABLE, body)
+
+
+def build_rib(subtype, sequence, prefix, prefix_length, entries):
+    body = struct.pack("!IB", sequence, prefix_length) + bytes(bytearray(prefix[:(prefix_length + 7) // 8])) + struct.pack("!H", len(entries))
+
+    for peer_index, attributes_hex in entries:
+        attributes = unhexlify(attributes_hex)
+        body += struct.pack("!HIH", peer_index, 1000, len(attributes)) + attributes
+
+    return build_table_dump(subtype, body)
+
+
+class MRTTestCase(unittest.TestCase):
+    KEEPALIVE = "ffffffffffffffffffffffffffffffff001304"
+    UPDATE = "ffffffffffffffffffffffffffffffff002d0200000012400101004002040201fde84003040a000001181e0a00"
+    RIB_ATTRIBUTES = "40010100400206020100" + "00fde8" + "4003040a000001"
+    OPEN = "ffffffffffffffffffffffffffffffff002501045ba000b40a00000108020641040001fbd0"
+    OPEN_AS2 = "ffffffffffffffffffffffffffffffff001d0104fde900b40a00000200"
+    STATE_CHANGE = struct.pack("!IHHI", 1, MRTStatics.TYPE_BGP4MP, MRTStatics.BGP4MP_STATE_CHANGE, 16) + b"\x00" * 16
+
+    def test_reader(self):
+        data = build_bgp4mp(1, self.KEEPALIVE) + build_bgp4mp(2, self.UPDATE, usec=250)
+        records = list(MRTFileReader(io.BytesIO(data)))
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].getts(), (1, 0))
+        self.assertEqual(records[1].getts(), (2, 250))
+        self.assertEqual(records[1].type, MRTStatics.TYPE_BGP4MP_ET)
+
+    def test_reader_truncated(self):
+        data = build_bgp4mp(1, self.KEEPALIVE)
+        reader = MRTFileReader(io.BytesIO(data[:-3]))
+
+        with self.assertRaises(MRTReaderError):
+            reader.read_record()
+
+    def test_iter_messages(self):
+        data = self.STATE_CHANGE + build_bgp4mp(1, self.KEEPALIVE, subtype=MRTStatics.BGP4MP_MESSAGE) + \
+            build_bgp4mp(2, self.UPDATE, subtype=MRTStatics.BGP4MP_MESSAGE_AS4_LOCAL, usec=5)
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True))
+
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_KEEPALIVE, BGPStatics.MESSAGE_TYPE_UPDATE])
+        self.assertEqual(str(messages[1].nlri[0]), "30.10.0.0/24")
+        self.assertEqual(messages[1].pcap_information.get_timestamp(), (2, 5))
+
+        # Messages sent by the local system go from the local to the peer address
+        self.assertEqual(messages[0].pcap_information.get_ip().get_source_string(), "10.0.0.1")
+        self.assertEqual(messages[1].pcap_information.get_ip().get_source_string(), "10.0.0.2")
+        self.assertEqual(messages[1].pcap_information.get_source_as(), 65001)
+
+    def test_iter_messages_filters(self):
+        ipv6_peer = (0,) * 15 + (1,)
+        ipv6_local = (0,) * 15 + (2,)
+        data = build_bgp4mp(1, self.KEEPALIVE) + build_bgp4mp(2, self.UPDATE, peer_ip=ipv6_peer, local_ip=ipv6_local)
+
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True, filter_source_ip=["10.0.0.0/8"]))
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_KEEPALIVE])
+
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True, filter_source_ip=["~10.0.0.1"]))
+        self.assertEqual(messages[0].pcap_information.get_ip().get_source_string(), "::1")
+
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True, filter_expr="type UPDATE and time-range 2..3"))
+        self.assertEqual(len(messages), 1)
+
+    def test_compressed_files(self):
+        data = build_bgp4mp(1, self.KEEPALIVE) + build_bgp4mp(2, self.UPDATE)
+        directory = tempfile.mkdtemp()
+
+        try:
+            for name, compress in (("updates", lambda d: d), ("updates.gz", gzip.compress), ("updates.bz2", bz2.compress)):
+                path = os.path.join(directory, name)
+
+                with open(path, "wb") as f:
+                    f.write(compress(data))
+
+                messages = list(pbgpp.iter_messages(path, mrt=True, filter_nlri=["30.10.0.0/24"]))
+                self.assertEqual(len(messages), 1)
+
+            messages = list(pbgpp.iter_messages(os.path.join(directory, "updates*"), mrt=True))
+            self.assertEqual(len(messages), 6)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_table_dump(self):
+        ipv6_peer = (0x20, 0x01, 0x0d, 0xb8) + (0,) * 11 + (1,)
+        data = build_peer_index_table([((10, 0, 0, 1), 65000), (ipv6_peer, 65010)]) + \
+            build_rib(MRTStatics.TABLE_DUMP_V2_RIB_IPV4_UNICAST, 0, (30, 10, 0, 0), 24, [(0, self.RIB_ATTRIBUTES), (1, self.RIB_ATTRIBUTES)]) + \
+            build_rib(MRTStatics.TABLE_DUMP_V2_RIB_IPV4_UNICAST, 1, (), 0, [(0, self.RIB_ATTRIBUTES)]) + \
+            build_rib(MRTStatics.TABLE_DUMP_V2_RIB_IPV6_UNICAST, 2, (0x20, 0x01, 0x0d, 0xb8, 0x12), 40, [(1, self.RIB_ATTRIBUTES)])
+
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True))
+
+        self.assertEqual([str(m.nlri[0]) for m in messages], ["30.10.0.0/24", "30.10.0.0/24", "0.0.0.0/0", "2001:db8:1200::/40"])
+        self.assertEqual(messages[1].pcap_information.get_ip().get_source_string(), "2001:db8::1")
+        self.assertEqual(messages[1].pcap_information.get_ip().get_destination_string(), "10.0.0.254")
+        self.assertEqual(messages[0].originated_time, 1000)
+
+        # Identical attribute blobs are decoded once
+        self.assertIs(messages[0].path_attributes, messages[3].path_attributes)
+        self.assertEqual(messages[0].path_attributes[1].path_segments[0].segments, (65000,))
+
+        self.assertIn("30.10.0.0/24", JSONFormatter().apply(messages[0]))
+
+        # RIB entries can be written as UPDATE messages
+        update = BGPMessage.factory(messages[2].get_bytes()[16:], messages[2].pcap_information, {"addpath": AddPathFlag()})
+        self.assertEqual(str(update.nlri[0]), "0.0.0.0/0")
+
+        # IPv6 prefixes are announced in MP_REACH_NLRI (AFI, SAFI, next hop length, reserved byte and the prefix)
+        self.assertEqual(len(messages[3].get_bytes()), 19 + 4 + len(unhexlify(self.RIB_ATTRIBUTES)) + 3 + 4 + 1 + 6)
+
+    def test_table_dump_filters(self):
+        data = build_peer_index_table([((10, 0, 0, 1), 65000), ((10, 0, 0, 2), 65010)]) + \
+            build_rib(MRTStatics.TABLE_DUMP_V2_RIB_IPV4_UNICAST, 0, (30, 10, 0, 0), 24, [(0, self.RIB_ATTRIBUTES), (1, self.RIB_ATTRIBUTES)]) + \
+            build_rib(MRTStatics.TABLE_DUMP_V2_RIB_IPV6_UNICAST, 1, (0x20, 0x01, 0x0d, 0xb8), 32, [(1, self.RIB_ATTRIBUTES)])
+
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True, filter_source_ip=["10.0.0.2"], filter_last_asn=["65000"]))
+        self.assertEqual(len(messages), 2)
+
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True, filter_nlri=["2001:db8::/16"], filter_prefix_mode="orlonger"))
+        self.assertEqual([str(m.nlri[0]) for m in messages], ["2001:db8::/32"])
+
+    def test_table_dump_without_peer_index_table(self):
+        data = build_rib(MRTStatics.TABLE_DUMP_V2_RIB_IPV4_UNICAST, 0, (30, 10, 0, 0), 24, [(0, self.RIB_ATTRIBUTES)])
+        self.assertEqual(list(pbgpp.iter_messages(io.BytesIO(data), mrt=True)), [])
+
+    def test_formatter(self):
+        frames = [(1, build_frame(self.OPEN)), (2, build_frame(self.UPDATE)), (3, build_frame(self.KEEPALIVE, (10, 0, 0, 2), (10, 0, 0, 1)))]
+        formatter = MRTFormatter()
+        data = b"".join(formatter.apply(m) for m in pbgpp.iter_messages(frames))
+
+        records = list(MRTFileReader(io.BytesIO(data)))
+        self.assertEqual([r.type for r in records], [MRTStatics.TYPE_BGP4MP_ET] * 3)
+        self.assertEqual(records[1].getts(), (2, 0))
+
+        # Archives can be read again - AS numbers are learned from the OPEN message (4-byte ASN capability)
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True))
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_OPEN, BGPStatics.MESSAGE_TYPE_UPDATE, BGPStatics.MESSAGE_TYPE_KEEPALIVE])
+        self.assertEqual(str(messages[1].nlri[0]), "30.10.0.0/24")
+        self.assertEqual(messages[1].pcap_information.get_source_as(), 130000)
+        self.assertEqual(messages[2].pcap_information.get_destination_as(), 130000)
+        self.assertEqual(messages[2].pcap_information.get_ip().get_source_string(), "10.0.0.2")
+
+        # MRT input is written unchanged
+        self.assertEqual(b"".join(MRTFormatter().apply(m) for m in messages), data)
+
+    def test_formatter_observes_filtered_open(self):
+        # OPEN messages are shown to the formatter although the header filter discards them
+        frames = [(1, build_frame(self.OPEN)), (2, build_frame(self.UPDATE)), (3, build_frame(self.KEEPALIVE))]
+        formatter = MRTFormatter()
+
+        pipeline = PBGPPPipeline.from_options({"filter_message_type": ["UPDATE"]})
+        pipeline.set_observer(formatter.observe, formatter.OBSERVED_MESSAGE_TYPES)
+
+        messages = [m for header, payload in iter_records(frames) for m in pipeline.process(header, payload)]
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_UPDATE])
+
+        data = formatter.apply(messages[0])
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True))
+        self.assertEqual(messages[0].pcap_information.get_source_as(), 130000)
+
+    def test_formatter_as2_session(self):
+        # 10.0.0.2 doesn't announce the 4-byte ASN capability, so the session uses 2-byte AS_PATHs
+        frames = [(1, build_frame(self.OPEN)), (2, build_frame(self.OPEN_AS2, (10, 0, 0, 2), (10, 0, 0, 1))), (3, build_frame(self.UPDATE))]
+        formatter = MRTFormatter()
+        data = b"".join(formatter.apply(m) for m in pbgpp.iter_messages(frames))
+
+        # The session is known once both OPEN messages were seen
+        records = list(MRTFileReader(io.BytesIO(data)))
+        self.assertEqual([r.subtype for r in records], [MRTStatics.BGP4MP_MESSAGE_AS4, MRTStatics.BGP4MP_MESSAGE, MRTStatics.BGP4MP_MESSAGE])
+
+        # ASNs that don't fit into 2 bytes are replaced by AS_TRANS
+        messages = list(pbgpp.iter_messages(io.BytesIO(data), mrt=True))
+        self.assertEqual(messages[2].pcap_information.get_source_as(), MRTFormatter.AS_TRANS)
+        self.assertEqual(messages[2].pcap_information.get_destination_as(), 65001)
+        self.assertEqual(messages[2].path_attributes[1].path_segments[0].segments, (65000,))
+        self.assertEqual(b"".join(MRTFormatter().apply(m) for m in messages), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pbgpp
+from pbgpp.Output.Formatter import BGPFormatter
+from pbgpp.Output.Formatters.JSON import JSONFormatter
+from pbgpp.Output.Formatters.MRT import MRTFormatter
+from pbgpp.Output.Handler import OutputHandler
+from pbgpp.Output.Pipe import BGPPipe
+from pbgpp.Output.Pipes.FilePipe import FilePipe
+from test_stream import build_frame
+
+try:
+    from pbgpp.Output.Pipes.KafkaPipe import KafkaPipe
+except ImportError:
+    KafkaPipe = None
+
+
+class FakeFuture:
+    def __init__(self):
+        self.callbacks = []
+        self.errbacks = []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def add_errback(self, errback):
+        self.errbacks.append(errback)
+
+
+class FakeProducer:
+    # Records sent records instead of connecting to a broker - delivery reports are triggered by the tests
+    def __init__(self, **settings):
+        self.settings = settings
+        self.records = []
+        self.futures = []
+        self.flushed = False
+
+    def send(self, topic, value, key=None):
+        self.records.append((topic, value, key))
+        self.futures.append(FakeFuture())
+        return self.futures[-1]
+
+    def flush(self, timeout=None):
+        self.flushed = True
+
+    def close(self):
+        pass
+
+
+class RecordingPipe(BGPPipe):
+    # Text pipe recording its calls
+    def __init__(self):
+        self.calls = []
+
+    def output(self, output, message=None):
+        self.calls.append(("output", output))
+
+
+class BrokenFormatter(BGPFormatter):
+    # Fails on KEEPALIVE messages
+    def apply(self, message):
+        return str(message.type) + str(message.nlri[0])
+
+
+class PipeTestCase(unittest.TestCase):
+    UPDATE = "ffffffffffffffffffffffffffffffff002d0200000012400101004002040201fde84003040a000001181e0a00"
+    KEEPALIVE = "ffffffffffffffffffffffffffffffff001304"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "output.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_file_pipe_buffer_size(self):
+        pipe = FilePipe(self.path, buffer_size=10, flush_interval=60)
+
+        pipe.output("abc")
+        self.assertEqual(self.read(), b"")
+
+        # Reaching the buffer size writes everything collected so far
+        pipe.output(u"d\u00e9fghij")
+        self.assertEqual(self.read(), u"abc\nd\u00e9fghij\n".encode("utf-8"))
+
+    def test_file_pipe_flush(self):
+        pipe = FilePipe(self.path, binary=True, flush_interval=60)
+        pipe.output(b"\x00\x01")
+        pipe.output(b"\x02")
+        self.assertEqual(self.read(), b"")
+
+        pipe.flush()
+        self.assertEqual(self.read(), b"\x00\x01\x02")
+
+    def test_output_handler_bytes(self):
+        messages = list(pbgpp.iter_messages([build_frame(self.UPDATE + self.UPDATE)]))
+        pipe = FilePipe(self.path, binary=True)
+
+        # Binary formatters and buffered pipes exchange bytes
+        handler = OutputHandler(message=messages, formatter=MRTFormatter(), pipe=pipe)
+        self.assertTrue(handler.bytes)
+
+        with mock.patch.object(MRTFormatter, "apply_bytes", side_effect=[b"a", b"b"]) as apply_bytes:
+            handler.handle()
+
+        self.assertEqual(apply_bytes.call_count, 2)
+        pipe.flush()
+        self.assertEqual(self.read(), b"ab")
+
+    def test_output_handler_many(self):
+        messages = list(pbgpp.iter_messages([build_frame(self.UPDATE + self.KEEPALIVE + self.UPDATE)]))
+
+        # Text is encoded once for all messages of a packet
+        pipe = FilePipe(self.path, flush_interval=0)
+        handler = OutputHandler(message=messages, formatter=JSONFormatter(), pipe=pipe)
+        self.assertFalse(handler.bytes)
+
+        handler.handle()
+        self.assertEqual(len(self.read().splitlines()), 3)
+
+        # Messages that can't be formatted are dropped, text pipes receive text
+        pipe = RecordingPipe()
+        OutputHandler(message=messages, formatter=BrokenFormatter(), pipe=pipe).handle()
+        self.assertEqual(pipe.calls, [("output", "230.10.0.0/24")] * 2)
+
+    def test_file_pipe_flush_interval(self):
+        pipe = FilePipe(self.path, flush_interval=0)
+        pipe.output("abc")
+        self.assertEqual(self.read(), b"abc\n")
+
+    def test_file_pipe_flush_idle(self):
+        pipe = FilePipe(self.path, flush_interval=0.2)
+        pipe.output("abc")
+        timer = pipe.timer
+        self.assertEqual(self.read(), b"")
+
+        # Buffered output is written after the flush interval without further output
+        timer.join(2)
+        self.assertEqual(self.read(), b"abc\n")
+
+
+@unittest.skipIf(KafkaPipe is None, "kafka-python is not installed")
+class KafkaPipeTestCase(unittest.TestCase):
+    UPDATE = "ffffffffffffffffffffffffffffffff002d0200000012400101004002040201fde84003040a000001181e0a00"
+
+    def create(self, **options):
+        with mock.patch("pbgpp.Output.Pipes.KafkaPipe.KafkaProducer", FakeProducer):
+            return KafkaPipe("127.0.0.1", "pbgpp", **options)
+
+    def test_settings(self):
+        pipe = self.create(compression_type="lz4", linger_ms=None)
+
+        self.assertEqual(pipe.handle.settings["compression_type"], "lz4")
+        self.assertEqual(pipe.handle.settings["linger_ms"], KafkaPipe.PRODUCER_DEFAULTS["linger_ms"])
+
+    def test_keys(self):
+        frames = [build_frame(self.UPDATE), build_frame(self.UPDATE, source_ip=(10, 0, 0, 2), destination_ip=(10, 0, 0, 1))]
+        messages = list(pbgpp.iter_messages(frames))
+
+        pipe = self.create(key=KafkaPipe.KEY_PEER)
+        pipe.output("a", messages[0])
+        pipe.output(b"b", messages[1])
+        self.assertEqual(pipe.handle.records, [("pbgpp", b"a", b"10.0.0.1"), ("pbgpp", b"b", b"10.0.0.2")])
+
+        # Both directions of a session share the key
+        pipe = self.create(key=KafkaPipe.KEY_SESSION)
+        pipe.output("a", messages[0])
+        pipe.output("b", messages[1])
+        self.assertEqual([key for topic, value, key in pipe.handle.records], [b"10.0.0.1-10.0.0.2"] * 2)
+
+    def test_backpressure(self):
+        pipe = self.create(max_in_flight=1)
+        pipe.output("a")
+
+        # The second record is sent once the first one was delivered
+        thread = threading.Thread(target=pipe.output, args=("b",))
+        thread.start()
+        thread.join(0.1)
+        self.assertEqual(len(pipe.handle.records), 1)
+
+        pipe.handle.futures[0].errbacks[0](Exception("timeout"))
+        thread.join(1)
+        self.assertEqual(len(pipe.handle.records), 2)
+        self.assertEqual(pipe.failed, 1)
+
+        pipe.handle.futures[1].callbacks[0](None)
+        self.assertEqual(pipe.delivered, 1)
+
+        handle = pipe.handle
+        pipe.close()
+        self.assertTrue(handle.flushed)
+
+    def test_send_error(self):
+        pipe = self.create(max_in_flight=1)
+
+        # Records that can't be sent don't keep their slot
+        with mock.patch.object(pipe.handle, "send", side_effect=ValueError("invalid value")):
+            pipe.output("a")
+            pipe.output("b")
+
+        self.assertEqual(pipe.failed, 2)
+        pipe.output("c")
+        self.assertEqual(pipe.handle.records, [("pbgpp", b"c", None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
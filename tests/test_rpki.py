@@ -0,0 +1,119 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import os
+import tempfile
+import unittest
+from binascii import unhexlify
+
+from pbgpp.Application.Flags.AddPathFlag import AddPathFlag
+from pbgpp.BGP.Message import BGPMessage
+from pbgpp.Output.Exceptions import OutputFilterError
+from pbgpp.Output.Filters.ExpressionFilter import ExpressionFilter
+from pbgpp.Output.Filters.ROVFilter import ROVFilter
+from pbgpp.RPKI.Exceptions import RPKIVRPFileError
+from pbgpp.RPKI.Validator import RPKIValidator
+
+
+class RPKITestCase(unittest.TestCase):
+
+    """
+    UPDATE_MESSAGE (without marker)
+
+    | 00 3c 02 | 00 00 | 00 21 | ORIGIN | AS_PATH 65000 | NEXT_HOP 10.0.0.1 | LARGE_COMMUNITIES 1:2:3 | NLRI 30.10.0.0/24 |
+    """
+    UPDATE_MESSAGE = "003c0200000021400101004002040201fde84003040a000001c0200c000000010000000200000003181e0a00"
+
+    VRPS_JSON = {"roas": [{"asn": "AS65000", "prefix": "30.10.0.0/16", "maxLength": 24, "ta": "ripe"},
+                          {"asn": 65001, "prefix": "40.0.0.0/8", "maxLength": 8, "ta": "ripe"}]}
+
+    VRPS_CSV = "ASN,IP Prefix,Max Length,Trust Anchor\nAS65001,30.10.0.0/16,16,ripe\n"
+
+    def setUp(self):
+        self.files = []
+
+    def tearDown(self):
+        for path in self.files:
+            os.remove(path)
+
+    def write_vrps(self, content):
+        handle, path = tempfile.mkstemp()
+        self.files.append(path)
+
+        with os.fdopen(handle, "w") as f:
+            f.write(content)
+
+        return path
+
+    def message(self):
+        return BGPMessage.factory(unhexlify(self.UPDATE_MESSAGE), None, {"addpath": AddPathFlag()})
+
+    def test_validate(self):
+        validator = RPKIValidator(self.write_vrps(json.dumps(self.VRPS_JSON)))
+        network = (30 << 24) | (10 << 16)
+
+        self.assertEqual(validator.validate(4, network, 24, 65000), RPKIValidator.STATE_VALID)
+        self.assertEqual(validator.validate(4, network, 25, 65000), RPKIValidator.STATE_INVALID)
+        self.assertEqual(validator.validate(4, network, 24, 65001), RPKIValidator.STATE_INVALID)
+        self.assertEqual(validator.validate(4, network, 24, None), RPKIValidator.STATE_INVALID)
+        self.assertEqual(validator.validate(4, 50 << 24, 8, 65000), RPKIValidator.STATE_NOT_FOUND)
+
+    def test_validate_message(self):
+        message = self.message()
+        RPKIValidator(self.write_vrps(json.dumps(self.VRPS_JSON))).validate_message(message)
+        self.assertEqual(message.rov, [RPKIValidator.STATE_VALID])
+
+        self.assertTrue(ROVFilter(["valid"]).match(message))
+        self.assertFalse(ROVFilter(["invalid", "not-found"]).match(message))
+        self.assertFalse(ROVFilter(["~valid"]).match(message))
+        self.assertTrue(ExpressionFilter(["rov valid and as 65000"]).match(message))
+
+        message = self.message()
+        RPKIValidator(self.write_vrps(self.VRPS_CSV)).validate_message(message)
+        self.assertEqual(message.rov, [RPKIValidator.STATE_INVALID])
+
+    def test_reload(self):
+        path = self.write_vrps(self.VRPS_CSV)
+        validator = RPKIValidator(path)
+        self.assertEqual(validator.validate(4, (30 << 24) | (10 << 16), 16, 65000), RPKIValidator.STATE_INVALID)
+
+        with open(path, "w") as f:
+            f.write(json.dumps(self.VRPS_JSON))
+
+        validator.reload()
+        self.assertEqual(validator.validate(4, (30 << 24) | (10 << 16), 16, 65000), RPKIValidator.STATE_VALID)
+
+        # A broken file keeps the previous VRPs
+        with open(path, "w") as f:
+            f.write("{broken")
+
+        validator.reload()
+        self.assertEqual(validator.validate(4, (30 << 24) | (10 << 16), 16, 65000), RPKIValidator.STATE_VALID)
+
+    def test_errors(self):
+        with self.assertRaises(RPKIVRPFileError):
+            RPKIValidator(self.write_vrps("AS65000,30.10.0.0/33,33,ripe\n"))
+
+        with self.assertRaises(OutputFilterError):
+            ROVFilter(["unknown"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,356 @@
+#
+# This file is part of PCAP BGP Parser (pbgpp)
+#
+# Copyright 2016-2017 DE-CIX Management GmbH
+# Author: DE-CIX Management GmbH <rnd@de-cix.net>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import io
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from binascii import unhexlify
+
+import pbgpp
+from pbgpp.Application.IndexHandler import PBGPPIndexHandler
+from pbgpp.BGP.PrefixTrie import BGPPrefixTrie
+from pbgpp.BGP.Statics import BGPStatics
+from pbgpp.Output.Formatters.JSON import JSONFormatter
+from pbgpp.Output.Formatters.LineBased import LineBasedFormatter
+from pbgpp.Output.Formatters.PCAP import PCAPFormatter
+from pbgpp.PCAP.Follow import PCAPChangeNotifier, PCAPFollower
+from pbgpp.PCAP.Frame import PCAPFrame
+from pbgpp.PCAP.Index import PCAPTimeIndex
+from pbgpp.PCAP.Reader import PCAPFileReader
+from pbgpp.PCAP.RouteIndex import PCAPRouteIndex
+
+
+def build_frame(bgp_hex, source_ip=(10, 0, 0, 1), destination_ip=(10, 0, 0, 2)):
+    bgp = unhexlify(bgp_hex)
+
+    tcp = struct.pack("!HHLLBBHHH", 179, 40000, 1, 1, 5 << 4, 0x18, 0, 0, 0) + bgp
+    ip = struct.pack("!BBHHHBBH4B4B", 0x45, 0, 20 + len(tcp), 0, 0, 64, 6, 0, *(source_ip + destination_ip)) + tcp
+    return unhexlify("aabbccddeeff112233445566") + b"\x08\x00" + ip
+
+
+def build_pcap(frames):
+    data = struct.pack("<IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)
+
+    for ts, frame in frames:
+        data += struct.pack("<IIII", ts, 0, len(frame), len(frame)) + frame
+
+    return data
+
+
+class StreamTestCase(unittest.TestCase):
+    KEEPALIVE = "ffffffffffffffffffffffffffffffff001304"
+    UPDATE = "ffffffffffffffffffffffffffffffff002d0200000012400101004002040201fde84003040a000001181e0a00"
+
+    def test_pcap_reader(self):
+        data = build_pcap([(1, build_frame(self.KEEPALIVE)), (2, build_frame(self.UPDATE))])
+        records = list(PCAPFileReader(io.BytesIO(data)))
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1][0].getts(), (2, 0))
+
+    def test_pcap_reader_truncated_record(self):
+        data = build_pcap([(1, build_frame(self.KEEPALIVE))])
+        handle = io.BytesIO(data[:-5])
+        reader = PCAPFileReader(handle)
+
+        self.assertIsNone(reader.read_record())
+        self.assertEqual(handle.tell(), 24)
+
+    def test_iter_messages_file_object(self):
+        data = build_pcap([(1, build_frame(self.KEEPALIVE)), (2, build_frame(self.UPDATE))])
+        messages = list(pbgpp.iter_messages(io.BytesIO(data)))
+
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_KEEPALIVE, BGPStatics.MESSAGE_TYPE_UPDATE])
+        self.assertEqual(str(messages[1].nlri[0]), "30.10.0.0/24")
+
+    def test_iter_messages_filters(self):
+        frames = [(1, build_frame(self.KEEPALIVE)), (2, build_frame(self.UPDATE, source_ip=(10, 0, 0, 9)))]
+
+        messages = list(pbgpp.iter_messages(frames, filter_message_type=["UPDATE"]))
+        self.assertEqual(len(messages), 1)
+
+        messages = list(pbgpp.iter_messages(frames, filter_source_ip=["10.0.0.1"]))
+        self.assertEqual(messages[0].type, BGPStatics.MESSAGE_TYPE_KEEPALIVE)
+        self.assertEqual(messages[0].pcap_information.get_timestamp(), (1, 0))
+
+    def test_iter_messages_expression(self):
+        frames = [(1, build_frame(self.KEEPALIVE)), (2, build_frame(self.UPDATE, source_ip=(10, 0, 0, 9)))]
+
+        messages = list(pbgpp.iter_messages(frames, filter_expr="not peer 10.0.0.9 or nlri 30.10.0.0/24"))
+        self.assertEqual(len(messages), 2)
+
+        messages = list(pbgpp.iter_messages(frames, filter_expr="type UPDATE and not source-ip 10.0.0.9"))
+        self.assertEqual(len(messages), 0)
+
+    def test_iter_messages_scan_only(self):
+        frames = [(1, build_frame(self.KEEPALIVE)), (2, build_frame(self.UPDATE))]
+        messages = list(pbgpp.iter_messages(frames, scan_only=True, filter_message_size=["45"]))
+
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0].type, BGPStatics.MESSAGE_TYPE_UPDATE)
+        self.assertFalse(hasattr(messages[0], "nlri"))
+
+    def test_iter_messages_header_filter(self):
+        frames = [(1, build_frame(self.KEEPALIVE)), (2, build_frame(self.UPDATE))]
+
+        messages = list(pbgpp.iter_messages(frames, filter_message_type=["KEEPALIVE", "~UPDATE"]))
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_KEEPALIVE])
+
+        messages = list(pbgpp.iter_messages(frames, filter_message_subtype=["ANNOUNCE"], scan_only=True))
+        self.assertEqual(messages[0].subtype, BGPStatics.UPDATE_TYPE_ANNOUNCE)
+
+    def test_iter_messages_frame_prefilters(self):
+        frames = [(1, build_frame(self.KEEPALIVE)), (2, build_frame(self.UPDATE, source_ip=(10, 0, 1, 9))), (3, build_frame(self.KEEPALIVE))]
+
+        messages = list(pbgpp.iter_messages(frames, filter_source_ip=["10.0.1.0/24"]))
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_UPDATE])
+
+        messages = list(pbgpp.iter_messages(frames, filter_source_ip=["~10.0.0.0/24"], filter_destination_mac=["aabbccddeeff"]))
+        self.assertEqual(len(messages), 1)
+
+        messages = list(pbgpp.iter_messages(frames, filter_time_range=[["2", "3"]]))
+        self.assertEqual([m.type for m in messages], [BGPStatics.MESSAGE_TYPE_UPDATE, BGPStatics.MESSAGE_TYPE_KEEPALIVE])
+
+        messages = list(pbgpp.iter_messages(frames, filter_expr="time-range ~1.5..2.5 and peer 10.0.0.0/16"))
+        self.assertEqual(len(messages), 2)
+
+    def test_time_index(self):
+        frames = [(ts, build_frame(self.UPDATE if ts % 10 == 0 else self.KEEPALIVE)) for ts in range(1000, 6000)]
+        handle, path = tempfile.mkstemp(suffix=".pcap")
+
+        with os.fdopen(handle, "wb") as f:
+            f.write(build_pcap(frames))
+
+        try:
+            expected = [m.pcap_information.ts for m in pbgpp.iter_messages(frames, filter_time_range=[["3000", "3100"]])]
+            self.assertEqual(len(expected), 101)
+
+            # Galloping search without index (with a smaller step to search within the small file)
+            class SmallStepIndex(PCAPTimeIndex):
+                GALLOP_STEP = 4096
+
+            with open(path, "rb") as f:
+                reader = PCAPFileReader(f)
+                first = reader.offset
+                offset = SmallStepIndex.gallop(reader, (3000, 0))
+
+                self.assertGreater(offset, first)
+                self.assertLess(reader.peek_timestamp(offset), (3000 - PCAPTimeIndex.REORDER_TOLERANCE, 0))
+
+                # Record boundaries are found from arbitrary offsets
+                reader.seek(offset)
+                reader.read_record()
+                self.assertEqual(reader.find_record(offset + 1), reader.offset)
+
+            self.assertEqual([m.pcap_information.ts for m in pbgpp.iter_messages(path, filter_time_range=[["3000", "3100"]])], expected)
+
+            # Sidecar index
+            index = PCAPTimeIndex.build(path, 100)
+            index.write(PCAPTimeIndex.path_for(path))
+            index = PCAPTimeIndex.load(path)
+
+            self.assertEqual(len(index), 50)
+            start, stop = index.seek_range((3000, 0), (3100, 0))
+            self.assertEqual(stop - start, 200 * PCAPFileReader.RECORD_HEADER_LENGTH + sum(len(frame) for ts, frame in frames[2000:2200]))
+
+            self.assertEqual([m.pcap_information.ts for m in pbgpp.iter_messages(path, filter_time_range=[["3000", "3100"]])], expected)
+            self.assertEqual(len(list(pbgpp.iter_messages(path, filter_time_range=[["7000", "8000"]]))), 0)
+        finally:
+            os.remove(path)
+
+            if os.path.isfile(PCAPTimeIndex.path_for(path)):
+                os.remove(PCAPTimeIndex.path_for(path))
+
+    def test_route_index(self):
+        other = self.UPDATE.replace("fde8", "fde9").replace("181e0a00", "181e0b00")
+        frames = [(ts, build_frame([self.UPDATE, other, self.KEEPALIVE][ts % 3])) for ts in range(1000, 1300)]
+        handle, path = tempfile.mkstemp(suffix=".pcap")
+
+        with os.fdopen(handle, "wb") as f:
+            f.write(build_pcap(frames))
+
+        try:
+            PBGPPIndexHandler.build_route_index(path).write(PCAPRouteIndex.path_for(path))
+            index = PCAPRouteIndex.load(path)
+
+            self.assertEqual(len(index.lookup_prefix((30 << 24) | (11 << 16), 24)), 100)
+            self.assertEqual(len(index.lookup_prefix(30 << 24, 8, BGPPrefixTrie.MODE_OR_LONGER)), 200)
+            self.assertEqual(len(index.lookup_prefix((30 << 24) | (11 << 16), 25, BGPPrefixTrie.MODE_OR_SHORTER)), 100)
+            self.assertEqual(index.query([[("origin", 65001)], [("prefix", 4, (30 << 24) | (10 << 16), 24, "exact")]]), [])
+            index.close()
+
+            for options in [{"filter_nlri": ["30.11.0.0/24"]}, {"filter_last_asn": ["65000"]},
+                            {"filter_withdrawn": ["30.11.0.0/24"]}, {"filter_nlri": ["30.0.0.0/8"], "filter_prefix_mode": "orlonger"}]:
+                expected = [m.pcap_information.ts for m in pbgpp.iter_messages(frames, **options)]
+                self.assertEqual([m.pcap_information.ts for m in pbgpp.iter_messages(path, **options)], expected)
+
+            # Indexes built with another ADD-PATH setting are ignored
+            self.assertIsNone(PCAPRouteIndex.load(path, 1))
+
+            PBGPPIndexHandler.build_route_index(path, 1).write(PCAPRouteIndex.path_for(path))
+            self.assertIsNone(PCAPRouteIndex.load(path))
+
+            index = PCAPRouteIndex.load(path, 1)
+            self.assertEqual(index.add_path, 1)
+            index.close()
+        finally:
+            os.remove(path)
+            os.remove(PCAPRouteIndex.path_for(path))
+
+    def test_follow(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "dump.pcap")
+        checkpoint = os.path.join(directory, "checkpoint.json")
+
+        data = build_pcap([(ts, build_frame(self.KEEPALIVE)) for ts in range(0, 10)])
+        record_length = PCAPFileReader.RECORD_HEADER_LENGTH + len(build_frame(self.KEEPALIVE))
+
+        try:
+            # First run reads 5 records and half of the sixth
+            with open(path, "wb") as f:
+                f.write(data[0:PCAPFileReader.GLOBAL_HEADER_LENGTH + 5 * record_length + 20])
+
+            follower = PCAPFollower(path=path, checkpoint=checkpoint, poll_interval=0.01, stop_at_end=True)
+            self.assertEqual([r[0].getts()[0] for r in follower], [0, 1, 2, 3, 4])
+
+            # Second run continues at the checkpoint once the file has grown
+            with open(path, "ab") as f:
+                f.write(data[PCAPFileReader.GLOBAL_HEADER_LENGTH + 5 * record_length + 20:])
+
+            follower = PCAPFollower(path=path, checkpoint=checkpoint, poll_interval=0.01, stop_at_end=True)
+            self.assertEqual([r[0].getts()[0] for r in follower], [5, 6, 7, 8, 9])
+
+            # Rotated captures are read in the order they were written
+            rotated = os.path.join(directory, "dump.pcap1")
+
+            with open(rotated, "wb") as f:
+                f.write(build_pcap([(10, build_frame(self.UPDATE))]))
+
+            os.utime(rotated, (os.path.getmtime(path) + 1, os.path.getmtime(path) + 1))
+
+            follower = PCAPFollower(directory=directory, pattern="dump.pcap*", checkpoint=checkpoint, poll_interval=0.01, stop_at_end=True)
+            self.assertEqual([r[0].getts()[0] for r in follower], [10])
+
+            # Without checkpoint all files of the directory are read
+            follower = PCAPFollower(directory=directory, pattern="dump.pcap*", poll_interval=0.01, stop_at_end=True)
+            self.assertEqual(len(list(follower)), 11)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_change_notifier(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            notifier = PCAPChangeNotifier(directory, poll_interval=0.01)
+
+            with open(os.path.join(directory, "dump.pcap"), "wb") as f:
+                f.write(b"x")
+
+            # Either inotify reported the change or the poll interval elapsed
+            notifier.wait()
+            self.assertFalse(notifier.wait())
+            notifier.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_json_formatter(self):
+        frames = [(1, build_frame(self.UPDATE + self.KEEPALIVE)), (2, build_frame(self.UPDATE, source_ip=(10, 0, 0, 9)))]
+        messages = list(pbgpp.iter_messages(frames))
+
+        # The json module renders exactly like json.dumps() of the whole object
+        output = [JSONFormatter(JSONFormatter.SERIALIZER_JSON).apply(m) for m in messages]
+        self.assertEqual([json.dumps(json.loads(o)) for o in output], output)
+
+        data = json.loads(output[0])
+        self.assertEqual(data["message_data"]["nlri"], ["30.10.0.0/24"])
+        self.assertNotIn("rov", data["message_data"])
+        self.assertEqual(json.loads(output[1])["message_type_string"], "KEEPALIVE")
+        self.assertEqual(json.loads(output[2])["source_ip"], "10.0.0.9")
+
+        for serializer in JSONFormatter.available_serializers():
+            formatter = JSONFormatter(serializer)
+            self.assertEqual([json.loads(formatter.apply(m)) for m in messages], [json.loads(o) for o in output])
+
+        # Validation states are added if a VRP file is used
+        messages[0].rov = ["valid"]
+        self.assertEqual(json.loads(JSONFormatter().apply(messages[0]))["message_data"]["rov"], ["valid"])
+
+    def test_line_formatter(self):
+        # UPDATE with communities 1:2 3:4, large community 1:2:3 and AS path 65000 {65001 65002}
+        update = "ffffffffffffffffffffffffffffffff004d02000000324001010040020a0201fde80102fde9fdea4003040a000001c008080001000200030004c0200c000000010000000200000003181e0a00"
+        messages = list(pbgpp.iter_messages([(1, build_frame(update + self.KEEPALIVE))]))
+
+        formatter = LineBasedFormatter(fields=["src_ip", "prefix", "as_path", "communities", "large_communities", "asn", "subtype"])
+        self.assertEqual(formatter.apply(messages[0]), "10.0.0.1\t30.10.0.0/24\t65000 (65001 65002)\t1:2 3:4\t1:2:3\tNone\tANNOUNCE")
+        self.assertEqual(formatter.apply(messages[1]), "10.0.0.1\tNone\tNone\tNone\tNone\tNone\tNone")
+
+    def test_pcap_formatter(self):
+        frames = [(1, build_frame(self.KEEPALIVE + self.KEEPALIVE)), (2, build_frame(self.UPDATE, source_ip=(10, 0, 0, 9))), (3, build_frame(self.UPDATE))]
+        formatter = PCAPFormatter()
+
+        # Frames containing several matching messages are written once
+        messages = list(pbgpp.iter_messages(frames, filter_source_ip=["10.0.0.1"]))
+        output = b"".join(o for o in map(formatter.apply, messages) if o is not None)
+
+        records = list(PCAPFileReader(io.BytesIO(output)))
+        self.assertEqual([(header.getts(), payload) for header, payload in records], [((1, 0), frames[0][1]), ((3, 0), frames[2][1])])
+
+    def test_pcap_formatter_mixed_link_types(self):
+        ethernet = build_frame(self.UPDATE)
+        cooked = PCAPFrame.to_cooked_capture(ethernet)
+
+        for frames, link_type in [([(1, ethernet), (2, cooked)], PCAPFormatter.LINK_TYPE_ETHERNET),
+                                  ([(1, cooked), (2, ethernet)], PCAPFormatter.LINK_TYPE_LINUX_SLL)]:
+            formatter = PCAPFormatter()
+            output = b"".join(formatter.apply(m) for m in pbgpp.iter_messages(frames))
+
+            # Frames of the other link type are converted to the link type of the first frame
+            self.assertEqual(struct.unpack("<I", output[20:24])[0], link_type)
+
+            records = list(PCAPFileReader(io.BytesIO(output)))
+            self.assertEqual([len(payload) for header, payload in records], [len(frames[0][1])] * 2)
+            self.assertEqual([header.getlen() for header, payload in records], [len(frames[0][1])] * 2)
+            self.assertEqual(len(list(pbgpp.iter_messages([(header.getts()[0], payload) for header, payload in records]))), 2)
+
+    def test_pcap_formatter_flows(self):
+        frames = [(1, build_frame(self.UPDATE)), (2, build_frame(self.KEEPALIVE)), (3, build_frame(self.KEEPALIVE, source_ip=(10, 0, 0, 9)))]
+        formatter = PCAPFormatter(flows=True)
+        headers = [header for header, payload in PCAPFileReader(io.BytesIO(build_pcap(frames)))]
+
+        message = next(pbgpp.iter_messages(frames[:1]))
+        output = formatter.apply(message)
+
+        # Only frames of the connection of the written frame follow
+        output += formatter.apply_frame(headers[1], frames[1][1])
+        self.assertIsNone(formatter.apply_frame(headers[2], frames[2][1]))
+
+        records = list(PCAPFileReader(io.BytesIO(output)))
+        self.assertEqual([payload for header, payload in records], [frames[0][1], frames[1][1]])
+
+    def test_iter_messages_unknown_option(self):
+        with self.assertRaises(Exception):
+            list(pbgpp.iter_messages([], filter_unknown=["x"]))
+
+
+if __name__ == '__main__':
+    unittest.main()